@@ -0,0 +1,103 @@
+# busywait.py
+# Low-rate per-thread CPU sampling of a JAR process from /proc/<pid>/task/*/stat.
+# A thread that keeps a core busy while the JAR prints nothing is almost always a
+# polling / spinning loop, the usual cause of elevator CTLE.
+import os
+
+SAMPLE_INTERVAL = 0.5      # seconds between samples, driven by the harness monitor loop
+BUSY_THRESHOLD = 0.8       # share of one core that counts as "busy" within an interval
+BUSY_MIN_SECONDS = 2.0     # continuous busy-while-silent time before a thread is reported
+# JVM housekeeping threads (JIT, GC, ...) burn CPU at start-up regardless of user code
+JVM_THREAD_PREFIXES = ("C1 Compiler", "C2 Compiler", "GC Thread", "G1 ",
+                       "VM Thread", "VM Periodic", "Sweeper", "Common-Cleaner", "Signal Dispatch", "Finalizer",
+                       "Reference Handl", "Service Thread", "Monitor Deflati", "Notification Th")
+
+try:
+    _CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+except (AttributeError, ValueError, OSError):
+    _CLOCK_TICKS = 100
+
+
+def _read_task_times(pid):
+    """{tid: (name, cpu seconds)} for every thread of pid, {} if /proc is unavailable."""
+    tasks = {}
+    task_dir = f"/proc/{pid}/task"
+    try:
+        tids = os.listdir(task_dir)
+    except OSError:
+        return tasks
+    for tid in tids:
+        try:
+            with open(f"{task_dir}/{tid}/stat", "rb") as f:
+                stat = f.read().decode("utf-8", errors="replace")
+        except OSError:
+            continue # Thread exited between listdir and open
+        # comm may contain spaces / parentheses, the fields after the last ')' are fixed
+        name = stat[stat.find("(") + 1:stat.rfind(")")]
+        fields = stat[stat.rfind(")") + 2:].split()
+        try:
+            ticks = int(fields[11]) + int(fields[12]) # utime + stime
+        except (IndexError, ValueError):
+            continue
+        tasks[tid] = (name, ticks / _CLOCK_TICKS)
+    return tasks
+
+
+class ThreadCpuSampler:
+    """
+    Call sample(now, output_lines) from the monitor loop; it only reads /proc once per
+    SAMPLE_INTERVAL. Keeps a compact timeline (whole-process CPU % per interval), per
+    thread busy-while-silent streaks, and the CPU seconds user threads burnt during
+    intervals with no new output ("idle CPU burn").
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.enabled = os.path.isdir(f"/proc/{pid}/task")
+        self.timeline = [] # CPU % of the whole process per SAMPLE_INTERVAL, as ints
+        self.idle_cpu = 0.0
+        self._last_time = None
+        self._last_lines = 0
+        self._last_ticks = {}
+        self._streaks = {}   # tid -> seconds busy while silent, current streak
+        self._suspects = {}  # thread name -> longest busy-while-silent streak seen
+
+    def sample(self, now, output_lines):
+        if not self.enabled or (self._last_time is not None and now - self._last_time < SAMPLE_INTERVAL):
+            return
+        tasks = _read_task_times(self.pid)
+        if self._last_time is None:
+            self._last_time, self._last_lines = now, output_lines
+            self._last_ticks = {tid: cpu for tid, (_, cpu) in tasks.items()}
+            return
+        interval = now - self._last_time
+        silent = output_lines == self._last_lines
+        total_delta = 0.0
+        for tid, (name, cpu) in tasks.items():
+            delta = cpu - self._last_ticks.get(tid, cpu)
+            total_delta += delta
+            if name.startswith(JVM_THREAD_PREFIXES):
+                continue
+            if silent:
+                self.idle_cpu += delta
+            if silent and delta >= BUSY_THRESHOLD * interval:
+                streak = self._streaks.get(tid, 0.0) + interval
+                self._streaks[tid] = streak
+                if streak >= BUSY_MIN_SECONDS:
+                    self._suspects[name] = max(self._suspects.get(name, 0.0), streak)
+            else:
+                self._streaks[tid] = 0.0
+        self.timeline.append(int(round(100 * total_delta / interval)) if interval > 0 else 0)
+        self._last_time, self._last_lines = now, output_lines
+        self._last_ticks = {tid: cpu for tid, (_, cpu) in tasks.items()}
+
+    def report(self):
+        """{idle_cpu, busy_threads: [(name, seconds)], timeline, interval} or None when /proc is unavailable."""
+        if not self.enabled:
+            return None
+        return {
+            "idle_cpu": self.idle_cpu,
+            "busy_threads": sorted(self._suspects.items(), key=lambda kv: -kv[1]),
+            "timeline": self.timeline,
+            "interval": SAMPLE_INTERVAL,
+        }
@@ -1,6 +1,27 @@
 import pandas as pd
 import numpy as np
 import re
+import os
+import json
+import time
+import concurrent.futures
+
+PERF_P_VALUE = 0.10
+LOG_CACHE_NAME = ".calc_cache.npz" # 存放在 logs_dir 下的列式压缩缓存
+LOG_CACHE_VERSION = 2
+# test.py 日志中每轮汇总表的表头
+ROUND_HEADER_RE = re.compile(r'^--- Test Round (\d+) Summary \(Preset: (.*) \| Wall Limit: ([\d.]+)s\) ---$')
+# 日志表头 -> DataFrame 列名
+LOG_COLUMN_MAP = {
+    'JAR': 'jar', 'Status': 'status', 'Score': 'score', 'T_final': 't_final', 'WT': 'wt', 'W': 'w',
+    'CPU(s)': 'cpu', 'Wall(s)': 'wall', 'vs Ref': 'ref_ratio', 'Idle CPU': 'idle_cpu', 'Details': 'details',
+}
+# 每列的 dtype，category 列在缓存中以 codes + categories 形式保存
+LOG_DTYPES = {
+    'log_file': 'category', 'round': 'int32', 'preset': 'category', 'wall_limit': 'float32',
+    'jar': 'category', 'status': 'category', 'score': 'float64', 't_final': 'float64', 'wt': 'float64',
+    'w': 'float64', 'cpu': 'float32', 'wall': 'float32', 'ref_ratio': 'float64', 'idle_cpu': 'float32', 'details': 'str',
+}
 
 def parse_table(table_text):
     """解析表格格式文本，提取jar包性能指标"""
@@ -90,23 +111,226 @@ def calculate_scores(data):
     
     return calculated_scores
 
-import sys
+def load_leaderboard_csv(csv_path):
+    """读取 test.py 导出的 *_leaderboard.csv，按轮次返回与 parse_table 相同结构的数据"""
+    df = pd.read_csv(csv_path)
+    df = df[df['Status'] == 'CORRECT'].dropna(subset=['T_final', 'WT', 'W'])
+    rounds = []
+    for round_num, group in df.groupby('Round', sort=True):
+        rounds.append((round_num, group[['JAR', 'Status', 'Score', 'T_final', 'WT', 'W']].to_dict('records')))
+    return rounds
+
+def _to_float(text):
+    """日志中 '---' 表示无数据，转为 NaN"""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return np.nan
+
+def parse_log_file(log_path):
+    """
+    解析一个 test.py 日志文件中的所有轮次汇总表，返回 {列名: list}（不含 log_file 列）。
+    以表头行确定列，兼容没有 vs Ref / Idle CPU 列的旧日志；错误详情等缩进行会被跳过。
+    """
+    columns = {name: [] for name in LOG_DTYPES if name != 'log_file'}
+    round_info = None  # (round, preset, wall_limit)
+    headers = None
+    separator_len = 0
+    in_table = False
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            match = ROUND_HEADER_RE.match(line)
+            if match:
+                round_info = (int(match.group(1)), match.group(2), float(match.group(3)))
+                headers, in_table = None, False
+                continue
+            if round_info is None:
+                continue
+            if headers is None:
+                if line.startswith('JAR') and '|' in line:
+                    headers = [LOG_COLUMN_MAP.get(h.strip(), h.strip()) for h in line.split('|')]
+                    separator_len = len(line)
+                continue
+            if line and set(line) == {'-'}:
+                # 表头下方与表格末尾的分隔线长度与表头一致，错误详情中的短分隔线忽略
+                if len(line) == separator_len:
+                    if in_table:
+                        round_info = None
+                    in_table = True
+                continue
+            if not in_table or not line or line[0].isspace() or line.startswith('---'):
+                continue
+            parts = [p.strip() for p in line.split('|', len(headers) - 1)]
+            if len(parts) < len(headers) - 1:
+                continue
+            row = dict(zip(headers, parts))
+            columns['round'].append(round_info[0])
+            columns['preset'].append(round_info[1])
+            columns['wall_limit'].append(round_info[2])
+            columns['jar'].append(row.get('jar', ''))
+            columns['status'].append(row.get('status', ''))
+            columns['details'].append(row.get('details', ''))
+            for name in ('score', 't_final', 'wt', 'w', 'cpu', 'wall', 'ref_ratio', 'idle_cpu'):
+                columns[name].append(_to_float(row.get(name)))
+    return columns
+
+def _columns_to_frame(columns, log_file):
+    df = pd.DataFrame(columns)
+    df.insert(0, 'log_file', log_file)
+    return df
+
+def _apply_dtypes(df):
+    for name, dtype in LOG_DTYPES.items():
+        if name in df.columns:
+            df[name] = df[name].astype(dtype)
+    return df
+
+def _log_file_keys(logs_dir):
+    """{相对路径: mtime_ns}，作为缓存的失效依据"""
+    keys = {}
+    for root, _, files in os.walk(logs_dir):
+        for name in files:
+            if name.endswith('.log'):
+                path = os.path.join(root, name)
+                keys[os.path.relpath(path, logs_dir)] = os.stat(path).st_mtime_ns
+    return keys
+
+def save_log_cache(df, cache_path, file_keys):
+    """按列压缩保存：数值列直接存，category 列存 codes + categories"""
+    arrays = {'__meta__': np.array(json.dumps({'version': LOG_CACHE_VERSION, 'files': file_keys}))}
+    for name in df.columns:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            arrays[f'{name}__codes'] = col.cat.codes.to_numpy()
+            arrays[f'{name}__cats'] = np.array(col.cat.categories, dtype=str)
+        else:
+            arrays[name] = col.to_numpy(dtype=str if LOG_DTYPES.get(name) == 'str' else None)
+    tmp_path = cache_path + '.tmp.npz'
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, cache_path)
+
+def load_log_cache(cache_path):
+    """返回 (DataFrame, {相对路径: mtime_ns})，缓存不存在或版本不符时返回 (None, {})"""
+    try:
+        with np.load(cache_path, allow_pickle=False) as data:
+            meta = json.loads(str(data['__meta__']))
+            if meta.get('version') != LOG_CACHE_VERSION:
+                return None, {}
+            frame = {}
+            for name in LOG_DTYPES:
+                if f'{name}__codes' in data:
+                    frame[name] = pd.Categorical.from_codes(data[f'{name}__codes'], data[f'{name}__cats'])
+                elif name in data:
+                    frame[name] = data[name]
+            return _apply_dtypes(pd.DataFrame(frame)), meta.get('files', {})
+    except (OSError, KeyError, ValueError):
+        return None, {}
+
+def load_logs(logs_dir, workers=None, use_cache=True):
+    """
+    把 logs_dir 下所有日志的轮次表并行解析为一个 DataFrame（每行一个 JAR 一轮）。
+    未修改（mtime 不变）的日志直接取自缓存，只重新解析新增/修改的文件。
+    """
+    cache_path = os.path.join(logs_dir, LOG_CACHE_NAME)
+    file_keys = _log_file_keys(logs_dir)
+    cached_df, cached_keys = load_log_cache(cache_path) if use_cache else (None, {})
+    unchanged = {f for f, mtime in file_keys.items() if cached_keys.get(f) == mtime}
+    to_parse = sorted(set(file_keys) - unchanged)
+
+    frames = []
+    if cached_df is not None and unchanged:
+        frames.append(cached_df[cached_df['log_file'].isin(unchanged)])
+    if to_parse:
+        print(f"解析 {len(to_parse)} 个日志文件（缓存命中 {len(unchanged)} 个）...")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = [os.path.join(logs_dir, f) for f in to_parse]
+            for rel_path, columns in zip(to_parse, executor.map(parse_log_file, paths, chunksize=8)):
+                if columns['round']:
+                    frames.append(_columns_to_frame(columns, rel_path))
+    if frames:
+        df = pd.concat([f.astype({'log_file': str, 'preset': str, 'jar': str, 'status': str}) for f in frames], ignore_index=True)
+    else:
+        df = pd.DataFrame({name: pd.Series(dtype=object) for name in LOG_DTYPES})
+    df = _apply_dtypes(df)
+    if use_cache and (to_parse or set(cached_keys) != set(file_keys)):
+        save_log_cache(df, cache_path, file_keys)
+    return df
+
+def score_rounds(df, p=PERF_P_VALUE):
+    """
+    按官方公式对所有轮次一次性向量化重算得分，新增 official_score 列。
+    归一化在每个 (log_file, round) 内的 CORRECT 结果上进行，非 CORRECT 得 0 分。
+    """
+    df = df.copy()
+    df['official_score'] = 0.0
+    mask = (df['status'] == 'CORRECT') & df[['t_final', 'wt', 'w']].notna().all(axis=1)
+    correct = df.loc[mask, ['log_file', 'round', 't_final', 'wt', 'w']]
+    if correct.empty:
+        return df
+    grouped = correct.groupby(['log_file', 'round'], observed=True)
+    r = {}
+    for metric in ('t_final', 'wt', 'w'):
+        x = correct[metric].to_numpy()
+        x_min = grouped[metric].transform('min').to_numpy()
+        x_max = grouped[metric].transform('max').to_numpy()
+        x_avg = grouped[metric].transform('mean').to_numpy()
+        flat = np.abs(x_max - x_min) < 1e-9
+        base_min = np.where(flat, x_min, p * x_avg + (1 - p) * x_min)
+        base_max = np.where(flat, x_max, p * x_avg + (1 - p) * x_max)
+        base_min = np.minimum(base_min, base_max)
+        denominator = base_max - base_min
+        safe = np.where(np.abs(denominator) < 1e-9, 1.0, denominator)
+        r[metric] = np.where(np.abs(denominator) < 1e-9, 0.0, np.clip((x - base_min) / safe, 0.0, 1.0))
+    df.loc[mask, 'official_score'] = 15 * (0.3 * (1 - r['t_final']) + 0.3 * (1 - r['wt']) + 0.4 * (1 - r['w']))
+    return df
+
+def summarize_logs(df):
+    """每个 JAR 的轮数、正确率、官方重算均分与日志中记录的均分"""
+    summary = df.groupby('jar', observed=True).agg(
+        rounds=('round', 'size'),
+        correct=('status', lambda s: float((s == 'CORRECT').mean() * 100)),
+        official_mean=('official_score', 'mean'),
+        logged_mean=('score', lambda s: float(s.fillna(0).mean())),
+    )
+    return summary.sort_values(['official_mean', 'correct'], ascending=False)
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and os.path.isdir(sys.argv[1]):
+        # 批量解析整个日志目录
+        start = time.monotonic()
+        all_rounds = score_rounds(load_logs(sys.argv[1]))
+        n_rounds = all_rounds.groupby(['log_file', 'round'], observed=True).ngroups
+        print(f"共 {all_rounds['log_file'].nunique()} 个日志, {n_rounds} 轮, {len(all_rounds)} 条记录 ({time.monotonic() - start:.2f}s)")
+        print(summarize_logs(all_rounds).to_string(float_format=lambda x: f"{x:.3f}"))
+        sys.exit(0)
+
+    if len(sys.argv) > 1:
+        # 从导出的 leaderboard CSV 逐轮重新计算
+        for round_num, jar_data in load_leaderboard_csv(sys.argv[1]):
+            scores = calculate_scores(jar_data)
+            print(f"\n第 {round_num} 轮重新计算后的得分：")
+            for i, jar in enumerate(jar_data):
+                print(f"{jar['JAR']}: {scores[i]:.3f} (原始得分: {jar['Score']})")
+        sys.exit(0)
 
-input_lines = sys.stdin.readlines()
+    input_lines = sys.stdin.readlines()
 
-# 示例输入文本
-input_text = ''.join(input_lines)
+    # 示例输入文本
+    input_text = ''.join(input_lines)
 
-# 解析表格
-jar_data = parse_table(input_text)
-print("解析后的数据：")
-for jar in jar_data:
-    print(jar)
+    # 解析表格
+    jar_data = parse_table(input_text)
+    print("解析后的数据：")
+    for jar in jar_data:
+        print(jar)
 
-# 计算得分
-scores = calculate_scores(jar_data)
+    # 计算得分
+    scores = calculate_scores(jar_data)
 
-# 显示结果
-print("\n重新计算后的得分：")
-for i, jar in enumerate(jar_data):
-    print(f"{jar['JAR']}: {scores[i]:.3f} (原始得分: {jar['Score']})")
+    # 显示结果
+    print("\n重新计算后的得分：")
+    for i, jar in enumerate(jar_data):
+        print(f"{jar['JAR']}: {scores[i]:.3f} (原始得分: {jar['Score']})")
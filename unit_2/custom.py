@@ -15,6 +15,7 @@ from collections import defaultdict
 import numpy as np
 import concurrent.futures
 import random # Keep for unique filenames
+import glob
 import json
 import traceback # For logging errors from threads
 from typing import List, Dict, Any, Tuple, Optional # For type hinting
@@ -31,6 +32,7 @@ TMP_DIR = "tmp"  # Define temporary file directory constant
 DEFAULT_INPUT_FILE = "stdin.txt" # Default input file name
 MAX_OUTPUT_LOG_LINES = 100 # Limit stderr lines in log
 IGNORE_NON_TIMESTAMP_LINES = True
+BATCH_INPUT_EXTENSIONS = (".txt", ".in") # Files picked up when --input-dir points at a directory
 
 # Helper function for conditional debug printing
 def debug_print(*args, **kwargs):
@@ -972,8 +974,9 @@ class CustomTester:
 
 
     @staticmethod
-    def _display_and_log_results(results: List[Dict[str, Any]], iteration_num: int, total_iterations: int, input_file_path_used: str, wall_limit_used: float):
-        """Display results for a specific iteration and log errors AND summary table for that iteration. Uses Log Lock and Console Lock."""
+    def _display_and_log_results(results: List[Dict[str, Any]], iteration_num: int, total_iterations: int, input_file_path_used: str, wall_limit_used: float, console: bool = True):
+        """Display results for a specific iteration and log errors AND summary table for that iteration. Uses Log Lock and Console Lock.
+        With console=False (batch mode) the table only goes to the log file."""
         log_lines: List[str] = []
         has_errors_for_log = False
 
@@ -1085,17 +1088,18 @@ class CustomTester:
         log_lines.append(separator) # Footer for the summary table in the log
 
         # --- Print to Console (Locked) ---
-        with CustomTester._console_lock:
-            print(run_header)
-            print(header_line)
-            print(separator)
-            for line in result_lines_for_console:
-                print(line)
-            print(separator)
-            if total_iterations == 1:
-                 print(f"--- End of Test Run ---")
-            else:
-                 print(f"--- End of Iteration {iteration_num}/{total_iterations} ---")
+        if console:
+            with CustomTester._console_lock:
+                print(run_header)
+                print(header_line)
+                print(separator)
+                for line in result_lines_for_console:
+                    print(line)
+                print(separator)
+                if total_iterations == 1:
+                     print(f"--- End of Test Run ---")
+                else:
+                     print(f"--- End of Iteration {iteration_num}/{total_iterations} ---")
 
         # --- Write to Log File (Locked) ---
         if CustomTester._log_file_path:
@@ -1292,6 +1296,31 @@ class CustomTester:
 
         return iteration_results # Return the results for this iteration
 
+    @staticmethod
+    def _resolve_checker_path(hw_n: str) -> Optional[str]:
+        """Finds <hw_n>/checker.py relative to the CWD or to this script. Prints an error and returns None if missing."""
+        hw_n_path = str(hw_n).replace(".", os.sep) # Allows using "." like "hw6.1"
+        # Construct checker path relative to the script or CWD if hw_n is just a name
+        # Assuming hw_n is a directory path relative to where script is run
+        if os.path.isdir(hw_n_path):
+            return os.path.abspath(os.path.join(hw_n_path, "checker.py"))
+        # Try finding checker relative to script's directory if hw_n isn't a dir
+        script_dir = os.path.dirname(__file__)
+        potential_path = os.path.abspath(os.path.join(script_dir, hw_n_path, "checker.py"))
+        if os.path.exists(potential_path):
+            return potential_path
+        with CustomTester._console_lock:
+            print(f"ERROR: Cannot find checker script. '{hw_n_path}' is not a directory and checker not found relative to script.", file=sys.stderr)
+        return None
+
+    @staticmethod
+    def _wall_limit_for(max_timestamp: float, wall_time_override: Optional[float]) -> float:
+        """Wall limit for one input: the user override or a buffer over the last request time, never below the minimum."""
+        if wall_time_override is not None and wall_time_override > 0:
+            return max(MIN_WALL_TIME_LIMIT, wall_time_override)
+        calculated_limit = max_timestamp * DEFAULT_WALL_TIME_BUFFER_FACTOR + DEFAULT_WALL_TIME_ADDITIONAL_SECONDS
+        return max(MIN_WALL_TIME_LIMIT, calculated_limit)
+
     @staticmethod
     def _print_overall_summary(all_iteration_results: List[List[Dict[str, Any]]], input_file_path: str):
         """
@@ -1432,22 +1461,11 @@ class CustomTester:
             # --- Initial Setup (Done Once) ---
             with CustomTester._console_lock:
                  print("--- Elevator Custom Tester Initialization ---")
-            hw_n_path = str(hw_n).replace(".", os.sep) # Allows using "." like "hw6.1"
             CustomTester._jar_dir = jar_dir_path
-            # Construct checker path relative to the script or CWD if hw_n is just a name
-            # Assuming hw_n is a directory path relative to where script is run
-            if os.path.isdir(hw_n_path):
-                 CustomTester._checker_script_path = os.path.abspath(os.path.join(hw_n_path, "checker.py"))
-            else:
-                 # Try finding checker relative to script's directory if hw_n isn't a dir
-                 script_dir = os.path.dirname(__file__)
-                 potential_path = os.path.abspath(os.path.join(script_dir, hw_n_path, "checker.py"))
-                 if os.path.exists(potential_path):
-                     CustomTester._checker_script_path = potential_path
-                 else:
-                      with CustomTester._console_lock:
-                          print(f"ERROR: Cannot find checker script. '{hw_n_path}' is not a directory and checker not found relative to script.", file=sys.stderr)
-                      return # Abort
+            checker_path = CustomTester._resolve_checker_path(hw_n)
+            if checker_path is None:
+                return # Abort
+            CustomTester._checker_script_path = checker_path
 
             selected_input_file_path = input_file # Start with the default/fallback
 
@@ -1552,13 +1570,12 @@ class CustomTester:
             wall_time_limit_used: float
             if wall_time_override is not None and wall_time_override > 0:
                 # Use user override, but ensure it meets the minimum
-                wall_time_limit_used = max(MIN_WALL_TIME_LIMIT, wall_time_override)
+                wall_time_limit_used = CustomTester._wall_limit_for(max_timestamp, wall_time_override)
                 with CustomTester._console_lock:
                     print(f"INFO: Using user-provided wall time limit: {wall_time_limit_used:.1f}s (Min enforced: {MIN_WALL_TIME_LIMIT:.1f}s)")
             else:
                 # Calculate based on max timestamp from input
-                calculated_limit = max_timestamp * DEFAULT_WALL_TIME_BUFFER_FACTOR + DEFAULT_WALL_TIME_ADDITIONAL_SECONDS
-                wall_time_limit_used = max(MIN_WALL_TIME_LIMIT, calculated_limit)
+                wall_time_limit_used = CustomTester._wall_limit_for(max_timestamp, None)
                 with CustomTester._console_lock:
                     print(f"INFO: Calculated wall time limit based on max timestamp ({max_timestamp:.2f}s): {wall_time_limit_used:.1f}s (Buffer: x{DEFAULT_WALL_TIME_BUFFER_FACTOR}+{DEFAULT_WALL_TIME_ADDITIONAL_SECONDS:.1f}s, Min: {MIN_WALL_TIME_LIMIT:.1f}s)")
             debug_print(f"Final Wall Time Limit set to: {wall_time_limit_used:.2f}s for all iterations.")
@@ -1722,6 +1739,261 @@ class CustomTester:
                 print(f"\nTotal execution time: {main_end_time - main_start_time:.2f} seconds.")
                 print("--- Testing Complete ---")
 
+    # --- Batch mode: many inputs, one shared worker pool ---
+    @staticmethod
+    def _batch_input_files(input_spec: str) -> List[str]:
+        """Expands --input-dir: a directory (its *.txt / *.in files) or a glob pattern. Sorted, absolute, de-duplicated."""
+        if os.path.isdir(input_spec):
+            candidates = [
+                os.path.join(input_spec, f) for f in os.listdir(input_spec)
+                if f.endswith(BATCH_INPUT_EXTENSIONS)
+            ]
+        else:
+            candidates = glob.glob(input_spec, recursive=True)
+        files = {os.path.abspath(f) for f in candidates if os.path.isfile(f)}
+        return sorted(files)
+
+    @staticmethod
+    def _print_batch_input_line(done_inputs: int, total_inputs: int, input_path: str, results: List[Dict[str, Any]], elapsed: float):
+        """One console line per finished input: pass count, best JAR and the failing JARs."""
+        correct = [r for r in results if r.get("status") == "CORRECT"]
+        failures = defaultdict(int)
+        for r in results:
+            if r.get("status") != "CORRECT":
+                failures[(r.get("jar_file", "?"), r.get("status", "UNKNOWN"))] += 1
+        line = f"[{done_inputs}/{total_inputs}] {os.path.basename(input_path):<30} | {len(correct)}/{len(results)} CORRECT"
+        if correct:
+            best = max(correct, key=lambda r: r.get("final_score", 0.0))
+            line += f" | best {best.get('jar_file')} ({best.get('final_score', 0.0):.3f})"
+        if failures:
+            line += " | FAIL: " + ", ".join(f"{jar} {status}" + (f" x{count}" if count > 1 else "")
+                                           for (jar, status), count in sorted(failures.items()))
+        line += f" | @{elapsed:.1f}s"
+        with CustomTester._console_lock:
+            print(line, flush=True)
+
+    @staticmethod
+    def _print_corpus_summary(per_input_results: Dict[str, List[Dict[str, Any]]], jar_names: List[str], total_time: float, total_runs: int):
+        """
+        Corpus-level table: per JAR, the share of inputs passed in every iteration, the per-run
+        pass rate and the score distribution (non-CORRECT runs score 0). Also written to the log.
+        """
+        num_inputs = len(per_input_results)
+        scores: Dict[str, List[float]] = defaultdict(list)
+        statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        inputs_passed: Dict[str, int] = defaultdict(int)
+        for results in per_input_results.values():
+            passed_here: Dict[str, bool] = {}
+            for r in results:
+                jar_name = r.get("jar_file", "UnknownJAR")
+                status = r.get("status", "UNKNOWN")
+                statuses[jar_name][status] += 1
+                is_correct = status == "CORRECT"
+                scores[jar_name].append(float(r.get("final_score") or 0.0) if is_correct else 0.0)
+                passed_here[jar_name] = passed_here.get(jar_name, True) and is_correct
+            for jar_name, ok in passed_here.items():
+                if ok:
+                    inputs_passed[jar_name] += 1
+
+        rows = []
+        for jar_name in jar_names:
+            jar_scores = np.array(scores.get(jar_name, []), dtype=float)
+            runs = len(jar_scores)
+            correct_runs = statuses[jar_name].get("CORRECT", 0)
+            rows.append({
+                "jar": jar_name,
+                "inputs_passed": inputs_passed.get(jar_name, 0),
+                "run_pass_%": (correct_runs / runs * 100) if runs else 0.0,
+                "mean": float(np.mean(jar_scores)) if runs else 0.0,
+                "p50": float(np.percentile(jar_scores, 50)) if runs else 0.0,
+                "p95": float(np.percentile(jar_scores, 95)) if runs else 0.0,
+                "min": float(np.min(jar_scores)) if runs else 0.0,
+                "status_summary": ", ".join(f"{s}:{c}" for s, c in sorted(statuses[jar_name].items())),
+            })
+        rows.sort(key=lambda x: (-x["inputs_passed"], -x["mean"], x["jar"]))
+
+        summary_lines: List[str] = []
+        if CustomTester._interrupted:
+            summary_lines.append("\n--- Batch Interrupted - Corpus Summary (Based on Completed Inputs) ---")
+        else:
+            summary_lines.append("\n--- Batch Finished - Corpus Summary ---")
+        summary_lines.append(f"Inputs Completed: {num_inputs}")
+        header = f"{'JAR':<25} | {'Inputs OK':<10} | {'Run Pass':<8} | {'Mean':<7} | {'P50':<7} | {'P95':<7} | {'Min':<7} | Status Counts"
+        summary_lines.append("-" * len(header))
+        summary_lines.append(header)
+        summary_lines.append("-" * len(header))
+        for row in rows:
+            summary_lines.append(
+                f"{row['jar']:<25} | "
+                f"{str(row['inputs_passed']) + '/' + str(num_inputs):<10} | "
+                f"{row['run_pass_%']:<7.1f}% | "
+                f"{row['mean']:<7.3f} | {row['p50']:<7.3f} | {row['p95']:<7.3f} | {row['min']:<7.3f} | "
+                f"{row['status_summary']}")
+        summary_lines.append("-" * len(header))
+        if total_time > 0:
+            summary_lines.append(f"Throughput: {num_inputs / total_time:.2f} inputs/s, {total_runs / total_time:.2f} JAR runs/s "
+                                 f"({total_runs} runs in {total_time:.1f}s)")
+
+        summary_string = "\n".join(summary_lines)
+        with CustomTester._console_lock:
+            print(summary_string)
+        if CustomTester._log_file_path:
+            try:
+                with CustomTester._log_lock:
+                    with open(CustomTester._log_file_path, "a", encoding="utf-8", errors='replace') as f:
+                        f.write("\n\n" + "="*20 + " CORPUS SUMMARY " + "="*20 + "\n")
+                        f.write(summary_string + "\n")
+            except Exception as e_log_summary:
+                with CustomTester._console_lock:
+                    print(f"ERROR: Failed to write corpus summary to log file {CustomTester._log_file_path}: {e_log_summary}", file=sys.stderr)
+
+    @staticmethod
+    def test_batch(hw_n: str, jar_dir_path: str, input_spec: str, iterations: int, wall_time_override: Optional[float], max_workers: Optional[int]):
+        """
+        Runs every input matched by input_spec (directory or glob) `iterations` times against all JARs.
+        All (input, iteration, jar) jobs share one ThreadPoolExecutor; scores are computed per
+        (input, iteration) group as soon as the group completes, and a line is streamed per input.
+        """
+        main_start_time = time.monotonic()
+        per_input_results: Dict[str, List[Dict[str, Any]]] = {}
+        total_runs = 0
+        try:
+            with CustomTester._console_lock:
+                print("--- Elevator Custom Tester Initialization (Batch Mode) ---")
+            CustomTester._jar_dir = jar_dir_path
+            checker_path = CustomTester._resolve_checker_path(hw_n)
+            if checker_path is None:
+                return # Abort
+            CustomTester._checker_script_path = checker_path
+            if not os.path.exists(CustomTester._checker_script_path):
+                with CustomTester._console_lock:
+                    print(f"ERROR: Checker script not found: {CustomTester._checker_script_path}", file=sys.stderr)
+                return # Abort
+
+            input_files = CustomTester._batch_input_files(input_spec)
+            if not input_files:
+                with CustomTester._console_lock:
+                    print(f"ERROR: No input files matched '{input_spec}'.", file=sys.stderr)
+                return # Abort
+
+            CustomTester._interrupted = False
+            CustomTester._jar_files = []
+            CustomTester._finder_executed = False
+            os.makedirs(LOG_DIR, exist_ok=True)
+            os.makedirs(TMP_DIR, exist_ok=True)
+
+            formatted_time = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+            iter_str = f"x{iterations}" if iterations > 1 else "single"
+            CustomTester._log_file_path = os.path.abspath(os.path.join(LOG_DIR, f"{formatted_time}_custom_batch_{len(input_files)}inputs_{iter_str}.log"))
+
+            # JARs are discovered once for the whole corpus
+            if not CustomTester._find_jar_files():
+                with CustomTester._console_lock:
+                    print("ERROR: No JAR files found or accessible. Aborting.", file=sys.stderr)
+                return # Abort
+            jar_files = list(CustomTester._jar_files)
+            signal.signal(signal.SIGINT, CustomTester._signal_handler)
+
+            # --- Read every input once, up front ---
+            inputs: List[Tuple[str, str, float]] = [] # (path, content, wall limit)
+            for input_path in input_files:
+                content, max_timestamp = CustomTester._read_input_data(input_path)
+                if content is None:
+                    with CustomTester._console_lock:
+                        print(f"WARNING: Skipping unreadable input '{input_path}'.", file=sys.stderr)
+                    continue
+                inputs.append((input_path, content, CustomTester._wall_limit_for(max_timestamp, wall_time_override)))
+            if not inputs:
+                with CustomTester._console_lock:
+                    print("ERROR: None of the matched input files could be read. Aborting.", file=sys.stderr)
+                return # Abort
+
+            workers = max_workers if max_workers and max_workers > 0 else (os.cpu_count() or 4) * 2
+            total_jobs = len(inputs) * iterations * len(jar_files)
+            with CustomTester._console_lock:
+                print(f"INFO: Logging per-input tables and errors to: {CustomTester._log_file_path}")
+                print(f"INFO: {len(inputs)} inputs x {iterations} iteration(s) x {len(jar_files)} JARs = {total_jobs} runs on {workers} workers.")
+                print(f"\nPress Ctrl+C during execution to attempt graceful interruption.")
+                print("="*40)
+
+            # (input index, iteration) -> results; input index -> outstanding jobs
+            group_results: Dict[Tuple[int, int], List[Dict[str, Any]]] = defaultdict(list)
+            group_pending: Dict[Tuple[int, int], int] = {}
+            input_pending: Dict[int, int] = {}
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='BatchExec') as executor:
+                future_to_job: Dict[concurrent.futures.Future, Tuple[int, int, str]] = {}
+                # Input-major submission order so early inputs complete (and stream) first
+                for input_idx, (input_path, content, wall_limit) in enumerate(inputs):
+                    input_pending[input_idx] = iterations * len(jar_files)
+                    for iteration_num in range(1, iterations + 1):
+                        group_pending[(input_idx, iteration_num)] = len(jar_files)
+                        for jar_file in jar_files:
+                            future = executor.submit(CustomTester._run_single_jar, jar_file, content, input_path, wall_limit)
+                            future_to_job[future] = (input_idx, iteration_num, jar_file)
+
+                done_inputs = 0
+                cancelled = False
+                for future in concurrent.futures.as_completed(future_to_job):
+                    if CustomTester._interrupted and not cancelled:
+                        # Drop everything that has not started yet, running JARs notice the flag themselves
+                        for f in future_to_job:
+                            f.cancel()
+                        cancelled = True
+                    input_idx, iteration_num, jar_file = future_to_job[future]
+                    input_path, _, wall_limit = inputs[input_idx]
+                    result: Optional[Dict[str, Any]] = None
+                    try:
+                        result = future.result()
+                    except concurrent.futures.CancelledError:
+                        pass # Never ran, leave it out of the statistics
+                    except Exception as exc:
+                        with CustomTester._console_lock:
+                            print(f"\nERROR: JAR {os.path.basename(jar_file)} on {os.path.basename(input_path)} failed unexpectedly: {exc}", file=sys.stderr)
+                        result = {
+                            "jar_file": os.path.basename(jar_file), "status": "CRASHED", "final_score": 0.0,
+                            "error_details": f"Tester thread exception: {exc}", "cpu_time": 0, "wall_time": 0,
+                            "stderr": [f"Tester thread exception: {exc}", traceback.format_exc()],
+                            "input_data_path": input_path
+                        }
+                    group_key = (input_idx, iteration_num)
+                    if result is not None:
+                        group_results[group_key].append(result)
+                        total_runs += 1
+                    group_pending[group_key] -= 1
+                    if group_pending[group_key] == 0 and group_results.get(group_key):
+                        CustomTester._calculate_scores(group_results[group_key])
+                        CustomTester._display_and_log_results(group_results[group_key], iteration_num, iterations,
+                                                              input_path, wall_limit, console=False)
+                    input_pending[input_idx] -= 1
+                    if input_pending[input_idx] == 0:
+                        finished = [r for it in range(1, iterations + 1) for r in group_results.pop((input_idx, it), [])]
+                        if finished:
+                            done_inputs += 1
+                            per_input_results[input_path] = finished
+                            CustomTester._print_batch_input_line(done_inputs, len(inputs), input_path, finished,
+                                                                 time.monotonic() - main_start_time)
+
+            jar_names = sorted(os.path.basename(j) for j in jar_files)
+            CustomTester._print_corpus_summary(per_input_results, jar_names, time.monotonic() - main_start_time, total_runs)
+
+        except Exception as e_main:
+            with CustomTester._console_lock:
+                print(f"\nFATAL ERROR in batch testing thread: {e_main}", file=sys.stderr)
+            debug_print("Fatal error in batch execution", exc_info=True)
+            if CustomTester._log_file_path:
+                try:
+                    with CustomTester._log_lock:
+                        with open(CustomTester._log_file_path, "a", encoding="utf-8", errors='replace') as f:
+                            f.write(f"\n\n!!! FATAL BATCH TESTER ERROR !!!\n{time.strftime('%Y-%m-%d %H:%M:%S')}\nError: {e_main}\n")
+                            traceback.print_exc(file=f)
+                except Exception:
+                    pass
+        finally:
+            with CustomTester._console_lock:
+                print(f"\nTotal execution time: {time.monotonic() - main_start_time:.2f} seconds.")
+                print("--- Batch Testing Complete ---")
+
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
@@ -1745,6 +2017,12 @@ if __name__ == "__main__":
                         help="Number of iterations to run in parallel (only applies if iterations > 1).")
     parser.add_argument("--wall-time-limit", "-t", type=float, default=None,
                         help="Override calculated wall time limit (seconds). Minimum still applies.")
+    parser.add_argument("--input-dir", type=str, default=None,
+                        help="Batch mode: a directory of inputs (*.txt / *.in) or a glob pattern (quote it). "
+                             "Every input runs --iterations times against all JARs on one shared worker pool; "
+                             "--input-file, --search and --parallel are ignored.")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Batch mode: number of concurrent JAR runs (default: 2 x CPU count).")
     parser.add_argument("--debug", action='store_true',
                         help="Enable detailed debug output to stderr.")
 
@@ -1774,6 +2052,17 @@ if __name__ == "__main__":
          print(f"WARNING: Parallel runs set to {args.parallel}, defaulting to 1.", file=sys.stderr)
          args.parallel = 1
 
+    if args.input_dir:
+        CustomTester.test_batch(
+            hw_n=hw_dir_for_checker,
+            jar_dir_path=jar_dir,
+            input_spec=args.input_dir,
+            iterations=args.iterations,
+            wall_time_override=args.wall_time_limit,
+            max_workers=args.jobs
+            )
+        sys.exit(0)
+
     # Call the main test method with parsed arguments
     CustomTester.test(
         hw_n=hw_dir_for_checker,
@@ -2,74 +2,83 @@ import random
 import re
 import argparse
 import sys
+import os
+import concurrent.futures
 
-def generate_unique_random_id(existing_ids, min_val=10000, max_val=999999):
+ID_MIN = 10000
+ID_MAX = 999999
+CORPUS_EXTENSIONS = (".txt", ".in") # Files picked up in corpus (directory) mode
+
+# Regular expression to match passenger request lines
+# It captures:
+# group(1): The timestamp part (e.g., [5.0])
+# group(2): The original passenger ID part (before -PRI-)
+# group(3): The rest of the line starting from -PRI-
+passenger_request_regex = re.compile(r'^(\[.*?\])(.*?)(-PRI-.*)$')
+
+class IdPermutation:
+    """
+    Draws IDs from a random permutation of [min_val, max_val] without replacement, O(1) per draw.
+    The permutation is a lazy Fisher-Yates shuffle: only swapped slots are stored, so drawing
+    k IDs costs O(k) time and memory instead of materialising the whole range up front.
     """
-    Generates a unique random integer ID within the specified range
-    that hasn't been used before in this run.
+
+    def __init__(self, min_val=ID_MIN, max_val=ID_MAX, rng=None):
+        self.min_val = min_val
+        self._remaining = max_val - min_val + 1
+        self._swapped = {} # slot -> value, for slots that differ from the identity
+        self._rng = rng or random.Random()
+
+    def draw(self):
+        if self._remaining <= 0:
+            raise ValueError("ID range exhausted")
+        last = self._remaining - 1
+        j = self._rng.randint(0, last)
+        value = self._swapped.get(j, j)
+        # Move the last unshuffled slot into the hole we just took
+        tail = self._swapped.pop(last, last)
+        if j != last:
+            self._swapped[j] = tail
+        self._remaining -= 1
+        return self.min_val + value
+
+def transform_stream(infile, outfile, id_source):
+    """
+    Copies infile to outfile line by line, replacing every passenger ID with id_source.draw().
+    Returns (lines read, IDs replaced).
     """
-    while True:
-        # Generate a candidate ID
-        new_id = random.randint(min_val, max_val)
-        # Check if it's already been generated for another passenger
-        if new_id not in existing_ids:
-            existing_ids.add(new_id)
-            return new_id
+    line_count = 0
+    replaced_count = 0
+    for line in infile:
+        line_count += 1
+        original_line = line.strip() # Remove leading/trailing whitespace
+
+        if not original_line:
+            outfile.write('\n') # Preserve empty lines
+            continue
+
+        match = passenger_request_regex.match(original_line)
+        if match:
+            # Passenger request line: keep timestamp and the -PRI-... tail, swap the ID
+            outfile.write(f"{match.group(1)}{id_source.draw()}{match.group(3)}\n")
+            replaced_count += 1
+        else:
+            # Not a passenger request line, write it unchanged
+            outfile.write(original_line + '\n')
+    return line_count, replaced_count
 
 def process_elevator_input(input_filename, output_filename):
     """
     Reads the input file, randomizes passenger IDs in request lines,
     and writes the result to the output file.
     """
-    # Regular expression to match passenger request lines
-    # It captures:
-    # group(1): The timestamp part (e.g., [5.0])
-    # group(2): The original passenger ID part (before -PRI-)
-    # group(3): The rest of the line starting from -PRI-
-    passenger_request_regex = re.compile(r'^(\[.*?\])(.*?)(-PRI-.*)$')
-
-    # Keep track of generated IDs to ensure uniqueness
-    generated_ids = set()
-    # Optional: Map original IDs to new IDs if needed later (not used here)
-    # id_map = {}
-
     print(f"Processing input file: {input_filename}")
     print(f"Writing output to: {output_filename}")
 
     try:
         with open(input_filename, 'r', encoding='utf-8') as infile, \
              open(output_filename, 'w', encoding='utf-8') as outfile:
-
-            line_count = 0
-            replaced_count = 0
-            for line in infile:
-                line_count += 1
-                original_line = line.strip() # Remove leading/trailing whitespace
-
-                if not original_line:
-                    outfile.write('\n') # Preserve empty lines
-                    continue
-
-                match = passenger_request_regex.match(original_line)
-
-                if match:
-                    # This looks like a passenger request line
-                    timestamp_part = match.group(1)
-                    original_id_str = match.group(2)
-                    rest_of_line = match.group(3) # Includes the leading -PRI-
-
-                    # Generate a new unique random ID
-                    new_id = generate_unique_random_id(generated_ids)
-                    # id_map[original_id_str] = new_id # Store mapping if needed
-
-                    # Construct the modified line
-                    modified_line = f"{timestamp_part}{new_id}{rest_of_line}"
-                    outfile.write(modified_line + '\n')
-                    replaced_count += 1
-                    # print(f"  Line {line_count}: Replaced ID '{original_id_str}' with '{new_id}'") # Verbose output
-                else:
-                    # Not a passenger request line, write it unchanged
-                    outfile.write(original_line + '\n')
+            line_count, replaced_count = transform_stream(infile, outfile, IdPermutation())
 
         print(f"\nProcessing complete.")
         print(f"Total lines read: {line_count}")
@@ -85,19 +94,107 @@ def process_elevator_input(input_filename, output_filename):
         print(f"An unexpected error occurred: {e}", file=sys.stderr)
         sys.exit(1)
 
+def _variant_path(output_dir, input_filename, variant, variants):
+    stem, ext = os.path.splitext(os.path.basename(input_filename))
+    if variants == 1:
+        return os.path.join(output_dir, f"{stem}{ext}")
+    return os.path.join(output_dir, f"{stem}_v{variant}{ext}")
+
+def _transform_corpus_file(input_filename, output_dir, variants, seed):
+    """Process-pool worker: writes `variants` ID-permuted copies of one input. Returns (input, outputs, lines, replaced)."""
+    rng = random.Random(seed)
+    outputs = []
+    line_count = replaced_count = 0
+    for variant in range(1, variants + 1):
+        output_filename = _variant_path(output_dir, input_filename, variant, variants)
+        with open(input_filename, 'r', encoding='utf-8') as infile, \
+             open(output_filename, 'w', encoding='utf-8') as outfile:
+            line_count, replaced = transform_stream(infile, outfile, IdPermutation(rng=rng))
+        replaced_count += replaced
+        outputs.append(output_filename)
+    return input_filename, outputs, line_count, replaced_count
+
+def process_corpus(input_dir, output_dir, variants=1, workers=None, seed=None):
+    """
+    Transforms every *.txt / *.in file in input_dir into output_dir using a process pool,
+    `variants` copies per input (named <stem>_v<k><ext> when variants > 1).
+    With a seed the output is reproducible regardless of scheduling order.
+    """
+    input_files = sorted(
+        os.path.join(input_dir, f) for f in os.listdir(input_dir)
+        if f.endswith(CORPUS_EXTENSIONS) and os.path.isfile(os.path.join(input_dir, f))
+    )
+    if not input_files:
+        print(f"Error: No input files ({', '.join(CORPUS_EXTENSIONS)}) found in '{input_dir}'.", file=sys.stderr)
+        sys.exit(1)
+    os.makedirs(output_dir, exist_ok=True)
+    if os.path.abspath(output_dir) == os.path.abspath(input_dir) and variants == 1:
+        print("Error: Output directory must differ from the input directory when variants is 1.", file=sys.stderr)
+        sys.exit(1)
+
+    # One independent seed per input, drawn up front so results don't depend on worker order
+    master = random.Random(seed)
+    file_seeds = [master.getrandbits(64) for _ in input_files]
+    workers = workers or os.cpu_count() or 1
+
+    print(f"Processing {len(input_files)} input files from '{input_dir}' ({variants} variant(s) each, {workers} workers)")
+    print(f"Writing output to: {output_dir}")
+    total_outputs = total_replaced = failed = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(input_files))) as executor:
+        futures = {
+            executor.submit(_transform_corpus_file, path, output_dir, variants, file_seed): path
+            for path, file_seed in zip(input_files, file_seeds)
+        }
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            path = futures[future]
+            try:
+                _, outputs, line_count, replaced = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(input_files)}] Error processing '{path}': {e}", file=sys.stderr)
+                continue
+            total_outputs += len(outputs)
+            total_replaced += replaced
+            print(f"[{done}/{len(input_files)}] {os.path.basename(path)}: {line_count} lines -> {len(outputs)} file(s)")
+
+    print(f"\nProcessing complete.")
+    print(f"Files written: {total_outputs}")
+    print(f"Passenger request IDs replaced: {total_replaced}")
+    if failed:
+        print(f"Files failed: {failed}", file=sys.stderr)
+        sys.exit(1)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Randomize passenger IDs in elevator simulation input files."
     )
     parser.add_argument(
         "input_file",
-        help="Path to the input file (e.g., stdin18.txt)"
+        help="Path to the input file (e.g., stdin18.txt), or a directory of inputs for corpus mode"
     )
     parser.add_argument(
         "output_file",
-        help="Path to the output file where the modified content will be saved."
+        help="Path to the output file where the modified content will be saved (a directory in corpus mode)."
+    )
+    parser.add_argument(
+        "--variants", "-k", type=int, default=1,
+        help="Corpus mode: number of ID-permuted variants to write per input."
+    )
+    parser.add_argument(
+        "--workers", "-j", type=int, default=None,
+        help="Corpus mode: number of worker processes (default: CPU count)."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None,
+        help="Corpus mode: random seed for reproducible output."
     )
 
     args = parser.parse_args()
 
-    process_elevator_input(args.input_file, args.output_file)
\ No newline at end of file
+    if os.path.isdir(args.input_file):
+        if args.variants < 1:
+            print("Error: --variants must be at least 1.", file=sys.stderr)
+            sys.exit(1)
+        process_corpus(args.input_file, args.output_file, args.variants, args.workers, args.seed)
+    else:
+        process_elevator_input(args.input_file, args.output_file)
@@ -9,13 +9,24 @@ import sys
 import shutil
 import playwright.sync_api
 import json
+import hashlib
+import tempfile
 import yaml
 import concurrent.futures
+import importlib
 from datetime import datetime, timedelta
 
+current_package = __name__.rsplit('.', 1)[0] if '.' in __name__ else ''
+std_cache = importlib.import_module(f"{current_package}.std_cache" if current_package else "std_cache")
+
 PASSED = []
 REJECTED = []
 THISSTDIN = None
+VERDICT_CACHE_NAME = "verdict_cache.json" # (input hash, output hash, checker version) -> checker verdict
+TRIAGE_CACHE_NAME = "triage_cache.json"   # (input hash, jar hash, checker version) -> local run verdict
+TRIAGE_KILL_VERDICTS = ("CRASH", "TLE", "WA")
+TRIAGE_TIMEOUT_SECONDS = 120
+KILL_COUNTS = {} # base_name -> number of local JARs the input kills
 
 GEN_PRESET_COMMANDS = [
     "gen.py -np 20 -ns 5 -t 50.0 --hce",
@@ -54,16 +65,7 @@ GEN_PRESET_COMMANDS = [
 def run_std_jar(std_jar_path, stdin_path, timeout_seconds=300):
     print(f"INFO: Running standard JAR '{os.path.basename(std_jar_path)}' with input '{os.path.basename(stdin_path)}'...")
     try:
-        with open(stdin_path, "r", encoding="utf-8") as stdin_file:
-            java_proc = subprocess.run(
-                ["java", "-jar", os.path.abspath(std_jar_path)],
-                stdin=stdin_file,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                check=False, # Don't raise exception on non-zero exit
-                timeout=timeout_seconds
-            )
+        java_proc = std_cache.get_cache().run(std_jar_path, stdin_path, timeout=timeout_seconds)
 
         if java_proc.returncode != 0:
             print(f"ERROR: Standard JAR process failed for input '{os.path.basename(stdin_path)}'. Return code: {java_proc.returncode}")
@@ -71,7 +73,8 @@ def run_std_jar(std_jar_path, stdin_path, timeout_seconds=300):
                 print(f"Java stderr:\n---\n{java_proc.stderr.strip()}\n---")
             return None # Indicate failure
 
-        print(f"INFO: Standard JAR ran successfully for '{os.path.basename(stdin_path)}'.")
+        source = "served from std cache" if java_proc.cached else f"ran successfully in {java_proc.run_time:.2f}s"
+        print(f"INFO: Standard JAR {source} for '{os.path.basename(stdin_path)}'.")
         return java_proc.stdout # Return the captured stdout
 
     except subprocess.TimeoutExpired:
@@ -193,6 +196,12 @@ def remove(list1: list, list2):
     items_to_remove = set(list2) # 使用集合提高查找效率
     list1[:] = [item for item in list1 if item not in items_to_remove]
 
+def _hack_worker_pool(num_tasks):
+    """Process pool shared by the parallel .out generation and pair validation steps."""
+    max_workers = max(1, min(num_tasks, os.cpu_count() or 4)) # 限制 worker 数量，防止过多进程拖慢系统
+    print(f"INFO: Using up to {max_workers} worker processes.")
+    return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+
 def _generate_single_missing_out(std_jar_path, stdin_path, stdout_path, hack_rejected_dir):
     """
     Worker function for parallel generation. Runs std_jar for a single stdin,
@@ -274,11 +283,8 @@ def generate_missing_out_files_parallel(hack_waiting_dir, hack_rejected_dir, std
     failed_generations = 0
     # 使用与 generate_random_ones 类似的并行逻辑
     # 限制 worker 数量，防止过多进程拖慢系统
-    max_workers = min(len(missing_pairs), os.cpu_count() or 4) # 保守一点，或者用 os.cpu_count()
-    print(f"INFO: Using up to {max_workers} worker processes for parallel generation.")
-
     futures = []
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+    with _hack_worker_pool(len(missing_pairs)) as executor:
         for stdin_path, stdout_path in missing_pairs:
             future = executor.submit(
                 _generate_single_missing_out, # 调用新的工作者函数
@@ -308,6 +314,156 @@ def generate_missing_out_files_parallel(hack_waiting_dir, hack_rejected_dir, std
     print(f"Successfully generated: {successful_generations}")
     print(f"Failed/Moved to rejected: {failed_generations}")
 
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _verdict_cache_path(hack_waiting_dir):
+    # 缓存放在 hack_dir 根目录，跨 session 复用
+    return os.path.join(os.path.dirname(os.path.abspath(hack_waiting_dir)), VERDICT_CACHE_NAME)
+
+def load_verdict_cache(cache_path):
+    """Loads {"<in_hash>:<out_hash>:<checker_version>": {"pass": bool, "errors": [...]}}."""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"WARNING: Could not read verdict cache '{cache_path}': {e}. Starting with an empty cache.")
+        return {}
+
+def save_verdict_cache(cache_path, cache):
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path) # 原子替换，避免中断时写坏缓存
+    except OSError as e:
+        print(f"WARNING: Failed to save verdict cache '{cache_path}': {e}")
+
+def _check_single_pair(checker_path, stdin_path, stdout_path):
+    """
+    Worker function for parallel validation. Runs the checker on one waiting pair.
+
+    Returns:
+        tuple: (stdin_path, is_pass, checker_errors)
+    """
+    base_name = os.path.basename(stdin_path).replace(".in", "")
+    isPass = False # 默认检查不通过
+    checker_errors = []
+    print(f"INFO [Parallel Worker]: Checking data pair: {base_name}.in / .out from waiting dir.")
+    try:
+        # 运行 checker.py 脚本 (传入 waiting 目录中的文件路径)
+        checker_process = subprocess.run(
+            ["python", checker_path, stdin_path, stdout_path],
+            capture_output=True,
+            text=True,         # 获取文本输出
+            encoding='utf-8',  # 指定编码
+            check=False        # 不要对非零退出码抛出异常，我们自己检查输出
+        )
+
+        checker_output_str = checker_process.stdout.strip()
+        checker_stderr_str = checker_process.stderr.strip()
+
+        if checker_stderr_str:
+            print(f"WARNING: Checker script for {base_name} produced stderr output:")
+            print(checker_stderr_str)
+
+        if not checker_output_str:
+            print(f"ERROR: Checker script for {base_name} produced no stdout output.")
+            checker_errors.append("Checker produced no stdout.")
+        else:
+            try:
+                checker_data = json.loads(checker_output_str)
+                if isinstance(checker_data, dict):
+                    # 检查 "result" 字段是否为 "Success"
+                    if checker_data.get("result") == "Success":
+                        isPass = True
+                        print(f"INFO [Parallel Worker]: Checker validation PASSED for {base_name}.")
+                    else:
+                        # 如果不是 Success，记录 checker 提供的错误信息
+                        checker_errors = checker_data.get("errors", ["Checker result was not 'Success', but no specific errors provided."])
+                        print(f"INFO [Parallel Worker]: Checker validation FAILED for {base_name}.")
+                else:
+                    print(f"ERROR: Checker output for {base_name} is not a valid JSON object (dict). Output: {checker_output_str}")
+                    checker_errors.append("Checker output was not a JSON object.")
+
+            except json.JSONDecodeError:
+                print(f"ERROR: Failed to parse checker output for {base_name} as JSON.")
+                print(f"Raw checker output:\n---\n{checker_output_str}\n---")
+                checker_errors.append("Failed to parse checker output as JSON.")
+            except Exception as e: # 捕获其他可能的解析错误
+                print(f"ERROR: Unexpected error parsing checker JSON for {base_name}: {e}")
+                checker_errors.append(f"Unexpected JSON parsing error: {e}")
+
+    except FileNotFoundError:
+        print(f"CRITICAL ERROR: Cannot find Python interpreter 'python' or Checker script '{checker_path}'.")
+        raise # 重新抛出异常，由主进程决定是否停止
+    except Exception as e:
+        print(f"ERROR: An unexpected error occurred while running the checker for {base_name}: {e}")
+        checker_errors.append(f"Unexpected error during checker execution: {e}")
+    return stdin_path, isPass, checker_errors
+
+def validate_waiting_pairs(hack_waiting_dir, checker_path, base_names):
+    """
+    Validates the given waiting pairs with the checker in parallel. Verdicts are
+    cached by (input hash, output hash, checker version), so unchanged pairs are
+    never re-checked across sessions.
+
+    Returns:
+        dict: base_name -> (is_pass, checker_errors); pairs that could not be hashed are omitted
+    """
+    cache_path = _verdict_cache_path(hack_waiting_dir)
+    cache = load_verdict_cache(cache_path)
+    checker_version = _file_sha256(checker_path)[:16]
+
+    verdicts = {}
+    pending = {} # stdin_path -> (base_name, cache_key)
+    for base_name in base_names:
+        stdin_path = os.path.join(hack_waiting_dir, f"{base_name}.in")
+        stdout_path = os.path.join(hack_waiting_dir, f"{base_name}.out")
+        try:
+            key = f"{_file_sha256(stdin_path)}:{_file_sha256(stdout_path)}:{checker_version}"
+        except OSError as e:
+            print(f"WARNING: Could not hash data pair {base_name}: {e}")
+            continue
+        cached = cache.get(key)
+        if cached is not None:
+            verdicts[base_name] = (cached.get("pass", False), cached.get("errors", []))
+        else:
+            pending[stdin_path] = (base_name, key)
+
+    print(f"INFO: Validation: {len(verdicts)} verdicts from cache, {len(pending)} pairs to check.")
+    if pending:
+        with _hack_worker_pool(len(pending)) as executor:
+            futures = [
+                executor.submit(_check_single_pair, checker_path, stdin_path, stdin_path[:-len(".in")] + ".out")
+                for stdin_path in pending
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    stdin_path, is_pass, checker_errors = future.result()
+                except FileNotFoundError:
+                    save_verdict_cache(cache_path, cache)
+                    raise # checker/python 缺失是严重问题，停止脚本
+                except Exception as e:
+                    print(f"ERROR: A parallel validation task failed with an unexpected exception: {e}")
+                    import traceback
+                    print(traceback.format_exc())
+                    continue
+                base_name, key = pending[stdin_path]
+                verdicts[base_name] = (is_pass, checker_errors)
+                # 执行异常不是 checker 的判定结果，不写入缓存
+                if is_pass or not any(str(err).startswith("Unexpected error during checker execution") for err in checker_errors):
+                    cache[key] = {"pass": is_pass, "errors": checker_errors}
+        save_verdict_cache(cache_path, cache)
+    return verdicts
+
 def choose_existed_one(hack_waiting_dir, hack_rejected_dir, checker_path, std_jar_path):
     global REJECTED, PASSED, THISSTDIN
     try:
@@ -321,130 +477,37 @@ def choose_existed_one(hack_waiting_dir, hack_rejected_dir, checker_path, std_ja
         print("INFO: No available & valid data pairs found in the waiting directory (after parallel generation attempt).")
         return None, None
     random.shuffle(available_bases)
+    # 杀伤力高的数据优先提交，同分保持随机顺序
+    available_bases.sort(key=lambda b: -KILL_COUNTS.get(b, 0))
 
-    for base_name in available_bases: # 尝试所有可用的
-        stdin_name = f"{base_name}.in"
-        stdout_name = f"{base_name}.out"
-
-        stdin_path = os.path.join(hack_waiting_dir, stdin_name)
-        stdout_path = os.path.join(hack_waiting_dir, stdout_name)
-
-        if not os.path.exists(stdout_path):
-            print(f"INFO: Stdout file '{stdout_name}' not found for '{stdin_name}'. Attempting to generate it using std_jar...")
-
-            generated_stdout_content = run_std_jar(std_jar_path, stdin_path) # run_std_jar 已包含超时处理
-
-            if generated_stdout_content is None:
-                # run_std_jar 失败 (超时、Java 错误等)
-                print(f"ERROR: Failed to generate stdout for '{stdin_name}' using std_jar. Moving '{stdin_name}' to rejected.")
-                REJECTED.append(base_name)
-                # 只移动 .in 文件
-                in_src = os.path.join(hack_waiting_dir, stdin_name)
-                in_dst = os.path.join(hack_rejected_dir, stdin_name) # 直接用 .in 文件名
-                os.makedirs(hack_rejected_dir, exist_ok=True)
-                if os.path.exists(in_src):
-                    try:
-                        shutil.move(in_src, in_dst)
-                    except Exception as e:
-                        print(f"ERROR: Failed to move '{in_src}' to rejected after generation failure: {e}")
-                continue # 尝试下一个 base_name
+    # 缺失的 .out 用同一个进程池并行生成，失败的 .in 会被移动到 rejected
+    if any(not os.path.exists(os.path.join(hack_waiting_dir, f"{b}.out")) for b in available_bases):
+        generate_missing_out_files_parallel(hack_waiting_dir, hack_rejected_dir, std_jar_path)
 
-            else:
-                # run_std_jar 成功，尝试写入 .out 文件
-                try:
-                    with open(stdout_path, "w", encoding="utf-8") as f_out:
-                        f_out.write(generated_stdout_content)
-                    print(f"INFO: Successfully generated and saved '{stdout_name}'. Proceeding with checker validation.")
-                    # 文件已生成，让代码自然流到下面的 checker 验证部分
-                    # *** 不要 continue ***
-                except IOError as e:
-                    print(f"ERROR: Failed to write generated stdout to '{stdout_path}': {e}. Moving '{stdin_name}' to rejected.")
-                    REJECTED.append(base_name)
-                    # 只移动 .in 文件
-                    in_src = os.path.join(hack_waiting_dir, stdin_name)
-                    in_dst = os.path.join(hack_rejected_dir, stdin_name)
-                    os.makedirs(hack_rejected_dir, exist_ok=True)
-                    if os.path.exists(in_src):
-                        try:
-                            shutil.move(in_src, in_dst)
-                        except Exception as move_e:
-                            print(f"ERROR: Failed to move '{in_src}' to rejected after write failure: {move_e}")
-                    # 清理可能创建的不完整 .out 文件 (可选，但最好加上)
-                    if os.path.exists(stdout_path):
-                        try: os.remove(stdout_path)
-                        except OSError as remove_e: print(f"WARNING: Could not remove partially written file '{stdout_path}': {remove_e}")
-                    continue # 尝试下一个 base_name
-        
-        isPass = False # 默认检查不通过
-        checker_errors = []
-
-        if not os.path.exists(stdout_path):
-            print(f"INTERNAL ERROR: stdout file '{stdout_path}' should exist at this point but doesn't. Skipping {base_name}.")
+    candidates = []
+    for base_name in available_bases:
+        stdin_path = os.path.join(hack_waiting_dir, f"{base_name}.in")
+        stdout_path = os.path.join(hack_waiting_dir, f"{base_name}.out")
+        if not os.path.exists(stdin_path):
+            # 生成失败，.in 已被移到 rejected
+            REJECTED.append(base_name)
+        elif not os.path.exists(stdout_path):
+            print(f"ERROR: Stdout file '{base_name}.out' still missing after generation. Moving '{base_name}.in' to rejected.")
             REJECTED.append(base_name)
-            # 尝试移动 .in 文件
-            in_src = os.path.join(hack_waiting_dir, stdin_name)
-            in_dst = os.path.join(hack_rejected_dir, stdin_name)
             os.makedirs(hack_rejected_dir, exist_ok=True)
-            if os.path.exists(in_src):
-                try: shutil.move(in_src, in_dst)
-                except Exception as e: print(f"ERROR: Failed to move '{in_src}' to rejected after internal error: {e}")
-            continue
-
-        print(f"INFO: Checking data pair: {base_name}.in / .out from waiting dir.")
-        try:
-            # 运行 checker.py 脚本 (传入 waiting 目录中的文件路径)
-            checker_process = subprocess.run(
-                ["python", checker_path, stdin_path, stdout_path], # <--- 新用法: 使用 "python" 和 checker_path
-                capture_output=True,
-                text=True,         # 获取文本输出
-                encoding='utf-8',  # 指定编码
-                check=False        # 不要对非零退出码抛出异常，我们自己检查输出
-            )
-
-            checker_output_str = checker_process.stdout.strip()
-            checker_stderr_str = checker_process.stderr.strip()
-
-            if checker_stderr_str:
-                print(f"WARNING: Checker script for {base_name} produced stderr output:")
-                print(checker_stderr_str)
-
-            if not checker_output_str:
-                print(f"ERROR: Checker script for {base_name} produced no stdout output.")
-                checker_errors.append("Checker produced no stdout.")
-            else:
-                # *** 修改点：使用 json.loads 解析 checker 输出 ***
-                try:
-                    checker_data = json.loads(checker_output_str)
-                    if isinstance(checker_data, dict):
-                        # 检查 "result" 字段是否为 "Success"
-                        if checker_data.get("result") == "Success":
-                            isPass = True
-                            print(f"INFO: Checker validation PASSED for {base_name}.")
-                        else:
-                            # 如果不是 Success，记录 checker 提供的错误信息
-                            checker_errors = checker_data.get("errors", ["Checker result was not 'Success', but no specific errors provided."])
-                            print(f"INFO: Checker validation FAILED for {base_name}.")
-                    else:
-                        print(f"ERROR: Checker output for {base_name} is not a valid JSON object (dict). Output: {checker_output_str}")
-                        checker_errors.append("Checker output was not a JSON object.")
+            try: shutil.move(stdin_path, os.path.join(hack_rejected_dir, f"{base_name}.in"))
+            except Exception as e: print(f"ERROR: Failed to move '{stdin_path}' to rejected: {e}")
+        else:
+            candidates.append(base_name)
 
-                except json.JSONDecodeError:
-                    print(f"ERROR: Failed to parse checker output for {base_name} as JSON.")
-                    print(f"Raw checker output:\n---\n{checker_output_str}\n---")
-                    checker_errors.append("Failed to parse checker output as JSON.")
-                except Exception as e: # 捕获其他可能的解析错误
-                    print(f"ERROR: Unexpected error parsing checker JSON for {base_name}: {e}")
-                    checker_errors.append(f"Unexpected JSON parsing error: {e}")
+    verdicts = validate_waiting_pairs(hack_waiting_dir, checker_path, candidates)
 
-        except FileNotFoundError:
-            print(f"CRITICAL ERROR: Cannot find Python interpreter 'python' or Checker script '{checker_path}'.")
-            # 这是一个严重问题，可能需要停止脚本
-            raise # 重新抛出异常，让脚本停止
-        except Exception as e:
-            print(f"ERROR: An unexpected error occurred while running the checker for {base_name}: {e}")
-            checker_errors.append(f"Unexpected error during checker execution: {e}")
-    
-        if not isPass:
+    selected = None
+    for base_name in candidates: # 保持随机顺序
+        if base_name not in verdicts:
+            continue # 校验任务异常，留在 waiting 中下次再试
+        is_pass, checker_errors = verdicts[base_name]
+        if not is_pass:
             print(f"ERROR: Data pair {base_name} failed validation. Moving to rejected.")
             if checker_errors:
                 print("Checker Errors/Reasons:")
@@ -452,20 +515,22 @@ def choose_existed_one(hack_waiting_dir, hack_rejected_dir, checker_path, std_ja
                     print(f"  - {err}")
             REJECTED.append(base_name)
             move_file_pair(base_name, hack_waiting_dir, hack_rejected_dir)
-        else:
+        elif selected is None:
             # 如果检查通过，读取文件内容
             try:
-                with open(stdin_path, "r", encoding="utf-8") as f_in:
+                with open(os.path.join(hack_waiting_dir, f"{base_name}.in"), "r", encoding="utf-8") as f_in:
                     stdin_content = f_in.read()
-                with open(stdout_path, "r", encoding="utf-8") as f_out:
+                with open(os.path.join(hack_waiting_dir, f"{base_name}.out"), "r", encoding="utf-8") as f_out:
                     stdout_content = f_out.read()
-
-                THISSTDIN = base_name # 记录当前成功选中的文件名
-                print(f"INFO: Successfully selected and validated data pair: {THISSTDIN} from waiting dir.")
-                return stdin_content, stdout_content
+                selected = (base_name, stdin_content, stdout_content)
             except Exception as e:
                 print(f"ERROR: Failed to read content of validated files for {base_name}: {e}. Moving to rejected.")
                 REJECTED.append(base_name) # 即使通过了检查，如果读不了文件也算拒绝
+
+    if selected is not None:
+        THISSTDIN = selected[0] # 记录当前成功选中的文件名
+        print(f"INFO: Successfully selected and validated data pair: {THISSTDIN} from waiting dir.")
+        return selected[1], selected[2]
     print("INFO: No valid and readable data pair found in the current waiting list.")
     return None, None
 
@@ -514,16 +579,7 @@ def generate_single_pair(generator_path, std_jar_path, hack_waiting_dir, command
         # print(f"DEBUG [Worker {index}]: Running STD_JAR process...") # Debugging print
         try:
             # 使用临时文件作为 stdin 重定向的来源
-            with open(temp_stdin_path, "r", encoding="utf-8") as stdin_file:
-                 java_proc = subprocess.run(
-                    ["java", "-jar", os.path.abspath(std_jar_path)],
-                    stdin=stdin_file,          # 从临时文件读取输入
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    check=False,
-                    timeout=300 # 添加超时，防止标程卡死 (60秒, 可调整)
-                )
+            java_proc = std_cache.get_cache().run(std_jar_path, temp_stdin_path, timeout=300) # 已知输入直接复用标程输出
 
             if java_proc.returncode != 0:
                 print(f"ERROR [Worker {index}]: Java STD_JAR process failed for {final_filename_base}. Return code: {java_proc.returncode}")
@@ -935,6 +991,125 @@ def ready_to_break(page: playwright.sync_api.Page, homework_id: int, hack_limit=
         print(traceback.format_exc())
         return False, None # 其他未知错误，无法判断，不停止
     
+def _find_local_jars(jar_base_dir, std_jar_path):
+    """All locally built JARs in jar_base_dir, excluding the std JAR itself."""
+    try:
+        names = sorted(f for f in os.listdir(jar_base_dir) if f.endswith(".jar"))
+    except FileNotFoundError:
+        print(f"WARNING: JAR directory '{jar_base_dir}' not found. Skipping triage.")
+        return []
+    std_abs = os.path.abspath(std_jar_path)
+    return [os.path.join(jar_base_dir, n) for n in names if os.path.abspath(os.path.join(jar_base_dir, n)) != std_abs]
+
+def _triage_single_run(jar_path, stdin_path, checker_path, timeout_seconds):
+    """
+    Worker function for triage. Runs one local JAR on one candidate input.
+
+    Returns:
+        tuple: (stdin_path, jar_path, verdict) with verdict in TRIAGE_KILL_VERDICTS or "OK"
+    """
+    try:
+        with open(stdin_path, "r", encoding="utf-8") as stdin_file:
+            java_proc = subprocess.run(
+                ["java", "-jar", os.path.abspath(jar_path)],
+                stdin=stdin_file,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                check=False,
+                timeout=timeout_seconds
+            )
+    except subprocess.TimeoutExpired:
+        return stdin_path, jar_path, "TLE"
+    if java_proc.returncode != 0:
+        return stdin_path, jar_path, "CRASH"
+
+    # 输出写入临时文件交给 checker
+    out_fd, out_path = tempfile.mkstemp(suffix=".out", prefix="triage_")
+    try:
+        with os.fdopen(out_fd, "w", encoding="utf-8") as f_out:
+            f_out.write(java_proc.stdout)
+        checker_process = subprocess.run(
+            ["python", checker_path, stdin_path, out_path],
+            capture_output=True, text=True, encoding='utf-8', check=False
+        )
+        try:
+            checker_data = json.loads(checker_process.stdout.strip())
+            verdict = "OK" if isinstance(checker_data, dict) and checker_data.get("result") == "Success" else "WA"
+        except json.JSONDecodeError:
+            verdict = "WA"
+    finally:
+        try: os.remove(out_path)
+        except OSError: pass
+    return stdin_path, jar_path, verdict
+
+def triage_waiting_pool(hack_dir, jar_base_dir, std_jar_path, checker_path, timeout_seconds=TRIAGE_TIMEOUT_SECONDS):
+    """
+    Runs every available waiting input against all local JARs in parallel and
+    records in KILL_COUNTS how many of them crash, time out or fail the checker.
+    Verdicts are cached per (input hash, jar hash, checker version) in
+    <hack_dir>/TRIAGE_CACHE_NAME, so only new inputs / rebuilt JARs are run.
+    """
+    global KILL_COUNTS
+    hack_waiting_dir = os.path.join(hack_dir, "waiting")
+    jars = _find_local_jars(jar_base_dir, std_jar_path)
+    if not jars:
+        print("INFO: No local JARs found for triage. Waiting pool keeps random order.")
+        return
+    try:
+        bases = [f[:-len(".in")] for f in os.listdir(hack_waiting_dir) if f.endswith(".in")]
+    except FileNotFoundError:
+        return
+    bases = [b for b in bases if b not in REJECTED and b not in PASSED]
+    if not bases:
+        return
+
+    print(f"\n--- Triage: {len(bases)} waiting inputs x {len(jars)} local JARs ---")
+    cache_path = os.path.join(hack_dir, TRIAGE_CACHE_NAME)
+    cache = load_verdict_cache(cache_path)
+    checker_version = _file_sha256(checker_path)[:16]
+    jar_hashes = {jar: _file_sha256(jar)[:16] for jar in jars}
+
+    kills = {}
+    pending = {} # (stdin_path, jar_path) -> cache key
+    for base_name in bases:
+        stdin_path = os.path.join(hack_waiting_dir, f"{base_name}.in")
+        try:
+            input_hash = _file_sha256(stdin_path)
+        except OSError:
+            continue
+        kills[base_name] = 0
+        for jar in jars:
+            key = f"{input_hash}:{jar_hashes[jar]}:{checker_version}"
+            verdict = cache.get(key)
+            if verdict is None:
+                pending[(stdin_path, jar)] = key
+            elif verdict in TRIAGE_KILL_VERDICTS:
+                kills[base_name] += 1
+
+    if pending:
+        print(f"INFO: Triage: {len(pending)} runs to execute ({len(bases) * len(jars) - len(pending)} cached).")
+        with _hack_worker_pool(len(pending)) as executor:
+            futures = [
+                executor.submit(_triage_single_run, jar, stdin_path, checker_path, timeout_seconds)
+                for stdin_path, jar in pending
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    stdin_path, jar, verdict = future.result()
+                except Exception as e:
+                    print(f"ERROR: A triage task failed with an unexpected exception: {e}")
+                    continue
+                cache[pending[(stdin_path, jar)]] = verdict
+                if verdict in TRIAGE_KILL_VERDICTS:
+                    kills[os.path.basename(stdin_path)[:-len(".in")]] += 1
+        save_verdict_cache(cache_path, cache)
+
+    KILL_COUNTS = kills
+    ranked = sorted(kills.items(), key=lambda kv: -kv[1])
+    print("INFO: Triage kill counts (top 10): " + ", ".join(f"{b}={k}/{len(jars)}" for b, k in ranked[:10]))
+
 def sync_lists_and_ensure_waiting_data(hack_dir, std_jar_path, generator_path, num_generate):
     global PASSED, REJECTED # 明确我们要修改全局列表
 
@@ -1109,6 +1284,11 @@ def main():
     num_generate = config['hacker']['num_generate']
 
     checker_path, generator_path, std_jar_path, hack_dir = calculate_paths(config)
+    std_cache.configure(
+        config['hacker'].get('std_cache_dir', os.path.join(hack_dir, "std_cache")),
+        config['hacker'].get('std_cache_max_mb', std_cache.DEFAULT_MAX_MB)
+    )
+    print(f"INFO: Using Std output cache: {std_cache.get_cache().cache_dir}")
 
     os.makedirs(hack_dir, exist_ok=True)
     os.makedirs(os.path.join(hack_dir, "waiting"), exist_ok=True) # <--- 创建
@@ -1141,6 +1321,13 @@ def main():
 
                 sync_lists_and_ensure_waiting_data(hack_dir, std_jar_path, generator_path, num_generate)
 
+                if config['hacker'].get('triage', True):
+                    try:
+                        triage_waiting_pool(hack_dir, config['jar_base_dir'], std_jar_path, checker_path,
+                                            config['hacker'].get('triage_timeout', TRIAGE_TIMEOUT_SECONDS))
+                    except Exception as e:
+                        print(f"ERROR: Triage of waiting pool failed: {e}. Falling back to random order.")
+
                 handle_cooldown(page, homework_id)
 
                 should_break, target_alias_name = ready_to_break(page, homework_id)
@@ -1171,7 +1358,7 @@ def main():
                          print(f"WARNING: Failed to reload page before next cycle: {reload_err}")
                     continue # 跳到下一个循环开始，sync 会重新运行
 
-                print(f"INFO: Data point '{THISSTDIN}' selected. Attempting submission to target '{target_alias_name}'.")
+                print(f"INFO: Data point '{THISSTDIN}' selected (local kill count: {KILL_COUNTS.get(THISSTDIN, 0)}). Attempting submission to target '{target_alias_name}'.")
                 submission_was_blocked_by_cooldown, submission_succeeded = send_point(
                     page,                   # playwright 页面对象
                     homework_id,            # 作业 ID
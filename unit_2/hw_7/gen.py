@@ -3,6 +3,7 @@
 # --- START OF MODIFIED gen.py (HW7 - Granular Timing V3 - SCHE Control & Bursts + UPDATE->SCHE Ban + Independent Random ID Seed) ---
 import random
 import argparse
+import os
 import sys
 import time
 import math
@@ -90,7 +91,11 @@ def generate_passenger_request(passenger_id, current_time, floors,
     return f"[{formatted_time:.1f}]{passenger_id}-PRI-{priority}-FROM-{start_floor}-TO-{end_floor}"
 
 def generate_sche_request(current_time, elevator_id, target_floors, speeds):
-    speed = random.choice(speeds); target_floor = random.choice(target_floors); formatted_time = round(current_time, 1)
+    speed = random.choice(speeds); target_floor = random.choice(target_floors)
+    return format_sche_request(current_time, elevator_id, speed, target_floor)
+
+def format_sche_request(current_time, elevator_id, speed, target_floor):
+    formatted_time = round(current_time, 1)
     return f"[{formatted_time:.1f}]SCHE-{elevator_id}-{speed}-{target_floor}"
 
 def generate_update_request(current_time, elevator_id_a, elevator_id_b, target_floor):
@@ -151,6 +156,91 @@ def _generate_target_timestamps(num_events, start_time, max_time,
     return sorted(timestamps[:num_events])
 
 
+# --- SCHE/UPDATE Placement (shared by single and batch generation) ---
+def _place_sche_update(sche_target_timestamps, update_target_timestamps, num_sche, num_update,
+                       sche_target_elevators, allow_sche_update_overlap, huce_mode,
+                       absolute_max_time, update_max_time,
+                       rand, make_sche_request, make_update_request):
+    """
+    Places SCHE/UPDATE directives at (or after) their target timestamps while enforcing
+    the per-elevator interval rules, the HCE limits and the UPDATE -> no future SCHE ban.
+    'rand' provides shuffle/choice (the random module or a random.Random instance);
+    make_sche_request(time, eid) / make_update_request(time, a, b) draw the remaining parameters.
+    """
+    last_sche_time_per_elevator = defaultdict(lambda: -float('inf'))
+    last_update_time_per_elevator = defaultdict(lambda: -float('inf'))
+    updated_elevators = set()
+    sche_assigned_elevators_count = defaultdict(int)
+    all_target_events = [(ts, 'SCHE') for ts in sche_target_timestamps] + [(ts, 'UPDATE') for ts in update_target_timestamps]
+    all_target_events.sort(key=lambda x: x[0])
+    generated_sche_requests = []; generated_update_requests = []
+    sche_placed_count = 0; update_placed_count = 0
+    for target_time, event_type in all_target_events:
+        placement_time = -1.0; best_effort_time = target_time
+        if event_type == 'SCHE' and sche_placed_count < num_sche:
+            found_sche = False
+            current_sche_candidates = [eid for eid in sche_target_elevators if eid not in updated_elevators]
+            rand.shuffle(current_sche_candidates)
+            min_valid_time_for_any = float('inf'); best_elevator_for_min_time = -1
+            for elevator_id in current_sche_candidates:
+                 if huce_mode and sche_assigned_elevators_count[elevator_id] >= 1: continue
+                 earliest_possible = best_effort_time
+                 earliest_possible = max(earliest_possible, last_sche_time_per_elevator[elevator_id] + SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                 earliest_possible = max(earliest_possible, last_update_time_per_elevator[elevator_id] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                 if earliest_possible < min_valid_time_for_any and earliest_possible <= absolute_max_time + 1e-9:
+                     min_valid_time_for_any = earliest_possible; best_elevator_for_min_time = elevator_id
+            if best_elevator_for_min_time != -1:
+                possible_placements = []
+                for elevator_id in current_sche_candidates:
+                    if huce_mode and sche_assigned_elevators_count[elevator_id] >= 1: continue
+                    earliest_possible = best_effort_time
+                    earliest_possible = max(earliest_possible, last_sche_time_per_elevator[elevator_id] + SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                    earliest_possible = max(earliest_possible, last_update_time_per_elevator[elevator_id] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                    if abs(earliest_possible - min_valid_time_for_any) < 1e-9 and earliest_possible <= absolute_max_time + 1e-9:
+                         possible_placements.append((earliest_possible, elevator_id))
+                if possible_placements:
+                     placement_time, assigned_elevator_id = rand.choice(possible_placements)
+                     final_event_time = round(placement_time, 1)
+                     req_str = make_sche_request(final_event_time, assigned_elevator_id)
+                     generated_sche_requests.append(req_str)
+                     last_sche_time_per_elevator[assigned_elevator_id] = placement_time
+                     sche_assigned_elevators_count[assigned_elevator_id] += 1
+                     sche_placed_count += 1; found_sche = True
+        elif event_type == 'UPDATE' and update_placed_count < num_update:
+             found_update = False
+             available_for_update = [eid for eid in ALL_ELEVATOR_IDS if eid not in updated_elevators]
+             if not allow_sche_update_overlap: available_for_update = [eid for eid in available_for_update if sche_assigned_elevators_count[eid] == 0]
+             if len(available_for_update) >= 2:
+                 min_valid_time_for_any = float('inf'); best_pair_for_min_time = None
+                 potential_pairs = [];
+                 if len(available_for_update) >=2:
+                     for i in range(len(available_for_update)):
+                         for j in range(i + 1, len(available_for_update)): potential_pairs.append(tuple(sorted((available_for_update[i], available_for_update[j]))))
+                     rand.shuffle(potential_pairs)
+                 for e_a, e_b in potential_pairs:
+                      earliest_possible = best_effort_time
+                      earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_a] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                      earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_b] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                      if earliest_possible < min_valid_time_for_any and earliest_possible <= update_max_time + 1e-9 and earliest_possible <= absolute_max_time + 1e-9:
+                            min_valid_time_for_any = earliest_possible; best_pair_for_min_time = (e_a, e_b)
+                 if best_pair_for_min_time is not None:
+                     possible_placements = []
+                     for e_a, e_b in potential_pairs:
+                         earliest_possible = best_effort_time
+                         earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_a] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                         earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_b] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
+                         if abs(earliest_possible - min_valid_time_for_any) < 1e-9 and earliest_possible <= update_max_time + 1e-9 and earliest_possible <= absolute_max_time + 1e-9:
+                              possible_placements.append((earliest_possible, e_a, e_b))
+                     if possible_placements:
+                         placement_time, assigned_e_a, assigned_e_b = rand.choice(possible_placements)
+                         final_event_time = round(placement_time, 1)
+                         req_str = make_update_request(final_event_time, assigned_e_a, assigned_e_b)
+                         generated_update_requests.append(req_str)
+                         last_update_time_per_elevator[assigned_e_a] = placement_time; last_update_time_per_elevator[assigned_e_b] = placement_time
+                         updated_elevators.add(assigned_e_a); updated_elevators.add(assigned_e_b)
+                         update_placed_count += 1; found_update = True
+    return generated_sche_requests, generated_update_requests, updated_elevators, sche_assigned_elevators_count
+
 # --- Main Data Generation Logic ---
 def generate_data(num_passengers, num_sche, num_update, max_time,
                   min_interval_pass, max_interval_pass, start_time,
@@ -182,10 +272,6 @@ def generate_data(num_passengers, num_sche, num_update, max_time,
     else: current_seed = int(time.time() * 1000); print(f"INFO: Using generated MAIN random seed: {current_seed}", file=sys.stderr); random.seed(current_seed)
 
     # State Trackers
-    last_sche_time_per_elevator = defaultdict(lambda: -float('inf'))
-    last_update_time_per_elevator = defaultdict(lambda: -float('inf'))
-    updated_elevators = set()
-    sche_assigned_elevators_count = defaultdict(int)
     last_passenger_id = 0 # Always used internally first
 
     # Pre-generation Validation & Info (minor updates)
@@ -283,77 +369,14 @@ def generate_data(num_passengers, num_sche, num_update, max_time,
     update_target_timestamps = _generate_target_timestamps(num_update, start_time, update_max_time, update_burst_size, update_burst_time, 0.1, 2.0)
 
     # --- 3. Combine Targets and Place SCHE/UPDATE (Uses MAIN seed via global random) ---
-    # (Code unchanged)
-    all_target_events = [(ts, 'SCHE') for ts in sche_target_timestamps] + [(ts, 'UPDATE') for ts in update_target_timestamps]
-    all_target_events.sort(key=lambda x: x[0])
-    generated_sche_requests = []; generated_update_requests = []
-    sche_placed_count = 0; update_placed_count = 0
-    for target_time, event_type in all_target_events:
-        placement_time = -1.0; best_effort_time = target_time
-        if event_type == 'SCHE' and sche_placed_count < num_sche:
-            # ... (SCHE placement logic unchanged, uses global random.*) ...
-            found_sche = False
-            current_sche_candidates = [eid for eid in sche_target_elevators if eid not in updated_elevators]
-            random.shuffle(current_sche_candidates)
-            min_valid_time_for_any = float('inf'); best_elevator_for_min_time = -1
-            for elevator_id in current_sche_candidates:
-                 if huce_mode and sche_assigned_elevators_count[elevator_id] >= 1: continue
-                 earliest_possible = best_effort_time
-                 earliest_possible = max(earliest_possible, last_sche_time_per_elevator[elevator_id] + SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                 earliest_possible = max(earliest_possible, last_update_time_per_elevator[elevator_id] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                 if earliest_possible < min_valid_time_for_any and earliest_possible <= absolute_max_time + 1e-9:
-                     min_valid_time_for_any = earliest_possible; best_elevator_for_min_time = elevator_id
-            if best_elevator_for_min_time != -1:
-                possible_placements = []
-                for elevator_id in current_sche_candidates:
-                    if huce_mode and sche_assigned_elevators_count[elevator_id] >= 1: continue
-                    earliest_possible = best_effort_time
-                    earliest_possible = max(earliest_possible, last_sche_time_per_elevator[elevator_id] + SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                    earliest_possible = max(earliest_possible, last_update_time_per_elevator[elevator_id] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                    if abs(earliest_possible - min_valid_time_for_any) < 1e-9 and earliest_possible <= absolute_max_time + 1e-9:
-                         possible_placements.append((earliest_possible, elevator_id))
-                if possible_placements:
-                     placement_time, assigned_elevator_id = random.choice(possible_placements)
-                     final_event_time = round(placement_time, 1)
-                     req_str = generate_sche_request(final_event_time, assigned_elevator_id, SCHE_TARGET_FLOORS, SCHE_SPEEDS)
-                     generated_sche_requests.append(req_str)
-                     last_sche_time_per_elevator[assigned_elevator_id] = placement_time
-                     sche_assigned_elevators_count[assigned_elevator_id] += 1
-                     sche_placed_count += 1; found_sche = True
-        elif event_type == 'UPDATE' and update_placed_count < num_update:
-            # ... (UPDATE placement logic unchanged, uses global random.*) ...
-             found_update = False
-             available_for_update = [eid for eid in ALL_ELEVATOR_IDS if eid not in updated_elevators]
-             if not allow_sche_update_overlap: available_for_update = [eid for eid in available_for_update if sche_assigned_elevators_count[eid] == 0]
-             if len(available_for_update) >= 2:
-                 min_valid_time_for_any = float('inf'); best_pair_for_min_time = None
-                 potential_pairs = [];
-                 if len(available_for_update) >=2:
-                     for i in range(len(available_for_update)):
-                         for j in range(i + 1, len(available_for_update)): potential_pairs.append(tuple(sorted((available_for_update[i], available_for_update[j]))))
-                     random.shuffle(potential_pairs)
-                 for e_a, e_b in potential_pairs:
-                      earliest_possible = best_effort_time
-                      earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_a] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                      earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_b] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                      if earliest_possible < min_valid_time_for_any and earliest_possible <= update_max_time + 1e-9 and earliest_possible <= absolute_max_time + 1e-9:
-                            min_valid_time_for_any = earliest_possible; best_pair_for_min_time = (e_a, e_b)
-                 if best_pair_for_min_time is not None:
-                     possible_placements = []
-                     for e_a, e_b in potential_pairs:
-                         earliest_possible = best_effort_time
-                         earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_a] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                         earliest_possible = max(earliest_possible, last_sche_time_per_elevator[e_b] + UPDATE_SCHE_SAME_ELEVATOR_MIN_INTERVAL)
-                         if abs(earliest_possible - min_valid_time_for_any) < 1e-9 and earliest_possible <= update_max_time + 1e-9 and earliest_possible <= absolute_max_time + 1e-9:
-                              possible_placements.append((earliest_possible, e_a, e_b))
-                     if possible_placements:
-                         placement_time, assigned_e_a, assigned_e_b = random.choice(possible_placements)
-                         final_event_time = round(placement_time, 1); target_floor = random.choice(UPDATE_TARGET_FLOORS)
-                         req_str = generate_update_request(final_event_time, assigned_e_a, assigned_e_b, target_floor)
-                         generated_update_requests.append(req_str)
-                         last_update_time_per_elevator[assigned_e_a] = placement_time; last_update_time_per_elevator[assigned_e_b] = placement_time
-                         updated_elevators.add(assigned_e_a); updated_elevators.add(assigned_e_b)
-                         update_placed_count += 1; found_update = True
+    generated_sche_requests, generated_update_requests, updated_elevators, sche_assigned_elevators_count = _place_sche_update(
+        sche_target_timestamps, update_target_timestamps, num_sche, num_update,
+        sche_target_elevators, allow_sche_update_overlap, huce_mode,
+        absolute_max_time, update_max_time, random,
+        lambda t, eid: generate_sche_request(t, eid, SCHE_TARGET_FLOORS, SCHE_SPEEDS),
+        lambda t, e_a, e_b: generate_update_request(t, e_a, e_b, random.choice(UPDATE_TARGET_FLOORS))
+    )
+    sche_placed_count = len(generated_sche_requests); update_placed_count = len(generated_update_requests)
     if sche_placed_count < num_sche: print(f"INFO: Successfully generated {sche_placed_count} SCHE requests (target was {num_sche}). Constraints may limit placement.", file=sys.stderr)
     if update_placed_count < num_update: print(f"INFO: Successfully generated {update_placed_count} UPDATE requests (target was {num_update}). Constraints may limit placement.", file=sys.stderr)
 
@@ -454,6 +477,168 @@ def generate_data(num_passengers, num_sche, num_update, max_time,
     return final_directives
 
 
+# --- Batch Mode (many inputs per invocation, numpy vectorised sampling) ---
+# Per-passenger draws (timestamps, floors, priorities, IDs) and SCHE/UPDATE parameters come from
+# one numpy Generator per seed. Only the constraint-driven SCHE/UPDATE placement stays sequential
+# (a handful of events), using a random.Random seeded with the same seed.
+# Unlike the single-input path, burst passengers are counted inside -np, so the HCE directive cap holds.
+np = None # numpy, imported by the first generate_batch_input() call so single-input runs never load it
+
+def parse_batch_seeds(spec):
+    """Parses '1,2,10-19' into [1, 2, 10, 11, ..., 19]."""
+    seeds = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part: continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            seeds.extend(range(int(lo), int(hi) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+def _np_passenger_timestamps(rng, num_passengers, start_time, max_time, min_interval, max_interval,
+                             force_start, force_end, burst_size, burst_time):
+    num_middle = max(0, num_passengers - force_start - force_end)
+    if burst_size > num_middle: burst_size = 0
+    num_regular = num_middle - burst_size
+    burst_index = 0; actual_burst_time = start_time
+    if burst_size > 0:
+        span = max(0.1, max_time - start_time)
+        actual_burst_time = start_time + span / 2.0 if burst_time is None else burst_time
+        actual_burst_time = max(start_time, min(actual_burst_time, max_time))
+        burst_index = max(0, min(math.ceil((actual_burst_time - start_time) / span * num_regular), num_regular))
+    intervals = rng.uniform(min_interval, max_interval, num_regular)
+    # The very first request is placed at start_time unless something precedes it
+    if num_regular > 0 and force_start == 0 and not (burst_size > 0 and burst_index == 0):
+        intervals[0] = 0.0
+    regular = start_time + np.cumsum(intervals)
+    parts = [np.full(force_start, start_time), regular[:burst_index]]
+    if burst_size > 0:
+        if burst_index > 0: actual_burst_time = max(actual_burst_time, regular[burst_index - 1])
+        parts.append(np.full(burst_size, actual_burst_time))
+        # Regular requests after the burst continue from the burst time
+        parts.append(actual_burst_time + np.cumsum(intervals[burst_index:]))
+    else:
+        parts.append(regular[burst_index:])
+    parts.append(np.full(force_end, max_time))
+    return np.round(np.clip(np.concatenate(parts), start_time, max_time), 1)
+
+def _np_target_timestamps(rng, num_events, start_time, max_time, burst_size=0, burst_time=None,
+                          min_interval=0.0, max_interval=1.0):
+    if num_events <= 0: return []
+    time_span = max(0.0, max_time - start_time)
+    avg_interval = time_span / num_events if num_events > 1 else 0.0
+    max_interval = max(max_interval, avg_interval * 1.5)
+    min_interval = min(min_interval, avg_interval * 0.5)
+    burst_size = min(burst_size, num_events) if burst_size > 0 else 0
+    intervals = rng.uniform(min_interval, max_interval, num_events - burst_size)
+    if len(intervals) > 0: intervals[0] = 0.0
+    timestamps = start_time + np.cumsum(intervals)
+    if burst_size > 0:
+        actual_burst_time = start_time + time_span / 2.0 if burst_time is None else burst_time
+        timestamps = np.concatenate([timestamps, np.full(burst_size, actual_burst_time)])
+    return sorted(np.clip(timestamps, start_time, max_time).tolist())
+
+def generate_batch_input(seed, num_passengers, num_sche, num_update, max_time,
+                         min_interval_pass, max_interval_pass, start_time,
+                         sche_target_elevators=ALL_ELEVATOR_IDS,
+                         allow_sche_update_overlap=DEFAULT_ALLOW_SCHE_UPDATE_OVERLAP,
+                         sche_burst_size=0, sche_burst_time=None,
+                         update_burst_size=0, update_burst_time=None,
+                         huce_mode=False,
+                         force_start_passengers=0, force_end_passengers=0,
+                         pass_burst_size=0, pass_burst_time=None,
+                         extreme_floor_ratio=0.0,
+                         priority_bias='none', priority_bias_ratio=0.0,
+                         priority_middle_range=DEFAULT_PRIORITY_MIDDLE_RANGE,
+                         update_time_limit_ratio=DEFAULT_UPDATE_TIME_LIMIT_RATIO,
+                         use_random_ids=DEFAULT_USE_RANDOM_ID, random_id_seed=None):
+    """Vectorised counterpart of generate_data for one seed. Returns the sorted directive list."""
+    global np
+    if np is None:
+        import numpy as np
+    rng = np.random.default_rng(seed)
+    if huce_mode:
+        start_time = max(start_time, HUCE_MIN_START_TIME); max_time = min(max_time, HUCE_MAX_TIME)
+        allow_sche_update_overlap = False
+        num_sche = min(num_sche, len(sche_target_elevators))
+    total_duration = max(0.0, max_time - start_time)
+    update_max_time = max(start_time, start_time + total_duration * max(0.0, min(1.0, update_time_limit_ratio)))
+
+    # --- Passengers: timestamps, priorities, floors and IDs in one shot ---
+    times = _np_passenger_timestamps(rng, num_passengers, start_time, max_time, min_interval_pass, max_interval_pass,
+                                     force_start_passengers, force_end_passengers, pass_burst_size, pass_burst_time)
+    n = len(times)
+    priorities = rng.integers(MIN_PRIORITY, MAX_PRIORITY + 1, n)
+    if priority_bias != 'none':
+        biased = rng.random(n) < priority_bias_ratio
+        if priority_bias == 'extremes':
+            biased_values = np.where(rng.random(n) < 0.5, MIN_PRIORITY, MAX_PRIORITY)
+        else:
+            half_range = priority_middle_range // 2
+            lower_bound = max(MIN_PRIORITY, MID_PRIORITY - half_range); upper_bound = min(MAX_PRIORITY, MID_PRIORITY + half_range)
+            if lower_bound > upper_bound: lower_bound = upper_bound = MID_PRIORITY
+            biased_values = rng.integers(lower_bound, upper_bound + 1, n)
+        priorities = np.where(biased, biased_values, priorities)
+    # Distinct start/end without rejection: end = start + offset (mod floors), offset in [1, floors)
+    from_idx = rng.integers(0, NUM_FLOORS, n)
+    to_idx = (from_idx + rng.integers(1, NUM_FLOORS, n)) % NUM_FLOORS
+    if extreme_floor_ratio > 0:
+        extreme = rng.random(n) < extreme_floor_ratio
+        extreme_from = np.where(rng.random(n) < 0.5, 0, NUM_FLOORS - 1)
+        from_idx = np.where(extreme, extreme_from, from_idx)
+        to_idx = np.where(extreme, NUM_FLOORS - 1 - extreme_from, to_idx)
+    if use_random_ids:
+        id_rng = np.random.default_rng([random_id_seed if random_id_seed is not None else int(time.time() * 1000), seed])
+        passenger_ids = id_rng.choice(MAX_RANDOM_PASSENGER_ID, size=n, replace=False) + 1
+    else:
+        passenger_ids = np.arange(1, n + 1)
+    passenger_requests = [
+        f"[{t:.1f}]{pid}-PRI-{pri}-FROM-{ALL_FLOORS[a]}-TO-{ALL_FLOORS[b]}"
+        for t, pid, pri, a, b in zip(times.tolist(), passenger_ids.tolist(), priorities.tolist(), from_idx.tolist(), to_idx.tolist())
+    ]
+
+    # --- SCHE/UPDATE: vectorised targets and parameters, sequential constraint placement ---
+    sche_targets = _np_target_timestamps(rng, num_sche, start_time, max_time, sche_burst_size, sche_burst_time, 0.1, 2.0)
+    update_targets = _np_target_timestamps(rng, num_update, start_time, update_max_time, update_burst_size, update_burst_time, 0.1, 2.0)
+    sche_params = iter(zip(rng.integers(0, len(SCHE_SPEEDS), num_sche).tolist(), rng.integers(0, len(SCHE_TARGET_FLOORS), num_sche).tolist()))
+    update_floors = iter(rng.integers(0, len(UPDATE_TARGET_FLOORS), num_update).tolist())
+    def make_sche_request(t, eid):
+        speed_idx, floor_idx = next(sche_params)
+        return format_sche_request(t, eid, SCHE_SPEEDS[speed_idx], SCHE_TARGET_FLOORS[floor_idx])
+    def make_update_request(t, e_a, e_b):
+        return generate_update_request(t, e_a, e_b, UPDATE_TARGET_FLOORS[next(update_floors)])
+    sche_requests, update_requests, _, _ = _place_sche_update(
+        sche_targets, update_targets, num_sche, num_update,
+        sche_target_elevators, allow_sche_update_overlap, huce_mode,
+        max_time, update_max_time, random.Random(seed), make_sche_request, make_update_request
+    )
+
+    all_directives = passenger_requests + sche_requests + update_requests
+    keyed = [(get_timestamp_from_string(req), 0 if "-PRI-" in req else (1 if "SCHE-" in req else 2), i, req) for i, req in enumerate(all_directives)]
+    keyed.sort()
+    return [item[3] for item in keyed]
+
+def run_batch(seeds, output_dir, gen_kwargs):
+    """Generates one input file per seed into output_dir and reports throughput (inputs/second)."""
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    written = 0
+    for seed in seeds:
+        directives = generate_batch_input(seed, **gen_kwargs)
+        output_path = os.path.join(output_dir, f"input_{seed}.txt")
+        try:
+            with open(output_path, 'w') as f:
+                f.write("\n".join(directives)); f.write("\n")
+            written += 1
+        except IOError as e:
+            print(f"ERROR: Could not write to file {output_path}: {e}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else float('inf')
+    print(f"INFO: Batch generated {written}/{len(seeds)} inputs into '{output_dir}' in {elapsed:.3f}s ({rate:.1f} inputs/s)", file=sys.stderr)
+    return written
+
 # --- Main Function (Argument Parsing & Calling generate_data) ---
 def main():
     parser = argparse.ArgumentParser(
@@ -500,6 +685,11 @@ def main():
     sche_group.add_argument("--update-burst-time", type=float, default=None)
     sche_group.add_argument("--update-time-limit-ratio", type=float, default=DEFAULT_UPDATE_TIME_LIMIT_RATIO)
 
+    # Batch Mode
+    batch_group = parser.add_argument_group('Batch Mode')
+    batch_group.add_argument("--batch-seeds", type=str, default=None, help="Generate one input per seed in a single run, e.g. '1,2,10-19'. Uses numpy vectorised sampling.")
+    batch_group.add_argument("--batch-dir", type=str, default=None, help="Output directory for batch mode (files are named input_<seed>.txt).")
+
     args = parser.parse_args()
 
     # --- Argument Validation & Processing ---
@@ -576,6 +766,32 @@ def main():
     update_burst_max_time = max(adjusted_start_time, update_burst_max_time)
     if args.update_burst_size > 0 and adjusted_nu > 0: adjusted_update_burst_time = adjust_burst_time(args.update_burst_time, "UPDATE", adjusted_start_time, update_burst_max_time)
 
+    if args.batch_seeds:
+        if not args.batch_dir: print("ERROR: --batch-seeds requires --batch-dir.", file=sys.stderr); sys.exit(1)
+        try: batch_seeds = parse_batch_seeds(args.batch_seeds)
+        except ValueError: print(f"ERROR: Invalid --batch-seeds value '{args.batch_seeds}'.", file=sys.stderr); sys.exit(1)
+        if not batch_seeds: print("ERROR: --batch-seeds is empty.", file=sys.stderr); sys.exit(1)
+        written = run_batch(batch_seeds, args.batch_dir, dict(
+            num_passengers=adjusted_np, num_sche=adjusted_ns, num_update=adjusted_nu,
+            max_time=adjusted_max_time,
+            min_interval_pass=args.min_interval_pass, max_interval_pass=args.max_interval_pass,
+            start_time=adjusted_start_time,
+            sche_target_elevators=eligible_sche_elevators,
+            allow_sche_update_overlap=allow_sche_then_update_overlap,
+            sche_burst_size=args.sche_burst_size, sche_burst_time=adjusted_sche_burst_time,
+            update_burst_size=args.update_burst_size, update_burst_time=adjusted_update_burst_time,
+            huce_mode=args.hce,
+            force_start_passengers=args.force_start_passengers, force_end_passengers=args.force_end_passengers,
+            pass_burst_size=args.pass_burst_size, pass_burst_time=adjusted_pass_burst_time,
+            extreme_floor_ratio=args.extreme_floor_ratio,
+            priority_bias=args.priority_bias, priority_bias_ratio=args.priority_bias_ratio,
+            priority_middle_range=args.priority_middle_range,
+            update_time_limit_ratio=args.update_time_limit_ratio,
+            use_random_ids=args.random_id, random_id_seed=args.random_id_seed
+        ))
+        if written != len(batch_seeds): sys.exit(1)
+        return
+
     # Generate Data - Pass the determined ID seed
     generated_directives = generate_data(
         num_passengers=adjusted_np, num_sche=adjusted_ns, num_update=adjusted_nu,
@@ -0,0 +1,215 @@
+# leaderboard.py
+# Columnar per-round result store plus streaming statistics for the console leaderboard.
+import csv
+import math
+import numpy as np
+
+# Column order used by export_csv. Names follow the keys calc.py works with.
+EXPORT_COLUMNS = ["Round", "JAR", "Status", "Score", "T_final", "WT", "W"]
+CI_Z_VALUE = 1.96 # 95% normal confidence interval
+
+
+class RunningStats:
+    """Welford running mean / variance, O(1) per update."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        # Sample variance, 0 until we have two observations
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def ci_half_width(self):
+        """Half width of the normal-approximation confidence interval of the mean."""
+        if self.n < 2:
+            return 0.0
+        return CI_Z_VALUE * math.sqrt(self.variance / self.n)
+
+
+class P2Quantile:
+    """P-square streaming quantile estimator (Jain & Chlamtac), five markers, O(1) per update."""
+
+    def __init__(self, p):
+        self.p = p
+        self._initial = [] # First five observations, kept until markers are set up
+        self._q = None     # Marker heights
+        self._n = None     # Marker positions
+        self._np = None    # Desired marker positions
+        self._dn = None    # Desired position increments
+
+    def add(self, x):
+        if self._q is None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                self._initial.sort()
+                p = self.p
+                self._q = list(self._initial)
+                self._n = [0, 1, 2, 3, 4]
+                self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+                self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+            return
+
+        q, n = self._q, self._n
+        # Find the cell k containing x, extending the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while k < 3 and x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        # Adjust the three middle markers if they drifted from their desired positions
+        for i in range(1, 4):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self._q, self._n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if self._q is not None:
+            return self._q[2]
+        if not self._initial:
+            return float('nan')
+        # Too few samples for the markers, fall back to the exact quantile
+        ordered = sorted(self._initial)
+        return ordered[min(len(ordered) - 1, int(round(self.p * (len(ordered) - 1))))]
+
+
+class RoundStore:
+    """
+    In-memory columnar store of (round, jar, T_final, WT, W, score, status).
+    Columns are numpy arrays that grow geometrically; per-JAR score statistics
+    are kept incrementally so the leaderboard is O(1) per update.
+    Not thread safe on its own, callers hold their history lock.
+    """
+
+    def __init__(self, initial_capacity=256):
+        self._size = 0
+        self._capacity = max(1, int(initial_capacity))
+        self._round = np.empty(self._capacity, dtype=np.int64)
+        self._jar = np.empty(self._capacity, dtype=np.int32)
+        self._status = np.empty(self._capacity, dtype=np.int16)
+        self._t_final = np.empty(self._capacity, dtype=np.float64)
+        self._wt = np.empty(self._capacity, dtype=np.float64)
+        self._w = np.empty(self._capacity, dtype=np.float64)
+        self._score = np.empty(self._capacity, dtype=np.float64)
+        # Categorical columns are stored as codes into these tables
+        self._jar_names = []
+        self._jar_codes = {}
+        self._status_names = []
+        self._status_codes = {}
+        # jar code -> (RunningStats, p50, p95) over scores
+        self._score_stats = {}
+        # jar code -> RunningStats over the weighted ratio to the reference scheduler
+        self._ref_stats = {}
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _intern(value, names, codes):
+        code = codes.get(value)
+        if code is None:
+            code = len(names)
+            names.append(value)
+            codes[value] = code
+        return code
+
+    def _grow(self):
+        new_capacity = self._capacity * 2
+        for attr in ("_round", "_jar", "_status", "_t_final", "_wt", "_w", "_score"):
+            old = getattr(self, attr)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, attr, new)
+        self._capacity = new_capacity
+
+    def append(self, round_num, jar_name, t_final, wt, w, score, status, ref_ratio=None):
+        """Add one JAR result. Missing metrics (non-CORRECT runs) are stored as NaN."""
+        if self._size == self._capacity:
+            self._grow()
+        i = self._size
+        jar_code = RoundStore._intern(jar_name, self._jar_names, self._jar_codes)
+        self._round[i] = round_num if round_num is not None else -1
+        self._jar[i] = jar_code
+        self._status[i] = RoundStore._intern(status, self._status_names, self._status_codes)
+        self._t_final[i] = t_final if t_final is not None else np.nan
+        self._wt[i] = wt if wt is not None else np.nan
+        self._w[i] = w if w is not None else np.nan
+        self._score[i] = score
+        self._size += 1
+
+        stats = self._score_stats.get(jar_code)
+        if stats is None:
+            stats = (RunningStats(), P2Quantile(0.50), P2Quantile(0.95))
+            self._score_stats[jar_code] = stats
+        for s in stats:
+            s.add(score)
+        if ref_ratio is not None:
+            self._ref_stats.setdefault(jar_code, RunningStats()).add(ref_ratio)
+
+    def column(self, name):
+        """Read-only view of a numeric column ('round', 'jar', 'status', 't_final', 'wt', 'w', 'score')."""
+        view = getattr(self, f"_{name}")[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def jar_stats(self, jar_name):
+        """Returns dict with n, mean, ci, p50, p95 of the score (plus mean ref_ratio) for one JAR, or None if unseen."""
+        jar_code = self._jar_codes.get(jar_name)
+        if jar_code is None:
+            return None
+        running, p50, p95 = self._score_stats[jar_code]
+        ref = self._ref_stats.get(jar_code)
+        return {
+            "n": running.n, "mean": running.mean, "ci": running.ci_half_width,
+            "p50": p50.value(), "p95": p95.value(),
+            "ref_ratio": ref.mean if ref else None,
+        }
+
+    def export_csv(self, path):
+        """Writes every stored row as CSV (columns: EXPORT_COLUMNS), readable by calc.py."""
+        def fmt(x):
+            return "" if np.isnan(x) else f"{x:.6f}"
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for i in range(self._size):
+                writer.writerow([
+                    int(self._round[i]),
+                    self._jar_names[self._jar[i]],
+                    self._status_names[self._status[i]],
+                    f"{self._score[i]:.6f}",
+                    fmt(self._t_final[i]), fmt(self._wt[i]), fmt(self._w[i]),
+                ])
+        return path
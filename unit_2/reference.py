@@ -0,0 +1,382 @@
+# reference.py
+# Discrete-event reference scheduler (LOOK + ALS-style dispatch) used as an absolute
+# performance baseline for elevator rounds. Runs in-process, no JVM involved.
+import hashlib
+import heapq
+import importlib.util
+import os
+import sys
+import threading
+from decimal import Decimal
+
+# Upper bound on processed events, guards against a scheduling livelock on odd inputs
+MAX_EVENTS = 1_000_000
+REFERENCE_TMAX = "1000.0"
+
+
+class _Constants:
+    """Timing / energy constants pulled from the homework's checker.py so the baseline uses the same model."""
+
+    def __init__(self, checker_module):
+        c = checker_module
+        self.floor_map = dict(c.FLOOR_MAP)
+        self.min_floor = min(self.floor_map.values())
+        self.max_floor = max(self.floor_map.values())
+        self.start_floor = self.floor_map.get("F1", 1)
+        self.num_elevators = int(getattr(c, "NUM_ELEVATORS", 6))
+        self.capacity = int(getattr(c, "DEFAULT_CAPACITY", 6))
+        self.move_speed = float(c.DEFAULT_MOVE_SPEED)
+        self.door_time = float(c.DOOR_OPEN_CLOSE_TIME)
+        self.sche_stop_time = float(getattr(c, "SCHE_DOOR_STOP_TIME", 1.0))
+        self.double_car_speed = float(getattr(c, "DOUBLE_CAR_SPEED", c.DEFAULT_MOVE_SPEED))
+        self.update_reset_time = float(getattr(c, "UPDATE_RESET_TIME", 1.0))
+        self.w_arrive = float(c.W_ARRIVE)
+        self.w_open = float(c.W_OPEN)
+        self.w_close = float(c.W_CLOSE)
+
+
+class _Passenger:
+    __slots__ = ("pid", "request_time", "priority", "src", "dst", "leg_dst")
+
+    def __init__(self, pid, request_time, priority, src, dst):
+        self.pid = pid
+        self.request_time = request_time
+        self.priority = priority
+        self.src = src
+        self.dst = dst
+        self.leg_dst = dst # Differs from dst when the trip is split at a double-car transfer floor
+
+    @property
+    def direction(self):
+        return 1 if self.leg_dst > self.src else -1
+
+
+class _Car:
+    __slots__ = ("eid", "floor", "direction", "inside", "assigned", "speed", "low", "high",
+                 "awake", "sche", "update", "update_ready_at")
+
+    def __init__(self, eid, const):
+        self.eid = eid
+        self.floor = const.start_floor
+        self.direction = 0
+        self.inside = []
+        self.assigned = []
+        self.speed = const.move_speed
+        self.low = const.min_floor
+        self.high = const.max_floor
+        self.awake = False           # True while a wake event for this car is queued
+        self.sche = None             # (speed, target) while a SCHE is being served
+        self.update = None           # (partner car, role 'A'/'B', target) while an UPDATE is pending
+        self.update_ready_at = None  # Time this car finished emptying for its UPDATE
+
+    @property
+    def available(self):
+        return self.sche is None and self.update is None
+
+
+class ReferenceScheduler:
+    """
+    Simulates one input with a LOOK scheduler per car and a cost-based (ALS-like)
+    dispatcher. SCHE/UPDATE are modelled coarsely: the car drops its assignments,
+    serves the special request and then rejoins the pool. Not a replacement for the
+    checker, only a repeatable yardstick.
+    """
+
+    def __init__(self, const):
+        self.c = const
+
+    def simulate(self, requests, schedules, updates):
+        """
+        requests: pid -> {'time', 'priority', 'from', 'to'}
+        schedules: iterable of {'time', 'eid', 'speed', 'target'}
+        updates: iterable of {'time', 'a_eid', 'b_eid', 'target'}
+        Returns {'T_final', 'WT_weighted_time', 'W_energy'} or None if the run did not finish.
+        """
+        c = self.c
+        self._cars = {eid: _Car(eid, c) for eid in range(1, c.num_elevators + 1)}
+        self._events = []
+        self._seq = 0
+        self._unassigned = []
+        self._arrive = self._open = self._close = 0
+        self._last_time = 0.0
+        self._weighted_time = 0.0
+        self._total_weight = 0
+        self._remaining = len(requests)
+
+        for pid, r in requests.items():
+            self._push(float(r['time']), "request", _Passenger(pid, float(r['time']), int(r['priority']), r['from'], r['to']))
+        for s in schedules:
+            self._push(float(s['time']), "sche", (int(s['eid']), float(s['speed']), s['target']))
+        for u in updates:
+            self._push(float(u['time']), "update", (int(u['a_eid']), int(u['b_eid']), u['target']))
+
+        processed = 0
+        while self._events:
+            now, _, kind, payload = heapq.heappop(self._events)
+            processed += 1
+            if processed > MAX_EVENTS:
+                return None
+            if kind == "request":
+                self._dispatch(payload, now)
+            elif kind == "sche":
+                self._begin_sche(*payload, now)
+            elif kind == "update":
+                self._begin_update(*payload, now)
+            elif kind == "rejoin":
+                self._redispatch_unassigned(now)
+            else:
+                car = self._cars[payload]
+                car.awake = False
+                next_time = self._step(car, now)
+                if next_time is not None:
+                    self._wake(car, next_time)
+
+        if self._remaining > 0:
+            return None
+        wt = self._weighted_time / self._total_weight if self._total_weight else 0.0
+        energy = self._arrive * c.w_arrive + self._open * c.w_open + self._close * c.w_close
+        return {"T_final": round(self._last_time, 4), "WT_weighted_time": round(wt, 4), "W_energy": round(energy, 1)}
+
+    # --- event plumbing ---
+    def _push(self, t, kind, payload):
+        self._seq += 1
+        heapq.heappush(self._events, (t, self._seq, kind, payload))
+
+    def _wake(self, car, t):
+        if not car.awake:
+            car.awake = True
+            self._push(t, "wake", car.eid)
+
+    def _touch(self, t):
+        if t > self._last_time:
+            self._last_time = t
+
+    # --- dispatching ---
+    def _dispatch(self, p, now):
+        best, best_cost = None, None
+        for car in self._cars.values():
+            if not car.available or not (car.low <= p.src <= car.high):
+                continue
+            if min(max(p.dst, car.low), car.high) == p.src:
+                continue # Car cannot move this passenger at all (shaft half on the wrong side)
+            distance = abs(car.floor - p.src)
+            cost = distance * car.speed + self.c.door_time * (len(car.assigned) + len(car.inside))
+            if car.direction != 0 and (p.src - car.floor) * car.direction < 0:
+                cost += 2 * distance * car.speed # Car has to finish its sweep first
+            if best_cost is None or cost < best_cost:
+                best, best_cost = car, cost
+        if best is None:
+            self._unassigned.append(p)
+            return
+        p.leg_dst = min(max(p.dst, best.low), best.high)
+        best.assigned.append(p)
+        self._wake(best, now)
+
+    def _redispatch_unassigned(self, now):
+        pending, self._unassigned = self._unassigned, []
+        for p in pending:
+            self._dispatch(p, now)
+
+    def _release(self, car, now):
+        """Hands the car's waiting assignments back to the dispatcher."""
+        pending, car.assigned = car.assigned, []
+        for p in pending:
+            self._dispatch(p, now)
+
+    def _unload(self, car, now, everyone=False):
+        """Lets passengers out at the current floor; unfinished trips are re-queued from here."""
+        staying = []
+        for p in car.inside:
+            if p.dst == car.floor:
+                self._weighted_time += (now - p.request_time) * p.priority
+                self._total_weight += p.priority
+                self._remaining -= 1
+            elif everyone or p.leg_dst == car.floor:
+                p.src = car.floor
+                p.leg_dst = p.dst
+                self._push(now, "request", p)
+            else:
+                staying.append(p)
+        car.inside = staying
+
+    # --- special requests ---
+    def _begin_sche(self, eid, speed, target, now):
+        car = self._cars.get(eid)
+        if car is None:
+            return
+        car.sche = (speed, target)
+        self._release(car, now)
+        self._wake(car, now)
+
+    def _begin_update(self, a_eid, b_eid, target, now):
+        car_a, car_b = self._cars.get(a_eid), self._cars.get(b_eid)
+        if car_a is None or car_b is None:
+            return
+        car_a.update = (car_b, "A", target)
+        car_b.update = (car_a, "B", target)
+        for car in (car_a, car_b):
+            self._release(car, now)
+            self._wake(car, now)
+
+    def _finish_update(self, car, partner, now):
+        _, role, target = car.update
+        done = max(car.update_ready_at, partner.update_ready_at) + self.c.update_reset_time
+        upper, lower = (car, partner) if role == "A" else (partner, car)
+        upper.floor, upper.low, upper.high = target + 1, target, self.c.max_floor
+        lower.floor, lower.low, lower.high = target - 1, self.c.min_floor, target
+        for x in (upper, lower):
+            x.speed = self.c.double_car_speed
+            x.direction = 0
+            x.update = None
+            x.update_ready_at = None
+        self._touch(done)
+        self._push(done, "rejoin", None)
+        return done
+
+    # --- per-car step ---
+    def _step(self, car, now):
+        """Performs the car's next action at time `now`, returns when it wants to act again (None = idle)."""
+        c = self.c
+        if car.sche is not None:
+            speed, target = car.sche
+            if car.floor != target:
+                car.floor += 1 if target > car.floor else -1
+                self._arrive += 1
+                self._touch(now + speed)
+                return now + speed
+            self._open += 1
+            self._unload(car, now, everyone=True)
+            done = now + c.sche_stop_time
+            self._close += 1
+            self._touch(done)
+            car.sche = None
+            car.direction = 0
+            self._push(done, "rejoin", None)
+            return done
+
+        if car.update is not None:
+            if car.inside:
+                self._open += 1
+                self._unload(car, now, everyone=True)
+                self._close += 1
+                self._touch(now + c.door_time)
+                return now + c.door_time
+            partner = car.update[0]
+            car.update_ready_at = now
+            if partner.update_ready_at is None:
+                return None # Partner wakes us once it is empty as well
+            done = self._finish_update(car, partner, now)
+            self._wake(partner, done)
+            return done
+
+        outs = [p for p in car.inside if p.leg_dst == car.floor]
+        waiting_here = [p for p in car.assigned if p.src == car.floor]
+        boarding = []
+        if waiting_here:
+            targets = [p.leg_dst for p in car.inside] + [p.src for p in car.assigned if p.src != car.floor]
+            ahead = car.direction != 0 and any((t - car.floor) * car.direction > 0 for t in targets)
+            if not ahead and not car.inside:
+                car.direction = max(waiting_here, key=lambda p: p.priority).direction
+            room = c.capacity - (len(car.inside) - len(outs))
+            boarding = [p for p in waiting_here if p.direction == car.direction][:max(0, room)]
+
+        if outs or boarding:
+            self._open += 1
+            self._unload(car, now)
+            for p in boarding:
+                car.assigned.remove(p)
+                car.inside.append(p)
+            self._close += 1
+            self._touch(now + c.door_time)
+            return now + c.door_time
+
+        targets = [p.leg_dst for p in car.inside] + [p.src for p in car.assigned]
+        if not targets:
+            car.direction = 0
+            return None
+        if car.direction == 0 or not any((t - car.floor) * car.direction > 0 for t in targets):
+            nearest = min(targets, key=lambda t: (abs(t - car.floor), t))
+            if nearest == car.floor:
+                # Only opposite-direction riders wait here while the car is loaded, sweep on first
+                nearest = max(targets, key=lambda t: abs(t - car.floor))
+            car.direction = 1 if nearest > car.floor else -1
+        next_floor = car.floor + car.direction
+        if not (car.low <= next_floor <= car.high):
+            car.direction = -car.direction
+            next_floor = car.floor + car.direction
+        car.floor = next_floor
+        self._arrive += 1
+        self._touch(now + car.speed)
+        return now + car.speed
+
+
+class ReferenceBaseline:
+    """Loads the checker constants once and memoises simulated metrics per input content hash."""
+
+    def __init__(self, checker_module):
+        self._checker_module = checker_module
+        self._scheduler = ReferenceScheduler(_Constants(checker_module))
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def input_hash(content):
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def metrics_for_file(self, input_path):
+        try:
+            with open(input_path, "r", encoding="utf-8", errors="replace") as f:
+                content = f.read()
+        except OSError as e:
+            print(f"WARNING: Reference baseline could not read {input_path}: {e}", file=sys.stderr)
+            return None
+        return self.metrics_for_content(content)
+
+    def metrics_for_content(self, content):
+        key = ReferenceBaseline.input_hash(content)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        # tmax only bounds the checker's output validation, parsing does not depend on it
+        chk = self._checker_module.ElevatorChecker(tmax=Decimal(REFERENCE_TMAX))
+        chk.parse_input_lines(content.splitlines())
+        schedules = [d | {'eid': eid} for eid, lst in chk.input_schedule_requests.items() for d in lst]
+        updates = [d for lst in getattr(chk, "input_update_requests", {}).values() for d in lst]
+        # Scheduler instances keep per-run state, so simulations are serialised under the lock
+        with self._lock:
+            metrics = self._scheduler.simulate(chk.input_passenger_requests, schedules, updates)
+            self._cache[key] = metrics
+        return metrics
+
+
+def load_baseline(checker_path):
+    """
+    Builds a ReferenceBaseline from the homework's checker.py. Returns None when the
+    checker does not expose the ElevatorChecker model (e.g. hw5), callers then skip the baseline.
+    """
+    try:
+        spec = importlib.util.spec_from_file_location(f"_reference_checker_{abs(hash(checker_path))}", checker_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except Exception as e:
+        print(f"WARNING: Could not load checker constants from {checker_path} for the reference baseline: {e}", file=sys.stderr)
+        return None
+    if not hasattr(module, "ElevatorChecker") or not hasattr(module, "DEFAULT_MOVE_SPEED"):
+        print(f"INFO: {os.path.basename(os.path.dirname(checker_path))} checker has no ElevatorChecker model, reference baseline disabled.")
+        return None
+    return ReferenceBaseline(module)
+
+
+def relative_to_reference(result, reference):
+    """
+    Weighted ratio of a JAR's metrics to the reference, using the scoring weights
+    (T_final 0.3, WT 0.3, W 0.4). Below 1.0 means the JAR beat the baseline.
+    """
+    if not reference or result.get("t_final") is None or result.get("wt") is None or result.get("w") is None:
+        return None
+    parts = ((0.3, result["t_final"], reference["T_final"]),
+             (0.3, result["wt"], reference["WT_weighted_time"]),
+             (0.4, result["w"], reference["W_energy"]))
+    if any(ref <= 0 for _, _, ref in parts):
+        return None
+    return sum(weight * value / ref for weight, value, ref in parts)
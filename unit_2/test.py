@@ -17,8 +17,18 @@ import numpy as np
 import concurrent.futures
 import random # Added for preset selection
 import traceback # For logging errors from threads
+import importlib
 import yaml
 
+current_package = __name__.rsplit('.', 1)[0] if '.' in __name__ else ''
+leaderboard = importlib.import_module(f"{current_package}.leaderboard" if current_package else "leaderboard")
+reference = importlib.import_module(f"{current_package}.reference" if current_package else "reference")
+artifact_store = importlib.import_module(f"{current_package}.artifact_store" if current_package else "artifact_store")
+timing = importlib.import_module(f"{current_package}.timing" if current_package else "timing")
+busywait = importlib.import_module(f"{current_package}.busywait" if current_package else "busywait")
+threaddump = importlib.import_module(f"{current_package}.threaddump" if current_package else "threaddump")
+jfrprofile = importlib.import_module(f"{current_package}.jfrprofile" if current_package else "jfrprofile")
+
 # --- Default Configuration, will be replaced by config.yml ---
 CPU_TIME_LIMIT = 10.0  # seconds
 MIN_WALL_TIME_LIMIT = 120.0 # seconds - Renamed: Minimum wall time limit
@@ -26,6 +36,7 @@ PERF_P_VALUE = 0.10
 ENABLE_DETAILED_DEBUG = False # Set to True for verbose debugging
 LOG_DIR = "logs" # Define log directory constant
 TMP_DIR = "tmp"  # Define temporary file directory constant
+ERROR_LOG_STDOUT_TAIL_LINES = 20 # Stdout lines quoted in error logs when outputs live in the artifact store
 DEFAULT_GEN_MAX_TIME = 50.0 # Default generator -t value if not specified in preset
 DEFAULT_PARALLEL_ROUNDS = 16 # Default number of rounds to run in parallel
 CLEANUP_SUCCESSFUL_ROUNDS = True
@@ -47,7 +58,11 @@ class JarTester:
     _interrupted = False # Global interrupt flag
     _round_counter = 0 # Global counter for assigning round numbers
     _log_file_path = None
-    _all_results_history = defaultdict(lambda: {'correct_runs': 0, 'total_runs': 0, 'scores': []})
+    _artifact_store = None # artifact_store.ArtifactStore when test.artifact_store is enabled
+    _profiler = None # jfrprofile.Profiler when test.profile is enabled
+    _all_results_history = defaultdict(lambda: {'correct_runs': 0, 'total_runs': 0, 'scores': [], 'unreliable_runs': 0})
+    _leaderboard = leaderboard.RoundStore() # Columnar per-round store + streaming stats
+    _reference_baseline = None # reference.ReferenceBaseline for the current hw, None if unsupported
     _gen_arg_presets = []
     _raw_preset_commands = []
     _loaded_preset_commands = []
@@ -124,13 +139,15 @@ class JarTester:
             print(f"ERROR: Exception during process termination for PID {pid}: {e}", file=sys.stderr)
 
     @staticmethod
-    def _output_reader(pipe, output_queue, stream_name, pid, error_flag):
+    def _output_reader(pipe, output_queue, stream_name, pid, error_flag, arrival_times=None):
         debug_print(f"Output reader ({stream_name}) started for PID {pid}")
         try:
             for line_num, line in enumerate(iter(pipe.readline, '')):
                 if error_flag.is_set() or JarTester._interrupted:
                      debug_print(f"Output reader ({stream_name}) stopping early for PID {pid} (error or interrupt)")
                      break
+                if arrival_times is not None:
+                    arrival_times.append(time.monotonic()) # Host arrival time, compared with the printed [timestamp] later
                 output_queue.put(line)
             debug_print(f"Output reader ({stream_name}) finished iter loop for PID {pid}")
         except ValueError:
@@ -166,19 +183,35 @@ class JarTester:
             "stdout_log_path": None, # Path to saved stdout file
             "stderr": [], # Keep stderr in memory for log
             "t_final": None, "wt": None, "w": None, "final_score": 0.0,
+            "timing": None, # timing.analyze() result: drift between printed and arrival times
+            "idle_cpu": None, "cpu_profile": None, # busywait.ThreadCpuSampler report
+            "thread_dump": None, "thread_dump_lines": [], # threaddump.summarize() / raw dump, captured on TLE
             "input_data_path": input_data_path # Store the input path with the result
         }
         stdout_reader_thread = None
         stderr_reader_thread = None
         stdout_queue = queue.Queue()
         stderr_queue = queue.Queue()
+        stdout_arrivals = []
+        stderr_arrivals = []
+        dump_mark = None # (stdout, stderr) line counts when a thread dump was requested
+        jcmd_dump = None
+        recording_path = None
+        recording_killed = False
+        recording_dump_time = 0.0 # Spent in dump_before_kill(), not charged to the JAR's wall time
+        host_stall = 0.0 # Worst oversleep of the monitor loop, i.e. how starved the harness was
+        cpu_sampler = None
         error_flag = threading.Event() # Local error flag for this JAR run
 
         try:
             # --- (Process Launch and Monitoring - unchanged) ---
             debug_print(f"Launching JAR: {jar_basename}")
+            java_cmd = ['java', '-jar', jar_path]
+            if JarTester._profiler is not None and JarTester._profiler.selected(jar_basename):
+                recording_path = JarTester._profiler.recording_path(jar_basename, round_num)
+                java_cmd[1:1] = jfrprofile.java_options(recording_path)
             process = subprocess.Popen(
-                ['java', '-jar', jar_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                java_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', bufsize=1
             )
             pid = process.pid
@@ -186,6 +219,7 @@ class JarTester:
             result["status"] = "RUNNING"
             try:
                 ps_proc = psutil.Process(pid)
+                cpu_sampler = busywait.ThreadCpuSampler(pid)
                 debug_print(f"Attached psutil to PID {pid}")
             except psutil.NoSuchProcess as e_attach:
                 print(f"ERROR: Process {pid} ({jar_basename}) disappeared immediately after launch.", file=sys.stderr)
@@ -199,8 +233,8 @@ class JarTester:
 
 
             debug_print(f"Starting output reader threads for PID {pid}")
-            stdout_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stdout, stdout_queue, "stdout", pid, error_flag), daemon=True)
-            stderr_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stderr, stderr_queue, "stderr", pid, error_flag), daemon=True)
+            stdout_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stdout, stdout_queue, "stdout", pid, error_flag, stdout_arrivals), daemon=True)
+            stderr_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stderr, stderr_queue, "stderr", pid, error_flag, stderr_arrivals), daemon=True)
             stdout_reader_thread.start()
             stderr_reader_thread.start()
 
@@ -245,7 +279,14 @@ class JarTester:
             debug_print(f"Starting monitoring loop for PID {pid}")
             monitor_loops = 0
             process_exited_normally = False
+            last_tick = None
             while True:
+                now_tick = time.monotonic()
+                if last_tick is not None:
+                    host_stall = max(host_stall, now_tick - last_tick - 0.05)
+                last_tick = now_tick
+                if cpu_sampler is not None:
+                    cpu_sampler.sample(now_tick, len(stdout_arrivals))
                 monitor_loops += 1
                 try:
                     if not ps_proc.is_running():
@@ -310,6 +351,9 @@ class JarTester:
                     result["status"] = "TLE"
                     # Update error message to reflect the actual limit used
                     result["error_details"] = f"Wall time {current_wall_time:.2f}s exceeded limit {current_wall_limit:.2f}s."
+                    # Ask the JVM for a thread dump while the reader threads still drain its pipes (bounded delay)
+                    dump_mark = (len(stdout_arrivals), len(stderr_arrivals))
+                    jcmd_dump = threaddump.capture(pid, lambda: len(stdout_arrivals) + len(stderr_arrivals))
                     error_flag.set() # Set local flag on limit exceeded
                     break
 
@@ -322,7 +366,14 @@ class JarTester:
                  debug_print(f"Error flag set or limit exceeded, ensuring process tree killed for PID {pid}")
                  try:
                      # Check existence before killing
-                     if process and process.poll() is None: JarTester._kill_process_tree(pid)
+                     if process and process.poll() is None:
+                         if recording_path is not None:
+                             # SIGKILL follows SIGTERM too soon for dumponexit, so take the recording first
+                             recording_killed = True
+                             dump_start = time.monotonic()
+                             JarTester._profiler.dump_before_kill(pid, recording_path)
+                             recording_dump_time = time.monotonic() - dump_start
+                         JarTester._kill_process_tree(pid)
                      elif psutil.pid_exists(pid): JarTester._kill_process_tree(pid)
                      else: debug_print(f"Process {pid} already gone before kill attempt after loop exit.")
                  except Exception as e_kill_loop:
@@ -348,7 +399,7 @@ class JarTester:
             final_status_determined = result["status"] not in ["RUNNING", "PENDING"]
 
             # Final update of times
-            result["wall_time"] = time.monotonic() - start_wall_time
+            result["wall_time"] = time.monotonic() - start_wall_time - recording_dump_time
             try:
                 if psutil.pid_exists(pid):
                      final_cpu_times = psutil.Process(pid).cpu_times()
@@ -440,8 +491,33 @@ class JarTester:
                 while True: stderr_lines.append(stderr_queue.get(block=False))
             except queue.Empty: pass
 
+            if dump_mark is not None:
+                # A SIGQUIT dump is printed by the JVM itself; keep it out of the JAR's stdout / stderr
+                stdout_lines, stdout_dump = threaddump.extract(stdout_lines, dump_mark[0])
+                stderr_lines, stderr_dump = threaddump.extract(stderr_lines, dump_mark[1])
+                dump_lines = jcmd_dump or stdout_dump or stderr_dump
+                if dump_lines:
+                    result["thread_dump"] = threaddump.summarize(dump_lines)
+                    result["thread_dump_lines"] = dump_lines
+                    result["error_details"] += " " + threaddump.format_summary(result["thread_dump"])
+
             result["stderr"] = stderr_lines # Store stderr directly
+            if recording_path is not None:
+                # The JVM is gone and the times are final, so reading the recording costs nothing measured
+                if not JarTester._profiler.add_recording(jar_basename, recording_path):
+                    if recording_killed:
+                        print(f"WARNING: JFR recording of killed JAR {jar_basename} ({result['status']}) could not be read, kept at {recording_path}", file=sys.stderr)
+                    else:
+                        debug_print(f"JFR recording for {jar_basename} not parsed, kept at {recording_path}")
             debug_print(f"Drained queues for PID {pid}. stdout lines: {len(stdout_lines)}, stderr lines: {len(stderr_lines)}")
+            result["timing"] = timing.analyze(stdout_lines, stdout_arrivals, start_wall_time, host_stall)
+            if cpu_sampler is not None:
+                result["cpu_profile"] = cpu_sampler.report()
+                if result["cpu_profile"]:
+                    result["idle_cpu"] = result["cpu_profile"]["idle_cpu"]
+                    busy = result["cpu_profile"]["busy_threads"]
+                    if busy and result["status"] in ("CTLE", "TLE"):
+                        result["error_details"] += " Busy-wait suspects: " + ", ".join(f"{name} ({secs:.1f}s)" for name, secs in busy)
 
             # Save stdout to a unique file in TMP_DIR
             stdout_content = "".join(stdout_lines)
@@ -452,9 +528,13 @@ class JarTester:
                 stdout_filename = f"output_{safe_jar_basename}_{round_num}.txt"
                 stdout_filepath = os.path.abspath(os.path.join(TMP_DIR, stdout_filename))
                 try:
-                    os.makedirs(TMP_DIR, exist_ok=True) # Ensure dir exists
-                    with open(stdout_filepath, 'w', encoding='utf-8', errors='replace') as f_out:
-                        f_out.write(stdout_content)
+                    if JarTester._artifact_store is not None:
+                        # Compressed + deduplicated, read back with artifact_store.py cat/line/tail
+                        stdout_filepath = JarTester._artifact_store.put(stdout_content)
+                    else:
+                        os.makedirs(TMP_DIR, exist_ok=True) # Ensure dir exists
+                        with open(stdout_filepath, 'w', encoding='utf-8', errors='replace') as f_out:
+                            f_out.write(stdout_content)
                     result["stdout_log_path"] = stdout_filepath # Store the path
                     debug_print(f"JAR stdout saved to {stdout_filepath}")
                 except Exception as e_write_stdout:
@@ -631,6 +711,15 @@ class JarTester:
              debug_print(f"Skipping checker for {jar_basename} (unknown reason). Status: {result['status']}, Interrupt: {JarTester._interrupted}")
 
 
+        # Host-side timing problems must not count as the JAR's TLE / poor performance
+        if JarTester._timing_unreliable(result):
+            reason = result["timing"]["reason"]
+            if result["status"] == "TLE":
+                result["status"] = "UNRELIABLE"
+                result["error_details"] = f"Unreliable timing ({reason}); was: {result['error_details']}"
+            elif result["status"] == "CORRECT":
+                result["error_details"] = f"Unreliable timing ({reason}), excluded from scoring."
+
         # Ensure score is 0 if final status is not CORRECT
         if result["status"] != "CORRECT":
             result["final_score"] = 0.0
@@ -754,6 +843,10 @@ class JarTester:
                  except Exception: pass
             return None, input_filepath # Return path even on failure
 
+    @staticmethod
+    def _timing_unreliable(r):
+        return bool(r.get("timing") and r["timing"]["unreliable"])
+
     # --- (Keep _calculate_scores as it is) ---
     @staticmethod
     def _calculate_scores(current_results):
@@ -762,6 +855,7 @@ class JarTester:
             r for r in current_results
             if r["status"] == "CORRECT"
             and r["t_final"] is not None and r["wt"] is not None and r["w"] is not None
+            and not JarTester._timing_unreliable(r) # Their metrics reflect host load, not the JAR
         ]
         debug_print(f"Calculating scores based on {len(correct_results)} CORRECT runs with metrics.")
 
@@ -862,6 +956,19 @@ class JarTester:
         # Scores for non-CORRECT runs were already set to 0
 
 
+    @staticmethod
+    def _attach_reference(current_results, input_data_path):
+        """Adds the reference-scheduler metrics and each JAR's weighted ratio to them (in-place)."""
+        ref_metrics = None
+        if JarTester._reference_baseline and input_data_path and os.path.exists(input_data_path):
+            try:
+                ref_metrics = JarTester._reference_baseline.metrics_for_file(input_data_path)
+            except Exception as e_ref:
+                print(f"WARNING: Reference scheduler failed on {input_data_path}: {e_ref}", file=sys.stderr)
+        for r in current_results:
+            r["reference"] = ref_metrics
+            r["ref_ratio"] = reference.relative_to_reference(r, ref_metrics) if r.get("status") == "CORRECT" and not JarTester._timing_unreliable(r) else None
+
     # --- Modify _display_results to use Lock and log round number ---
     @staticmethod
     def _display_and_log_results(round_num, results, round_preset_cmd, input_data_path, round_wall_limit):
@@ -872,11 +979,17 @@ class JarTester:
         results.sort(key=lambda x: (-x.get("final_score", 0.0), x.get("wall_time", float('inf')) if x.get("status") == "CORRECT" else float('inf')))
 
         round_header = f"\n--- Test Round {round_num} Results (Preset: {round_preset_cmd} | Wall Limit: {round_wall_limit:.1f}s) ---"
-        header = f"{'JAR':<25} | {'Status':<12} | {'Score':<7} | {'T_final':<10} | {'WT':<10} | {'W':<10} | {'CPU(s)':<8} | {'Wall(s)':<8} | Details"
+        header = f"{'JAR':<25} | {'Status':<12} | {'Score':<7} | {'T_final':<10} | {'WT':<10} | {'W':<10} | {'CPU(s)':<8} | {'Wall(s)':<8} | {'vs Ref':<7} | {'Idle CPU':<8} | Details"
         separator = "-" * len(header)
 
+        ref_metrics = next((r["reference"] for r in results if r.get("reference")), None)
+        ref_line = None
+        if ref_metrics:
+            ref_line = f"Reference (LOOK) baseline: T_final={ref_metrics['T_final']:.3f} | WT={ref_metrics['WT_weighted_time']:.3f} | W={ref_metrics['W_energy']:.3f}"
+
         log_lines.append(round_header.replace(" Results ", " Summary "))
         log_lines.append(f"Input Data File: {input_data_path if input_data_path else '<Not Available>'}")
+        if ref_line: log_lines.append(ref_line)
         log_lines.append(header)
         log_lines.append(separator)
 
@@ -887,7 +1000,7 @@ class JarTester:
             jar_name = r.get("jar_file", "UnknownJAR")
             status = r.get("status", "UNKNOWN")
             score = r.get("final_score", 0.0)
-            score_str = f"{score:.3f}" if status == "CORRECT" else "---"
+            score_str = f"{score:.3f}" if status == "CORRECT" and not JarTester._timing_unreliable(r) else "---"
             tfin = r.get("t_final")
             tfin_str = f"{tfin:.3f}" if tfin is not None else "---"
             wt = r.get("wt")
@@ -898,13 +1011,17 @@ class JarTester:
             cpu_str = f"{cpu:.2f}"
             wall = r.get("wall_time", 0.0)
             wall_str = f"{wall:.2f}"
+            ref_ratio = r.get("ref_ratio")
+            ref_str = f"{ref_ratio:.3f}" if ref_ratio is not None else "---"
+            idle_cpu = r.get("idle_cpu")
+            idle_str = f"{idle_cpu:.2f}" if idle_cpu is not None else "---"
             details = r.get("error_details", "")[:100] # Truncate details for console
 
             # Line for console (potentially truncated details)
-            console_line = f"{jar_name:<25} | {status:<12} | {score_str:<7} | {tfin_str:<10} | {wt_str:<10} | {w_str:<10} | {cpu_str:<8} | {wall_str:<8} | {details}"
+            console_line = f"{jar_name:<25} | {status:<12} | {score_str:<7} | {tfin_str:<10} | {wt_str:<10} | {w_str:<10} | {cpu_str:<8} | {wall_str:<8} | {ref_str:<7} | {idle_str:<8} | {details}"
             result_lines_for_console.append(console_line)            
             
-            log_line = f"{jar_name:<25} | {status:<12} | {score_str:<7} | {tfin_str:<10} | {wt_str:<10} | {w_str:<10} | {cpu_str:<8} | {wall_str:<8} | {r.get('error_details', '')}"
+            log_line = f"{jar_name:<25} | {status:<12} | {score_str:<7} | {tfin_str:<10} | {wt_str:<10} | {w_str:<10} | {cpu_str:<8} | {wall_str:<8} | {ref_str:<7} | {idle_str:<8} | {r.get('error_details', '')}"
             log_lines.append(log_line)
 
             # --- Modify Error Logging Section ---
@@ -931,6 +1048,8 @@ class JarTester:
                 log_lines.append("  --- Stdout Log File ---")
                 log_lines.append(f"    Path: {stdout_log if stdout_log else '<Not Saved or Error>'}")
                 log_lines.append("  --- End Stdout Log File ---")
+                if r.get("thread_dump"):
+                    log_lines.append(f"  {threaddump.format_summary(r['thread_dump'])} (full dump in the round's error log)")
 
                 # Keep logging stderr content directly
                 log_lines.append("  --- Stderr ---")
@@ -949,14 +1068,31 @@ class JarTester:
 
         log_lines.append(separator) # Add separator to log lines
 
+        # Threads that kept a core busy while their JAR printed nothing (polling / spinning)
+        busy_wait_lines = []
+        for r in results:
+            profile = r.get("cpu_profile")
+            if profile and profile["busy_threads"]:
+                threads = ", ".join(f"{name} ({secs:.1f}s)" for name, secs in profile["busy_threads"])
+                busy_wait_lines.append(f"Busy-wait suspects in {r.get('jar_file', 'UnknownJAR')}: {threads}")
+        log_lines.extend(busy_wait_lines)
+        for r in results:
+            profile = r.get("cpu_profile")
+            if profile and profile["timeline"]:
+                timeline = " ".join(str(pct) for pct in profile["timeline"])
+                log_lines.append(f"CPU% timeline ({profile['interval']}s/sample) {r.get('jar_file', 'UnknownJAR')}: {timeline}")
+
         # --- Print block to console atomically using the console lock ---
         with JarTester._console_lock:
             print(round_header)
+            if ref_line: print(ref_line)
             print(header)
             print(separator)
             for line in result_lines_for_console:
                 print(line)
             print(separator)
+            for line in busy_wait_lines:
+                print(f"WARNING: {line}")
             print(f"--- End of Round {round_num} ---") # Console end marker
 
         # --- Log writing with lock ---
@@ -984,6 +1120,15 @@ class JarTester:
                 if jar_name == "UnknownJAR": continue
 
                 history = JarTester._all_results_history[jar_name] # defaultdict handles creation
+                if JarTester._timing_unreliable(r):
+                    history['unreliable_runs'] += 1
+                    if r.get("status") == "UNRELIABLE":
+                        continue # Was a TLE caused by host load: neither a failure nor a pass
+                    if r.get("status") == "CORRECT":
+                        # Counts as correct, but its metrics are not a valid performance sample
+                        history['total_runs'] += 1
+                        history['correct_runs'] += 1
+                        continue
                 history['total_runs'] += 1
                 score_to_add = 0.0
                 if r.get("status") == "CORRECT":
@@ -992,6 +1137,10 @@ class JarTester:
                     score_to_add = float(r.get("final_score", 0.0) or 0.0)
 
                 history['scores'].append(score_to_add)
+                JarTester._leaderboard.append(
+                    r.get("round_num"), jar_name, r.get("t_final"), r.get("wt"), r.get("w"),
+                    score_to_add, r.get("status", "UNKNOWN"), ref_ratio=r.get("ref_ratio")
+                )
                 # debug_print(f"History update for {jar_name}: Total={history['total_runs']}, Correct={history['correct_runs']}, Added Score={score_to_add:.3f}")
             # debug_print("Released history lock") # Optional: debug lock release
 
@@ -1037,21 +1186,33 @@ class JarTester:
             avg_score = avg_score if np.isfinite(avg_score) else 0.0
             summary_data.append({
                 "jar": jar_name, "avg_score": avg_score, "correct_rate": correct_rate,
-                "correct": correct_runs, "total": total_runs
+                "correct": correct_runs, "total": total_runs, "unreliable": data.get('unreliable_runs', 0),
+                "stats": JarTester._leaderboard.jar_stats(jar_name)
             })
 
         summary_data.sort(key=lambda x: (-x["avg_score"], -x["correct_rate"], x["jar"])) # Added JAR name sort tiebreaker
 
-        header = f"{'JAR':<25} | {'Avg Score':<10} | {'Correct %':<10} | {'Passed/Total':<15}"
+        header = f"{'JAR':<25} | {'Avg Score':<10} | {'95% CI':<8} | {'p50':<7} | {'p95':<7} | {'vs Ref':<7} | {'Correct %':<10} | {'Passed/Total':<15}"
         summary_lines.append(header)
         summary_lines.append("-" * len(header))
 
         for item in summary_data:
              passed_total_str = f"{item['correct']}/{item['total']}"
-             line = f"{item['jar']:<25} | {item['avg_score']:<10.3f} | {item['correct_rate']:<10.1f}% | {passed_total_str:<15}"
+             stats = item["stats"]
+             if stats:
+                 ci_str, p50_str, p95_str = f"±{stats['ci']:.3f}", f"{stats['p50']:.3f}", f"{stats['p95']:.3f}"
+                 ref_str = f"{stats['ref_ratio']:.3f}" if stats['ref_ratio'] is not None else "---"
+             else:
+                 ci_str = p50_str = p95_str = ref_str = "---"
+             line = f"{item['jar']:<25} | {item['avg_score']:<10.3f} | {ci_str:<8} | {p50_str:<7} | {p95_str:<7} | {ref_str:<7} | {item['correct_rate']:<10.1f}% | {passed_total_str:<15}"
              summary_lines.append(line)
 
         summary_lines.append("-" * len(header))
+        unreliable = [f"{item['jar']} x{item['unreliable']}" for item in summary_data if item['unreliable']]
+        if unreliable:
+            summary_lines.append(f"Runs with unreliable timing (not scored / not counted as TLE): {', '.join(unreliable)}")
+        if JarTester._profiler is not None:
+            summary_lines.extend(JarTester._profiler.report_lines())
         return "\n".join(summary_lines) # Return the complete summary string
 
     # --- (Keep _signal_handler as it is) ---
@@ -1295,7 +1456,7 @@ class JarTester:
                     except Exception: pass
                 return None # Don't proceed to scoring/logging/history
 
-            failed_jars_in_round = [r for r in results_this_round if r.get("status") not in ["CORRECT", "PENDING", "RUNNING", "INTERRUPTED"]]
+            failed_jars_in_round = [r for r in results_this_round if r.get("status") not in ["CORRECT", "PENDING", "RUNNING", "INTERRUPTED", "UNRELIABLE"]]
             if failed_jars_in_round:
                 # Create a unique filename for this round's errors using the seed
                 error_log_filename = f"errors_{round_num}_{current_seed}.log"
@@ -1324,6 +1485,16 @@ class JarTester:
                             # Log path to stdout file for this failing JAR
                             stdout_log = r.get("stdout_log_path")
                             f_err.write(f"Stdout Log File Path: {stdout_log if stdout_log else '<Not Saved or Error>'}\n")
+                            if artifact_store.is_artifact(stdout_log):
+                                f_err.write(f"--- Stdout Tail (last {ERROR_LOG_STDOUT_TAIL_LINES} lines, full output: python artifact_store.py cat <path>) ---\n")
+                                for out_line in artifact_store.tail(stdout_log, ERROR_LOG_STDOUT_TAIL_LINES):
+                                    f_err.write(f"  {out_line.rstrip()}\n")
+
+                            if r.get("thread_dump_lines"):
+                                f_err.write(f"--- {threaddump.format_summary(r['thread_dump'])} ---\n")
+                                for dump_line in r["thread_dump_lines"]:
+                                    f_err.write(f"  {dump_line.rstrip()}\n")
+                                f_err.write("--- End Thread Dump ---\n")
 
                             # Log stderr content directly for this failing JAR
                             f_err.write("--- Stderr Content ---\n")
@@ -1348,6 +1519,7 @@ class JarTester:
             # 3. Calculate Performance Scores for this round
             debug_print(f"Round {round_num}: Calculating scores...")
             JarTester._calculate_scores(results_this_round) # Modifies results_this_round in-place
+            JarTester._attach_reference(results_this_round, input_data_path)
 
             if CLEANUP_SUCCESSFUL_ROUNDS and results_this_round: # Check if flag is set and results exist
                 all_passed = True
@@ -1364,7 +1536,7 @@ class JarTester:
                             failed_jar_outputs_to_keep.append(stdout_path)
                         # Note: Even if status is not CORRECT, we still need to check others
                     else: # Status is CORRECT
-                        if stdout_path and os.path.exists(stdout_path):
+                        if stdout_path and os.path.exists(stdout_path) and not artifact_store.is_artifact(stdout_path): # Shared blobs are left to LRU eviction
                             # Mark this successful output for potential deletion
                             successful_jar_outputs_to_delete.append(stdout_path)
 
@@ -1487,6 +1659,19 @@ class JarTester:
             LOG_DIR = logs_dir_config
             TMP_DIR = tmp_dir_config
             CLEANUP_SUCCESSFUL_ROUNDS = bool(cleanup_enabled_config)
+            JarTester._artifact_store = None
+            if test_config.get('artifact_store', False):
+                JarTester._artifact_store = artifact_store.ArtifactStore(
+                    test_config.get('artifact_dir', os.path.join(TMP_DIR, "artifacts")),
+                    int(float(test_config.get('artifact_store_max_mb', artifact_store.DEFAULT_MAX_MB)) * 1024 * 1024)
+                )
+                print(f"INFO: JAR outputs are stored compressed ({JarTester._artifact_store.codec}) and deduplicated in {JarTester._artifact_store.root}")
+            JarTester._profiler = None
+            if test_config.get('profile', False):
+                JarTester._profiler = jfrprofile.Profiler(TMP_DIR, test_config.get('profile_jars'))
+                print(f"INFO: JFR profiling enabled for {', '.join(sorted(JarTester._profiler.jars)) if JarTester._profiler.jars else 'all JARs'} (JVM start-up and timings are slightly slower)")
+                if JarTester._profiler.jfr_tool is None:
+                    print("WARNING: JDK 'jfr' tool not found on PATH or in JAVA_HOME, recordings will be kept in the tmp dir but not summarised.", file=sys.stderr)
 
             # Update debug status immediately if changed
             if ENABLE_DETAILED_DEBUG:
@@ -1535,6 +1720,8 @@ class JarTester:
             JarTester._interrupted = False
             JarTester._round_counter = 0 # Reset counter
             JarTester._all_results_history.clear()
+            JarTester._leaderboard = leaderboard.RoundStore()
+            JarTester._reference_baseline = None
 
             os.makedirs(LOG_DIR, exist_ok=True)
             os.makedirs(TMP_DIR, exist_ok=True)
@@ -1562,6 +1749,8 @@ class JarTester:
             if not os.path.exists(JarTester._gen_script_path): print(f"ERROR: Generator script not found: {JarTester._gen_script_path}", file=sys.stderr); return
             if not os.path.exists(JarTester._checker_script_path): print(f"ERROR: Checker script not found: {JarTester._checker_script_path}", file=sys.stderr); return
             if not JarTester._find_jar_files(): print("ERROR: No JAR files found or accessible. Aborting.", file=sys.stderr); return
+            JarTester._reference_baseline = reference.load_baseline(JarTester._checker_script_path)
+            if JarTester._reference_baseline: print("INFO: Reference scheduler baseline enabled ('vs Ref' < 1.0 means better than the LOOK baseline).")
 
             if not JarTester._initialize_presets():
                 print("ERROR: Failed to initialize/parse presets after loading. Aborting.", file=sys.stderr)
@@ -1684,6 +1873,16 @@ class JarTester:
                 except Exception as e_log_summary:
                     print(f"ERROR: Failed to write final summary to log file {JarTester._log_file_path}: {e_log_summary}", file=sys.stderr)
 
+                # Export every round's raw rows next to the run log, for calc.py
+                if len(JarTester._leaderboard) > 0:
+                    export_path = os.path.splitext(JarTester._log_file_path)[0] + "_leaderboard.csv"
+                    try:
+                        with JarTester._history_lock:
+                            JarTester._leaderboard.export_csv(export_path)
+                        print(f"INFO: Per-round leaderboard data exported to {export_path}")
+                    except Exception as e_export:
+                        print(f"ERROR: Failed to export leaderboard data to {export_path}: {e_export}", file=sys.stderr)
+
             # --- Cleanup --- Optional TMP dir cleanup
             # try:
             #     if os.path.exists(TMP_DIR):
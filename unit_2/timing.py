@@ -0,0 +1,52 @@
+# timing.py
+# Detects runs whose timing cannot be trusted: the JAR prints its own [timestamp], the
+# harness records when each line actually arrived. If the two drift apart, or the
+# harness itself was starved (its 50ms monitor loop overslept), the run's TLE /
+# performance numbers say more about host load than about the JAR.
+import re
+
+TIMESTAMP_RE = re.compile(r'^\[\s*(\d+(?:\.\d+)?)\s*\]')
+DRIFT_THRESHOLD = 1.0       # seconds: arrival lag beyond the JVM start-up offset
+HOST_STALL_THRESHOLD = 1.0  # seconds: extra sleep of the harness monitor loop
+
+
+def analyze(lines, arrivals, start_time, host_stall=0.0):
+    """
+    lines / arrivals: stdout lines and their time.monotonic() arrival, start_time: monotonic
+    launch time, host_stall: worst oversleep of the monitor loop.
+    Returns {max_drift, max_stall, stall_at, host_stall, unreliable, reason}.
+
+    The offset between arrival (relative to launch) and the printed timestamp is JVM
+    start-up plus pipe latency; its minimum over the run is taken as the baseline, and
+    drift is how far any line lags behind that baseline. A stall is the largest single
+    jump in lag between consecutive lines (reported with the printed time it ended at),
+    i.e. where the drift was picked up.
+    """
+    samples = []
+    for line, arrival in zip(lines, arrivals):
+        match = TIMESTAMP_RE.match(line)
+        if match:
+            samples.append((float(match.group(1)), arrival - start_time))
+
+    max_drift = max_stall = 0.0
+    stall_at = None
+    if samples:
+        baseline = min(arrived - printed for printed, arrived in samples)
+        max_drift = max(arrived - printed - baseline for printed, arrived in samples)
+        for (prev_printed, prev_arrived), (printed, arrived) in zip(samples, samples[1:]):
+            stall = (arrived - prev_arrived) - (printed - prev_printed)
+            if stall > max_stall:
+                max_stall, stall_at = stall, printed
+
+    reasons = []
+    if max_drift > DRIFT_THRESHOLD:
+        reason = f"output lagged printed timestamps by {max_drift:.2f}s"
+        if stall_at is not None:
+            reason += f" (worst stall {max_stall:.2f}s before [{stall_at:.4f}])"
+        reasons.append(reason)
+    if host_stall > HOST_STALL_THRESHOLD:
+        reasons.append(f"harness starved for {host_stall:.2f}s")
+    return {
+        "max_drift": max_drift, "max_stall": max_stall, "stall_at": stall_at, "host_stall": host_stall,
+        "unreliable": bool(reasons), "reason": "; ".join(reasons),
+    }
@@ -5,10 +5,25 @@ import os
 import shutil
 import re
 import sys
+import json
+import time
+import select
+import struct
+import argparse
+import ctypes
+import ctypes.util
 import yaml # <-- 导入 PyYAML 库
 
 # --- 全局常量 ---
 CONFIG_FILE = "config.yml"
+INDEX_FILE_NAME = ".update_index.json" # 存放在 logs_dir 下: {文件名: {size, mtime, offset}}
+WATCH_POLL_INTERVAL = 0.5 # 秒, inotify 不可用时的轮询间隔
+# inotify 事件掩码 (见 <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0x00000800
 
 # --- 函数：加载配置 ---
 def load_config(config_path):
@@ -39,13 +54,115 @@ def load_config(config_path):
         print(f"错误：加载配置文件时发生意外错误: {e}")
         sys.exit(1)
 
-# --- 主逻辑 ---
-def process_logs(config):
+# --- 增量索引 ---
+def load_index(logs_dir):
+    """读取增量索引，损坏或不存在时返回空索引（等价于全量扫描）。"""
+    index_path = os.path.join(logs_dir, INDEX_FILE_NAME)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        return index if isinstance(index, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"警告：索引文件 {index_path} 无法读取 ({e})，将重新全量扫描。")
+        return {}
+
+def save_index(logs_dir, index):
+    index_path = os.path.join(logs_dir, INDEX_FILE_NAME)
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"警告：保存索引文件 {index_path} 失败: {e}")
+
+def _copy_input_to_waiting(input_data_path, hack_waiting_dir):
+    """复制输入文件到 waiting 目录并将后缀改为 .in，返回目标路径。"""
+    base_name = os.path.basename(input_data_path)
+    name_without_ext, _ = os.path.splitext(base_name)
+    dest_path = os.path.join(hack_waiting_dir, name_without_ext + ".in")
+    shutil.copy2(input_data_path, dest_path)
+    return dest_path
+
+def process_log_file(log_file_path, index, path_extract_pattern, hack_waiting_dir, stats):
     """
-    处理 logs 目录下的 error 日志文件。
-    使用从 config 字典中获取的配置。
+    从索引记录的偏移处读取日志新增的完整行，找到目标行后复制输入并删除日志。
+    index 按文件名原地更新，stats 为 processed/deleted/error 计数。
     """
-    # --- 从配置中获取参数 ---
+    filename = os.path.basename(log_file_path)
+    try:
+        st = os.stat(log_file_path)
+    except FileNotFoundError:
+        index.pop(filename, None)
+        return
+    entry = index.get(filename)
+    if entry and entry.get('size') == st.st_size and entry.get('mtime') == st.st_mtime:
+        return # 自上次处理后未变化
+    offset = entry.get('offset', 0) if entry else 0
+    if offset > st.st_size:
+        offset = 0 # 文件被截断或替换，从头读
+
+    print(f"\n正在处理日志文件: {log_file_path} (从偏移 {offset} 开始)")
+    input_data_path = None
+    try:
+        with open(log_file_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        print(f"  错误：尝试读取时日志文件 {log_file_path} 消失了？")
+        index.pop(filename, None)
+        stats['error'] += 1
+        return
+    except Exception as e:
+        print(f"  错误：读取日志文件 {log_file_path} 时发生错误: {e}")
+        stats['error'] += 1
+        return
+
+    # 只处理完整的行，未写完的最后一行留到下次
+    complete_len = chunk.rfind(b"\n") + 1
+    for line in chunk[:complete_len].decode('utf-8', errors='ignore').splitlines():
+        match = path_extract_pattern.match(line)
+        if match:
+            input_data_path = match.group(1).strip()
+            print(f"  找到目标行，提取路径: {input_data_path}")
+            break
+
+    if input_data_path is None:
+        index[filename] = {'size': st.st_size, 'mtime': st.st_mtime, 'offset': offset + complete_len}
+        print(f"  暂未在日志文件 {log_file_path} 中找到目标行。该日志文件不会被删除。")
+        return
+
+    if not os.path.isfile(input_data_path):
+        print(f"  警告：日志文件中指定的输入文件不存在: '{input_data_path}'。跳过复制和删除日志。")
+        index[filename] = {'size': st.st_size, 'mtime': st.st_mtime, 'offset': offset + complete_len}
+        stats['error'] += 1
+        return
+
+    try:
+        dest_path = _copy_input_to_waiting(input_data_path, hack_waiting_dir)
+        print(f"  成功复制文件 '{input_data_path}' 到 '{dest_path}'")
+        stats['processed'] += 1
+    except Exception as e:
+        print(f"  错误：处理文件 {input_data_path} (来自 {log_file_path}) 时发生错误: {e}")
+        stats['error'] += 1
+        return
+
+    # 删除原始的 log 文件
+    try:
+        os.remove(log_file_path)
+        index.pop(filename, None)
+        print(f"  成功删除日志文件: {log_file_path}")
+        stats['deleted'] += 1
+    except OSError as e:
+        index[filename] = {'size': st.st_size, 'mtime': st.st_mtime, 'offset': offset + complete_len}
+        print(f"  警告：复制成功，但删除日志文件 {log_file_path} 失败: {e}")
+        stats['error'] += 1
+
+# --- 主逻辑 ---
+def _prepare(config):
+    """从配置中获取参数并构建正则，返回 (logs_dir, hack_waiting_dir, log_prefix, log_suffix, pattern)。"""
     logs_dir = config['logs_dir']
     hack_waiting_dir = config['hacker']['waiting_dir']
     log_prefix = config['update']['log_prefix']
@@ -65,6 +182,14 @@ def process_logs(config):
     print(f"目标目录: {hack_waiting_dir}")
     print(f"日志文件筛选: {log_prefix}*{log_suffix}")
     print(f"查找行前缀: '{target_line_prefix}'")
+    return logs_dir, hack_waiting_dir, log_prefix, log_suffix, path_extract_pattern
+
+def process_logs(config):
+    """
+    增量处理 logs 目录下的 error 日志文件：只读取新文件和已有文件追加的字节。
+    使用从 config 字典中获取的配置。
+    """
+    logs_dir, hack_waiting_dir, log_prefix, log_suffix, path_extract_pattern = _prepare(config)
 
     # 1. 确保目标目录存在
     try:
@@ -74,91 +199,118 @@ def process_logs(config):
         print(f"错误：无法创建目标目录 {hack_waiting_dir}: {e}")
         return # 如果无法创建目录，则无法继续
 
-    processed_count = 0
-    deleted_count = 0
-    error_count = 0
-
     # 2. 遍历 logs 目录
     if not os.path.isdir(logs_dir):
         print(f"错误：日志目录 '{logs_dir}' (来自配置) 不存在或不是一个目录。")
         return
 
+    index = load_index(logs_dir)
+    stats = {'processed': 0, 'deleted': 0, 'error': 0}
+    present = set()
     for filename in os.listdir(logs_dir):
         # 3. 检查文件名是否符合前缀和后缀
         if filename.startswith(log_prefix) and filename.endswith(log_suffix):
+            present.add(filename)
             log_file_path = os.path.join(logs_dir, filename)
+            if os.path.isfile(log_file_path):
+                process_log_file(log_file_path, index, path_extract_pattern, hack_waiting_dir, stats)
+    # 清理已被外部删除的日志记录
+    for filename in list(index):
+        if filename not in present:
+            del index[filename]
+    save_index(logs_dir, index)
 
-            if not os.path.isfile(log_file_path):
-                continue
+    print(f"\n--- 处理完成 ---")
+    print(f"成功复制并重命名文件数: {stats['processed']}")
+    print(f"成功删除日志文件数: {stats['deleted']}")
+    print(f"处理过程中遇到警告/错误数: {stats['error']}")
 
-            print(f"\n正在处理日志文件: {log_file_path}")
-            input_data_path = None
-            found_line = False
-
-            # 4. 打开并逐行读取日志文件
-            try:
-                with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f: # 添加 errors='ignore' 以防编码问题
-                    for line_num, line in enumerate(f, 1):
-                        match = path_extract_pattern.match(line)
-                        if match:
-                            # 5. 提取文件路径
-                            input_data_path = match.group(1).strip()
-                            print(f"  在第 {line_num} 行找到目标行，提取路径: {input_data_path}")
-                            found_line = True
-                            break
-            except FileNotFoundError:
-                print(f"  错误：尝试读取时日志文件 {log_file_path} 消失了？")
-                error_count += 1
-                continue
-            except Exception as e:
-                print(f"  错误：读取日志文件 {log_file_path} 时发生错误: {e}")
-                error_count += 1
-                continue
+def _open_inotify(logs_dir):
+    """返回 (libc, fd)；非 Linux 或调用失败时返回 None，调用方退回轮询。"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK)
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(logs_dir), mask) < 0:
+            os.close(fd)
+            return None
+        return libc, fd
+    except (OSError, AttributeError):
+        return None
 
-            # 6. 如果找到了路径，则处理文件
-            if found_line and input_data_path:
-                # 7. 检查提取到的输入文件是否存在
-                if os.path.isfile(input_data_path):
-                    try:
-                        # 8. 构建目标文件路径并修改后缀
-                        base_name = os.path.basename(input_data_path)
-                        name_without_ext, _ = os.path.splitext(base_name)
-                        dest_filename = name_without_ext + ".in"
-                        dest_path = os.path.join(hack_waiting_dir, dest_filename)
-
-                        # 9. 复制文件
-                        shutil.copy2(input_data_path, dest_path)
-                        print(f"  成功复制文件 '{input_data_path}' 到 '{dest_path}'")
-                        processed_count += 1
-
-                        # 10. 删除原始的 log 文件
-                        try:
-                            os.remove(log_file_path)
-                            print(f"  成功删除日志文件: {log_file_path}")
-                            deleted_count += 1
-                        except OSError as e:
-                            print(f"  警告：复制成功，但删除日志文件 {log_file_path} 失败: {e}")
-                            error_count += 1
-
-                    except Exception as e:
-                        print(f"  错误：处理文件 {input_data_path} (来自 {log_file_path}) 时发生错误: {e}")
-                        error_count += 1
-                else:
-                    print(f"  警告：日志文件中指定的输入文件不存在: '{input_data_path}'。跳过复制和删除日志。")
-                    error_count += 1
-            elif found_line and not input_data_path:
-                 print(f"  警告：在日志 {log_file_path} 中找到了匹配行，但未能提取有效路径。")
-                 error_count += 1
-            else:
-                print(f"  未在日志文件 {log_file_path} 中找到以 '{target_line_prefix}' 开头的行。该日志文件不会被删除。")
+def _read_inotify_names(fd):
+    """读取一批 inotify 事件，返回涉及的文件名集合。"""
+    names = set()
+    try:
+        buf = os.read(fd, 64 * 1024)
+    except BlockingIOError:
+        return names
+    pos = 0
+    while pos + 16 <= len(buf):
+        _, _, _, name_len = struct.unpack_from("iIII", buf, pos)
+        name = buf[pos + 16:pos + 16 + name_len].split(b"\0", 1)[0]
+        if name:
+            names.add(os.fsdecode(name))
+        pos += 16 + name_len
+    return names
 
-    print(f"\n--- 处理完成 ---")
-    print(f"成功复制并重命名文件数: {processed_count}")
-    print(f"成功删除日志文件数: {deleted_count}")
-    print(f"处理过程中遇到警告/错误数: {error_count}")
+def watch_logs(config):
+    """
+    先做一次增量处理，然后监听 logs_dir：新日志行写入后一秒内把失败输入复制到 waiting 目录。
+    Linux 下使用 inotify，其他平台退回 WATCH_POLL_INTERVAL 轮询。
+    """
+    process_logs(config)
+    logs_dir, hack_waiting_dir, log_prefix, log_suffix, path_extract_pattern = _prepare(config)
+    index = load_index(logs_dir)
+    stats = {'processed': 0, 'deleted': 0, 'error': 0}
+    inotify = _open_inotify(logs_dir)
+    print(f"\n进入监听模式 ({'inotify' if inotify else f'轮询 {WATCH_POLL_INTERVAL}s'})，按 Ctrl+C 退出。")
+
+    def matches(name):
+        return name.startswith(log_prefix) and name.endswith(log_suffix)
+
+    try:
+        while True:
+            if inotify:
+                ready, _, _ = select.select([inotify[1]], [], [], 1.0)
+                if not ready:
+                    continue
+                names = {n for n in _read_inotify_names(inotify[1]) if matches(n)}
+            else:
+                time.sleep(WATCH_POLL_INTERVAL)
+                try:
+                    names = {n for n in os.listdir(logs_dir) if matches(n)}
+                except FileNotFoundError:
+                    continue
+            if not names:
+                continue
+            for name in sorted(names):
+                log_file_path = os.path.join(logs_dir, name)
+                if os.path.isfile(log_file_path):
+                    process_log_file(log_file_path, index, path_extract_pattern, hack_waiting_dir, stats)
+            save_index(logs_dir, index)
+    except KeyboardInterrupt:
+        print(f"\n--- 监听结束 ---")
+        print(f"成功复制并重命名文件数: {stats['processed']}")
+        print(f"成功删除日志文件数: {stats['deleted']}")
+        print(f"处理过程中遇到警告/错误数: {stats['error']}")
+    finally:
+        if inotify:
+            os.close(inotify[1])
+        save_index(logs_dir, index)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="将错误日志中记录的输入数据复制到 hack waiting 目录")
+    parser.add_argument("--watch", action="store_true", help="处理完现有日志后持续监听 logs 目录 (Linux 下使用 inotify)")
+    args = parser.parse_args()
     # 加载配置
     config = load_config(CONFIG_FILE)
     # 运行主逻辑，传入配置
-    process_logs(config)
\ No newline at end of file
+    if args.watch:
+        watch_logs(config)
+    else:
+        process_logs(config)
@@ -0,0 +1,214 @@
+# artifact_store.py
+# Compressed, content-addressed storage for JAR stdout/stderr artefacts.
+# Blobs are written as independently compressed frames (zstd when the `zstandard`
+# package is installed, gzip otherwise) plus a small frame index, so a single line
+# can be read back without decompressing the whole output. The concatenated frames
+# are still a valid .zst / .gz stream, `zstdcat` / `zcat` work on them directly.
+import bisect
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FRAME_MAX_LINES = 2048        # A frame is closed after this many lines ...
+FRAME_MAX_BYTES = 256 * 1024  # ... or this many uncompressed bytes, whichever comes first
+INDEX_SUFFIX = ".idx"
+DEFAULT_MAX_MB = 1024
+EVICT_TARGET_RATIO = 0.9 # Evict down to 90% of the limit so we don't rescan on every put
+
+
+class ArtifactStore:
+    """
+    On-disk layout: <root>/<sha256[:2]>/<sha256>.<zst|gz> plus <blob>.idx holding
+    {codec, sha256, size, lines, frames: [[offset, compressed_len, first_line, line_count], ...]}.
+    Identical contents map to the same blob; a put of known content only bumps its mtime,
+    which is also what LRU eviction (above max_bytes) goes by.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, codec=None):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.codec = codec or ("zst" if zstandard is not None else "gz")
+        if self.codec == "zst" and zstandard is None:
+            raise ValueError("zstd codec requested but the 'zstandard' package is not installed")
+
+    # --- Codec helpers ---
+    @staticmethod
+    def _compress(codec, data):
+        if codec == "zst":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        return gzip.compress(data, compresslevel=6, mtime=0)
+
+    @staticmethod
+    def _decompress(codec, data):
+        if codec == "zst":
+            if zstandard is None:
+                raise ValueError("reading a .zst artefact requires the 'zstandard' package")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    @staticmethod
+    def _frames(data):
+        """Splits data into (first_line, line_count, bytes) frames on line boundaries."""
+        frame, frame_bytes, first_line, line_no = [], 0, 0, 0
+        for line in io.BytesIO(data):
+            frame.append(line)
+            frame_bytes += len(line)
+            line_no += 1
+            if len(frame) >= FRAME_MAX_LINES or frame_bytes >= FRAME_MAX_BYTES:
+                yield first_line, len(frame), b"".join(frame)
+                frame, frame_bytes, first_line = [], 0, line_no
+        if frame or line_no == 0:
+            yield first_line, len(frame), b"".join(frame)
+
+    # --- Write path ---
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.{self.codec}")
+
+    def put(self, content):
+        """Stores text (or bytes) and returns the blob path. Identical content is stored once."""
+        data = content.encode("utf-8", errors="replace") if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if os.path.exists(path + INDEX_SUFFIX):
+            try:
+                os.utime(path) # LRU bookkeeping
+            except OSError:
+                pass
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frames, offset, lines = [], 0, 0
+        # Write-then-rename so concurrent rounds never observe half-written blobs
+        suffix = f".tmp{os.getpid()}_{id(data)}"
+        with open(path + suffix, "wb") as f:
+            for first_line, line_count, chunk in ArtifactStore._frames(data):
+                compressed = ArtifactStore._compress(self.codec, chunk)
+                f.write(compressed)
+                frames.append([offset, len(compressed), first_line, line_count])
+                offset += len(compressed)
+                lines += line_count
+        index = {"codec": self.codec, "sha256": digest, "size": len(data), "lines": lines, "frames": frames}
+        with open(path + INDEX_SUFFIX + suffix, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(path + suffix, path)
+        os.replace(path + INDEX_SUFFIX + suffix, path + INDEX_SUFFIX)
+        self.evict()
+        return path
+
+    def put_file(self, file_path, remove=False):
+        """Moves/copies an existing plain-text file into the store, returns the blob path."""
+        with open(file_path, "rb") as f:
+            blob = self.put(f.read())
+        if remove:
+            os.remove(file_path)
+        return blob
+
+    def evict(self):
+        """Removes least recently used blobs while the store exceeds max_bytes."""
+        entries = []
+        total = 0
+        try:
+            shard_dirs = [d.path for d in os.scandir(self.root) if d.is_dir()]
+        except OSError:
+            return
+        for shard in shard_dirs:
+            try:
+                for entry in os.scandir(shard):
+                    if entry.name.endswith(INDEX_SUFFIX) or ".tmp" in entry.name:
+                        continue
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+            except OSError:
+                continue
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            for p in (path, path + INDEX_SUFFIX):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass # Another process may have evicted it already
+            total -= size
+
+
+# --- Read path (works on any blob path, no store instance needed) ---
+def is_artifact(path):
+    return bool(path) and os.path.exists(path + INDEX_SUFFIX)
+
+
+def load_index(blob_path):
+    with open(blob_path + INDEX_SUFFIX, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_frame(blob_path, index, frame):
+    offset, length = frame[0], frame[1]
+    with open(blob_path, "rb") as f:
+        f.seek(offset)
+        return ArtifactStore._decompress(index["codec"], f.read(length))
+
+
+def read_lines(blob_path, start, count):
+    """Lines [start, start + count) (1-based, newlines kept), decompressing only the frames involved."""
+    index = load_index(blob_path)
+    frames = index["frames"]
+    first_lines = [fr[2] for fr in frames]
+    wanted_from = max(start - 1, 0)
+    wanted_to = min(wanted_from + count, index["lines"])
+    result = []
+    i = max(bisect.bisect_right(first_lines, wanted_from) - 1, 0)
+    while i < len(frames) and frames[i][2] < wanted_to:
+        frame_lines = io.BytesIO(_read_frame(blob_path, index, frames[i])).readlines()
+        lo = max(wanted_from - frames[i][2], 0)
+        hi = wanted_to - frames[i][2]
+        result.extend(line.decode("utf-8", errors="replace") for line in frame_lines[lo:hi])
+        i += 1
+    return result
+
+
+def read_line(blob_path, line_no):
+    """Line line_no (1-based) without its newline, or None if out of range."""
+    lines = read_lines(blob_path, line_no, 1)
+    return lines[0].rstrip("\n") if lines else None
+
+
+def tail(blob_path, count):
+    """Last `count` lines, typically a single frame decompressed."""
+    total = load_index(blob_path)["lines"]
+    return read_lines(blob_path, max(total - count + 1, 1), count)
+
+
+def read_text(blob_path):
+    index = load_index(blob_path)
+    return b"".join(_read_frame(blob_path, index, fr) for fr in index["frames"]).decode("utf-8", errors="replace")
+
+
+if __name__ == "__main__":
+    # python artifact_store.py cat <blob> | line <blob> <N> | tail <blob> [N]
+    if len(sys.argv) < 3 or sys.argv[1] not in ("cat", "line", "tail"):
+        print("Usage: python artifact_store.py cat <blob> | line <blob> <N> | tail <blob> [N]", file=sys.stderr)
+        sys.exit(1)
+    command, blob = sys.argv[1], sys.argv[2]
+    if command == "cat":
+        sys.stdout.write(read_text(blob))
+    elif command == "line":
+        line = read_line(blob, int(sys.argv[3]))
+        if line is None:
+            print(f"ERROR: line {sys.argv[3]} is out of range ({load_index(blob)['lines']} lines)", file=sys.stderr)
+            sys.exit(1)
+        print(line)
+    else:
+        sys.stdout.write("".join(tail(blob, int(sys.argv[3]) if len(sys.argv) > 3 else 20)))
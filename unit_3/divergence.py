@@ -0,0 +1,91 @@
+# divergence.py
+# Online check of a social-network JAR's stdout against the golden output. The stdout
+# reader feeds every line as it arrives; once a line can no longer match (or output runs
+# past the last expected line) the harness kills the JAR instead of waiting for it to
+# finish or hit TLE, and the verdict is the same one the checker would have given.
+import threading
+import time
+
+
+class DivergenceWatch:
+    """
+    feed() is called from the reader thread and may start before the golden exists
+    (the round's simulation runs alongside the JARs); lines are then buffered and
+    checked as soon as set_golden() is called. mismatch holds the first divergence:
+    {line, command_number, command, expected, actual, at}, line 1-based over non-empty
+    output lines, at in seconds since start_time.
+    """
+
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.mismatch = None
+        self.lines_seen = 0
+        self.first_at = None # Arrival of the first output line, JVM start-up excluded from the rate below
+        self._expected = None # [(command_number, command, expected line as compared)]
+        self._normalize = None
+        self._extra_is_error = False
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._expected is not None
+
+    def set_golden(self, golden, normalize, load_commands):
+        """normalize / load_commands: the checker's _normalize_output and LOAD_COMMANDS."""
+        expected = []
+        for command_num, cmd_line, line, error in golden["records"]:
+            if error is not None:
+                break # The checker rejects here for its own reason, nothing to compare from this point
+            cmd = cmd_line.split()[0]
+            expected.append((command_num, cmd_line, line if cmd in load_commands else normalize(cmd, line)))
+        with self._lock:
+            self._normalize = lambda cmd, line: line if cmd in load_commands else normalize(cmd, line)
+            self._extra_is_error = len(expected) == len(golden["records"])
+            self._expected = expected
+            pending, self._pending = self._pending, []
+            for line, arrival in pending:
+                self._check(line, arrival)
+
+    def feed(self, line):
+        line = line.strip()
+        if not line:
+            return # The checker skips blank lines as well
+        now = time.monotonic()
+        with self._lock:
+            if self.first_at is None:
+                self.first_at = now - self.start_time
+            if self.mismatch is not None:
+                return
+            if self._expected is None:
+                self._pending.append((line, now))
+            else:
+                self._check(line, now)
+
+    def _check(self, line, arrival):
+        if self.mismatch is not None:
+            return
+        index = self.lines_seen
+        self.lines_seen += 1
+        if index >= len(self._expected):
+            if self._extra_is_error:
+                self.mismatch = {"line": index + 1, "command_number": None, "command": None,
+                                 "expected": None, "actual": line, "at": arrival - self.start_time}
+            return
+        command_num, cmd_line, expected = self._expected[index]
+        actual = self._normalize(cmd_line.split()[0], line)
+        if actual != expected:
+            self.mismatch = {"line": index + 1, "command_number": command_num, "command": cmd_line,
+                             "expected": expected, "actual": actual, "at": arrival - self.start_time}
+
+    def time_saved(self, elapsed, wall_limit):
+        """
+        Rough wall time the kill saved: the remaining expected lines are projected at the
+        rate the JAR printed so far, and the run would have been stopped at wall_limit anyway.
+        """
+        if self.mismatch is None or not self._expected:
+            return 0.0
+        done = min(self.mismatch["line"], len(self._expected))
+        rate = (self.mismatch["at"] - self.first_at) / (done - 1) if done > 1 else 0.0
+        projected = self.mismatch["at"] + rate * (len(self._expected) - done)
+        return max(0.0, min(projected, wall_limit) - elapsed)
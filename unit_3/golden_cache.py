@@ -0,0 +1,211 @@
+# golden_cache.py
+# Expected outputs of the social-network checkers, computed once per input instead of
+# once per JAR. checker.py --golden simulates an input (in a subprocess, so parallel
+# rounds don't share one GIL) and writes {commands, records, exceptions}; every JAR's
+# output is then diffed against it in-process with the checker's own compare_output().
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+
+MEMORY_ENTRIES = 32     # Goldens kept in memory; a round only needs its own one
+SIMULATE_TIMEOUT = 45.0 # seconds, same budget as one checker run
+DEFAULT_MAX_MB = 256    # Goldens kept on disk; rounds mostly use fresh inputs, so old ones are rarely hit again
+EVICT_TARGET_RATIO = 0.9 # Evict down to 90% of the limit so we don't rescan on every simulation
+
+
+def load_checker(checker_path):
+    """Imports checker.py as a module, None if it does not support golden outputs."""
+    try:
+        spec = importlib.util.spec_from_file_location("golden_checker", checker_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except Exception as e:
+        print(f"WARNING: Could not import checker {checker_path} for golden outputs: {e}", file=sys.stderr)
+        return None
+    if not all(hasattr(module, name) for name in ("compare_output", "GOLDEN_VERSION")):
+        return None
+    return module
+
+
+class GoldenCache:
+    """
+    Keyed by sha256(checker source + input). Layers: a small in-memory LRU, then
+    <cache_dir>/<key>.json on disk (survives reruns of the same inputs; a hit refreshes
+    the file's mtime, and the least recently used files are evicted above max_bytes),
+    then a simulation. A per-key lock makes JARs finishing together wait for one
+    simulation rather than starting their own.
+    """
+
+    def __init__(self, checker_path, cache_dir, memory_entries=MEMORY_ENTRIES, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.checker_path = os.path.abspath(checker_path)
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.checker = load_checker(self.checker_path)
+        self._checker_digest = ""
+        if self.checker is not None:
+            with open(self.checker_path, "rb") as f:
+                self._checker_digest = hashlib.sha256(f.read()).hexdigest()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._input_keys = {} # (abs path, size, mtime_ns) -> key, inputs are re-keyed by every JAR of a round
+        self.simulations = 0
+        self.hits = 0
+
+    @property
+    def available(self):
+        return self.checker is not None
+
+    def _key(self, input_path):
+        st = os.stat(input_path)
+        memo_key = (os.path.abspath(input_path), st.st_size, st.st_mtime_ns)
+        key = self._input_keys.get(memo_key)
+        if key is None:
+            h = hashlib.sha256(self._checker_digest.encode())
+            with open(input_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            key = h.hexdigest()
+            with self._lock:
+                self._input_keys[memo_key] = key
+                if len(self._input_keys) > 4 * self.memory_entries:
+                    self._input_keys.pop(next(iter(self._input_keys)))
+        return key
+
+    def _remember(self, key, golden):
+        with self._lock:
+            self._memory[key] = golden
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load_disk(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                golden = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return golden if golden.get("version") == self.checker.GOLDEN_VERSION else None
+
+    def get(self, input_path):
+        """The golden for input_path, simulating it if needed; None if it can't be produced."""
+        if not self.available:
+            return None
+        key = self._key(input_path)
+        with self._lock:
+            golden = self._memory.get(key)
+            if golden is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return golden
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                golden = self._memory.get(key) # Simulated by whoever held key_lock before us
+            if golden is not None:
+                with self._lock:
+                    self.hits += 1
+                return golden
+
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            golden = self._load_disk(path)
+            if golden is None:
+                golden = self._simulate(input_path, path)
+            else:
+                try:
+                    os.utime(path) # LRU bookkeeping
+                except OSError:
+                    pass
+                with self._lock:
+                    self.hits += 1
+            if golden is not None:
+                self._remember(key, golden)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return golden
+
+    def _simulate(self, input_path, path):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+        try:
+            completed = subprocess.run(
+                [sys.executable, self.checker_path, "--golden", input_path, tmp_path],
+                capture_output=True, text=True, encoding="utf-8", errors="replace", timeout=SIMULATE_TIMEOUT
+            )
+            if completed.returncode != 0:
+                print(f"WARNING: Golden simulation failed for {input_path}: {completed.stderr.strip()[-300:]}", file=sys.stderr)
+                return None
+            os.replace(tmp_path, path)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            print(f"WARNING: Golden simulation failed for {input_path}: {e}", file=sys.stderr)
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                try: os.remove(tmp_path)
+                except OSError: pass
+        with self._lock:
+            self.simulations += 1
+        golden = self._load_disk(path)
+        self.evict()
+        return golden
+
+    def evict(self):
+        """Removes least recently used goldens while the cache directory exceeds max_bytes."""
+        entries = []
+        total = 0
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(".json"):
+                    continue # Skips the .tmp files of simulations still running
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        except OSError:
+            return
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass # Another process may have evicted it already
+            total -= size
+
+    def peek(self, input_path):
+        """The golden for input_path if it is already in memory; never waits for a simulation."""
+        if not self.available:
+            return None
+        try:
+            key = self._key(input_path)
+        except OSError:
+            return None
+        with self._lock:
+            return self._memory.get(key)
+
+    def watch(self, golden, watcher):
+        """Hands golden to a divergence.DivergenceWatch with this checker's comparison rules."""
+        watcher.set_golden(golden, self.checker._normalize_output, self.checker.LOAD_COMMANDS)
+
+    def prefetch(self, input_path):
+        """Starts simulating input_path in the background, so the golden is ready when the JARs finish."""
+        if self.available:
+            threading.Thread(target=self.get, args=(input_path,), name="GoldenPrefetch", daemon=True).start()
+
+    def compare(self, golden, stdout_content):
+        """The checker's {"result", "errors"} dict for one JAR output."""
+        return self.checker.compare_output(golden, io.StringIO(stdout_content))
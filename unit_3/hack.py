@@ -11,8 +11,12 @@ import playwright.sync_api
 import json
 import yaml
 import concurrent.futures
+import importlib
 from datetime import datetime, timedelta
 
+current_package = __name__.rsplit('.', 1)[0] if '.' in __name__ else ''
+std_cache = importlib.import_module(f"{current_package}.std_cache" if current_package else "std_cache")
+
 PASSED = []
 REJECTED = []
 THISSTDIN = None
@@ -25,16 +29,7 @@ GEN_PRESET_COMMANDS = [
 def run_std_jar(std_jar_path, stdin_path, timeout_seconds=300):
     print(f"INFO: Running standard JAR '{os.path.basename(std_jar_path)}' with input '{os.path.basename(stdin_path)}'...")
     try:
-        with open(stdin_path, "r", encoding="utf-8") as stdin_file:
-            java_proc = subprocess.run(
-                ["java", "-jar", os.path.abspath(std_jar_path)],
-                stdin=stdin_file,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                check=False, 
-                timeout=timeout_seconds
-            )
+        java_proc = std_cache.get_cache().run(std_jar_path, stdin_path, timeout=timeout_seconds)
 
         if java_proc.returncode != 0:
             print(f"ERROR: Standard JAR process failed for input '{os.path.basename(stdin_path)}'. Return code: {java_proc.returncode}")
@@ -42,7 +37,8 @@ def run_std_jar(std_jar_path, stdin_path, timeout_seconds=300):
                 print(f"Java stderr:\n---\n{java_proc.stderr.strip()}\n---")
             return None 
 
-        print(f"INFO: Standard JAR ran successfully for '{os.path.basename(stdin_path)}'.")
+        source = "served from std cache" if java_proc.cached else f"ran successfully in {java_proc.run_time:.2f}s"
+        print(f"INFO: Standard JAR {source} for '{os.path.basename(stdin_path)}'.")
         return java_proc.stdout 
 
     except subprocess.TimeoutExpired:
@@ -484,16 +480,7 @@ def generate_single_pair(generator_path, std_jar_path, hack_waiting_dir, command
         
         try:
             
-            with open(temp_stdin_path, "r", encoding="utf-8") as stdin_file:
-                 java_proc = subprocess.run(
-                    ["java", "-jar", os.path.abspath(std_jar_path)],
-                    stdin=stdin_file,          
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    check=False,
-                    timeout=300 
-                )
+            java_proc = std_cache.get_cache().run(std_jar_path, temp_stdin_path, timeout=300)
 
             if java_proc.returncode != 0:
                 print(f"ERROR [Worker {index}]: Java STD_JAR process failed for {final_filename_base}. Return code: {java_proc.returncode}")
@@ -1079,6 +1066,11 @@ def main():
     num_generate = config['hacker']['num_generate']
 
     checker_path, generator_path, std_jar_path, hack_dir = calculate_paths(config)
+    std_cache.configure(
+        config['hacker'].get('std_cache_dir', os.path.join(hack_dir, "std_cache")),
+        config['hacker'].get('std_cache_max_mb', std_cache.DEFAULT_MAX_MB)
+    )
+    print(f"INFO: Using Std output cache: {std_cache.get_cache().cache_dir}")
 
     os.makedirs(hack_dir, exist_ok=True)
     os.makedirs(os.path.join(hack_dir, "waiting"), exist_ok=True) 
@@ -1,8 +1,15 @@
 # -*- coding: utf-8 -*-
 import sys
 import math
+import heapq
 from collections import deque, defaultdict # Added defaultdict
 import json
+import random
+import time
+try:
+    import numpy as np # Optional, only the bulk ln loader uses it
+except ImportError:
+    np = None
 
 # --- Helper Functions ---
 
@@ -24,21 +31,291 @@ def calculate_age_var(ages):
     variance = int(variance_sum_sq_diff // n) if n > 0 else 0
     return variance
 
+# --- Offline connectivity for qci ---
+# simulate() sees the whole command file, so qci does not have to BFS the current graph.
+# Every relation is alive over an interval of qci queries (from the ar that adds it to
+# the mr that removes it); the intervals go into a segment tree over the queries, and a
+# DFS of the tree with a rollback union-find answers each query at its leaf. That is
+# O((E + Q) log Q log N) for the whole run instead of O(N + E) per qci.
+
+class PendingAnswer:
+    """Placeholder for a qci answer, filled in by OfflineConnectivity.resolve()."""
+    __slots__ = ("text",)
+
+    def __init__(self):
+        self.text = None
+
+
+class OfflineConnectivity:
+    def __init__(self):
+        self._since = {}     # (low id, high id) -> index of the first query the relation is alive for
+        self._intervals = [] # (first query, end query, id1, id2) of removed relations
+        self._queries = []   # (id1, id2, PendingAnswer)
+
+    @staticmethod
+    def _key(id1, id2):
+        return (id1, id2) if id1 < id2 else (id2, id1)
+
+    def link(self, id1, id2):
+        self._since[self._key(id1, id2)] = len(self._queries)
+
+    def cut(self, id1, id2):
+        key = self._key(id1, id2)
+        start = self._since.pop(key)
+        if start < len(self._queries): # Relations added and removed between two queries are never seen
+            self._intervals.append((start, len(self._queries), key[0], key[1]))
+
+    def query(self, id1, id2):
+        answer = PendingAnswer()
+        self._queries.append((id1, id2, answer))
+        return answer
+
+    def resolve(self):
+        """Answers every query asked so far."""
+        count = len(self._queries)
+        if count == 0:
+            return
+        size = 1
+        while size < count:
+            size *= 2
+        nodes = [[] for _ in range(2 * size)]
+        intervals = self._intervals + [(start, count, a, b) for (a, b), start in self._since.items() if start < count]
+        for start, end, a, b in intervals:
+            lo = start + size
+            hi = (size if end == count else end) + size # Leaves past the last query are empty, alive-to-the-end relations can cover them
+            while lo < hi:
+                if lo & 1: nodes[lo].append((a, b)); lo += 1
+                if hi & 1: hi -= 1; nodes[hi].append((a, b))
+                lo //= 2; hi //= 2
+
+        parent = {} # Roots have no entry; no path compression so unions can be undone
+        weight = {}
+        history = []
+
+        def find(x):
+            p = parent.get(x)
+            while p is not None:
+                x = p; p = parent.get(x)
+            return x
+
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if node < 0: # Leaving -node: undo its unions
+                while len(history) > lo:
+                    child, root = history.pop()
+                    del parent[child]; weight[root] -= weight.get(child, 1)
+                continue
+            if lo >= count:
+                continue
+            stack.append((-node, len(history), 0))
+            for a, b in nodes[node]:
+                ra, rb = find(a), find(b)
+                if ra != rb:
+                    wa, wb = weight.get(ra, 1), weight.get(rb, 1)
+                    if wa < wb: ra, rb, wa, wb = rb, ra, wb, wa
+                    parent[rb] = ra; weight[ra] = wa + wb
+                    history.append((rb, ra))
+            if node >= size:
+                id1, id2, answer = self._queries[lo]
+                answer.text = "true" if find(id1) == find(id2) else "false"
+            else:
+                mid = (lo + hi) // 2
+                stack.append((2 * node + 1, mid, hi))
+                stack.append((2 * node, lo, mid))
+
+
+# --- Best acquaintance index for qba / qcs ---
+# Each person's best acquaintance (highest value, then lowest id) is kept up to date as
+# relations change, so qba is a lookup, and the number of couples (pairs that are each
+# other's best acquaintance) is adjusted only for the persons whose best one changed.
+# Adding or raising a relation is a comparison with the current best; only when the best
+# relation is lowered or removed is the person's lazy-deletion heap of (-value, id) needed.
+
+class AcquaintanceIndex:
+    def __init__(self):
+        self._best = {}  # person id -> best acquaintance id, persons without acquaintances left out
+        self._heaps = {} # person id -> [(-value, id)], built on first use; entries not matching the live value are stale
+        self.couples = 0
+
+    def best(self, person_id):
+        return self._best.get(person_id)
+
+    def changed(self, person, other_id):
+        """Call after person's relation with other_id was added, modified or removed."""
+        value = person.acquaintance.get(other_id)
+        heap = self._heaps.get(person.id)
+        if heap is not None and value is not None:
+            heapq.heappush(heap, (-value, other_id))
+            if len(heap) > 2 * len(person.acquaintance) + 16:
+                del self._heaps[person.id] # Mostly stale entries, rebuilt from the live relations when next needed
+        current = self._best.get(person.id)
+        if current == other_id:
+            self._set_best(person.id, self._pop_best(person))
+        elif value is not None and (current is None or (-value, other_id) < (-person.acquaintance[current], current)):
+            self._set_best(person.id, other_id)
+
+    def _pop_best(self, person):
+        heap = self._heaps.get(person.id)
+        if heap is None:
+            heap = self._heaps[person.id] = [(-value, acq_id) for acq_id, value in person.acquaintance.items()]
+            heapq.heapify(heap)
+        while heap and person.acquaintance.get(heap[0][1]) != -heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][1] if heap else None
+
+    def _set_best(self, person_id, best_id):
+        old_id = self._best.get(person_id)
+        if old_id == best_id:
+            return
+        if old_id is not None and self._best.get(old_id) == person_id:
+            self.couples -= 1
+        if best_id is None:
+            del self._best[person_id]
+        else:
+            self._best[person_id] = best_id
+            if self._best.get(best_id) == person_id:
+                self.couples += 1
+
+# --- Shortest paths for qsp ---
+# qsp runs a bidirectional BFS that always expands the smaller frontier by one whole level,
+# which on dense graphs meets in the middle after touching a fraction of the nodes a BFS
+# from id1 would. The exact distances each search found are kept per source until the
+# graph changes, so repeated qsp between two mutations are lookups.
+
+def bidirectional_distance(neighbors, source, target):
+    """
+    (shortest distance from source to target or None, {node: (distances from it, complete)})
+    for both endpoints. neighbors(node) iterates the adjacent nodes. Every recorded distance
+    is exact; complete means the map covers the node's whole component.
+    """
+    if source == target:
+        return 0, {}
+    dist_s, dist_t = {source: 0}, {target: 0}
+    front_s, front_t = [source], [target]
+    found = None
+    while front_s and front_t and found is None:
+        if len(front_s) <= len(front_t):
+            front, dist, other = front_s, dist_s, dist_t
+        else:
+            front, dist, other = front_t, dist_t, dist_s
+        next_front = []
+        for node in front: # The whole level, so the shortest of the meeting paths is found
+            d = dist[node] + 1
+            for neighbor in neighbors(node):
+                if neighbor in other:
+                    if found is None or d + other[neighbor] < found: found = d + other[neighbor]
+                elif neighbor not in dist:
+                    dist[neighbor] = d; next_front.append(neighbor)
+        if front is front_s: front_s = next_front
+        else: front_t = next_front
+    return found, {source: (dist_s, found is None and not front_s), target: (dist_t, found is None and not front_t)}
+
+
+def bfs_distance(neighbors, source, target):
+    """Shortest distance from source to target by a BFS from source, None if there is no path."""
+    queue = deque([(source, 0)]); visited = {source}
+    while queue:
+        current, distance = queue.popleft()
+        if current == target: return distance
+        for neighbor in neighbors(current):
+            if neighbor not in visited:
+                visited.add(neighbor); queue.append((neighbor, distance + 1))
+    return None
+
+
+class DistanceCache:
+    """Distances found by qsp searches, tagged with the graph epoch they were found in."""
+
+    def __init__(self):
+        self.epoch = 0 # Bumped by every change that can alter a distance
+        self._epoch = 0
+        self._by_source = {} # person id -> (distances from it, complete)
+
+    def bump(self):
+        self.epoch += 1
+
+    def lookup(self, id1, id2):
+        """(True, distance or None if there is no path) when known for the current epoch, (False, None) otherwise."""
+        if self._epoch != self.epoch:
+            self._by_source.clear(); self._epoch = self.epoch
+        for source, target in ((id1, id2), (id2, id1)):
+            entry = self._by_source.get(source)
+            if entry is not None:
+                if target in entry[0]: return True, entry[0][target]
+                if entry[1]: return True, None
+        return False, None
+
+    def store(self, searched):
+        for source, entry in searched.items():
+            known = self._by_source.get(source)
+            if known is None or entry[1] or len(entry[0]) > len(known[0]):
+                self._by_source[source] = entry
+
+
+# --- Bulk loading for ln ---
+# Every person of a load_network block is new, so the triples its relations add are exactly
+# the triangles of the block's adjacency matrix. The value rows are parsed with numpy and
+# the triangles counted with one matrix product instead of a common-neighbour intersection
+# per relation. Without numpy (or on a malformed block) ln goes through add_relation().
+
+def parse_load_values(rows, n):
+    """
+    n x n matrix whose row i holds the i values of relation line i - 1 (ids[i] against
+    ids[0..i-1]), None when numpy is missing or a line is not i plain integers; the
+    line-by-line loader then runs and reports the error.
+    """
+    if np is None or len(rows) != n - 1:
+        return None
+    values = np.zeros((n, n), dtype=np.int64)
+    limits = np.iinfo(np.int64)
+    for i, row in enumerate(rows, 1):
+        if len(row.split()) != i:
+            return None
+        try:
+            line = np.fromstring(row, dtype=np.int64, sep=" ")
+        except ValueError:
+            return None
+        if len(line) != i or line.max() == limits.max or line.min() == limits.min: # numpy saturates where int() would not
+            return None
+        values[i, :i] = line
+    return values
+
+
+def count_triangles(values):
+    """Triangles of the graph whose edges are the nonzero entries of values, sum((A @ A) * A) / 6."""
+    adjacency = (values != 0).astype(np.float64) # BLAS product, the counts are far below 2 ** 53
+    adjacency += adjacency.T
+    return int(((adjacency @ adjacency) * adjacency).sum()) // 6
+
 # --- Simulator Classes ---
 
 class TagSimulator:
     def __init__(self, tag_id):
         self.id = tag_id
         self.persons = set() # Set of person_ids
+        self.value_sum = 0 # Sum of query_value over ordered member pairs, kept up to date incrementally
+        self.age_sum = 0
+        self.age_sq_sum = 0
 
-    def add_person(self, person_id):
-        self.persons.add(person_id)
+    def add_person(self, person): # Takes PersonSimulator object
+        self.persons.add(person.id)
+        person.in_tags[id(self)] = self
+        self.age_sum += person.age
+        self.age_sq_sum += person.age * person.age
+        self.value_sum += 2 * self._link_value_sum(person)
 
     def has_person(self, person_id):
         return person_id in self.persons
 
-    def del_person(self, person_id):
-        self.persons.discard(person_id)
+    def del_person(self, person): # Takes PersonSimulator object
+        if person.id not in self.persons:
+            return
+        self.persons.discard(person.id)
+        person.in_tags.pop(id(self), None)
+        self.age_sum -= person.age
+        self.age_sq_sum -= person.age * person.age
+        self.value_sum -= 2 * self._link_value_sum(person)
 
     def get_size(self):
         return len(self.persons)
@@ -46,6 +323,23 @@ class TagSimulator:
     def get_person_ids(self):
         return list(self.persons)
 
+    def _link_value_sum(self, person):
+        # Values between person and the other members, walking whichever side is smaller
+        if len(person.acquaintance) < len(self.persons):
+            return sum(value for pid, value in person.acquaintance.items() if pid in self.persons)
+        return sum(person.acquaintance.get(pid, 0) for pid in self.persons if pid != person.id)
+
+    def get_value_sum(self):
+        return self.value_sum
+
+    def get_age_var(self):
+        # Same integer arithmetic as calculate_age_var: sum((age - mean)^2) = sq_sum - 2*mean*sum + n*mean^2
+        n = len(self.persons)
+        if n == 0:
+            return 0
+        mean = self.age_sum // n
+        return (self.age_sq_sum - 2 * mean * self.age_sum + n * mean * mean) // n
+
     def __eq__(self, other):
         if not isinstance(other, TagSimulator):
             return NotImplemented
@@ -61,6 +355,8 @@ class OfficialAccountSimulator:
         self.name = name
         # Using dict for followers: follower_id -> contribution_count
         self.followers = {}
+        # (-contribution, follower_id) heap for get_best_contributor; entries not matching followers are stale
+        self._ranking = []
         # Set of article_ids belonging to this account
         self.articles = set()
 
@@ -68,6 +364,7 @@ class OfficialAccountSimulator:
         # JML ensures !containsFollower before calling this
         if person_id not in self.followers:
              self.followers[person_id] = 0
+             self._rank(person_id)
 
     def contains_follower(self, person_id):
         return person_id in self.followers
@@ -77,6 +374,7 @@ class OfficialAccountSimulator:
         if person_id in self.followers: # This check ensures the person is a follower
             self.articles.add(article_id) # Add to this account's list of articles
             self.followers[person_id] = self.followers.get(person_id, 0) + 1 # Increment contribution
+            self._rank(person_id)
         else:
              print(f"CHECKER WARNING: OfficialAccountSimulator.add_article called for non-follower {person_id} on account {self.id}", file=sys.stderr)
 
@@ -91,6 +389,7 @@ class OfficialAccountSimulator:
         # Decrement contribution of the original_contributor_id IF they are still a follower
         if original_contributor_id in self.followers:
             self.followers[original_contributor_id] -= 1
+            self._rank(original_contributor_id)
             # JML doesn't explicitly state contribution can't go below 0, but -1 is the standard interpretation.
         else:
              # This case might occur if the original contributor unfollowed the account
@@ -101,23 +400,95 @@ class OfficialAccountSimulator:
              print(f"CHECKER WARNING: OfficialAccountSimulator.remove_article: Original contributor {original_contributor_id} not found in current followers of account {self.id} during contribution decrement.", file=sys.stderr)
 
 
+    def _rank(self, person_id):
+        heapq.heappush(self._ranking, (-self.followers[person_id], person_id))
+        if len(self._ranking) > 2 * len(self.followers) + 16:
+            self._ranking = [(-contribution, pid) for pid, contribution in self.followers.items()]
+            heapq.heapify(self._ranking)
+
     def get_best_contributor(self):
+        # Highest contribution, then lowest id; 0 without followers
+        ranking = self._ranking
+        while ranking and self.followers.get(ranking[0][1]) != -ranking[0][0]:
+            heapq.heappop(ranking)
+        return ranking[0][1] if ranking else 0
+
+    def scan_best_contributor(self):
+        # Reference for get_best_contributor (simulate(account_index=False)): every follower, O(followers)
         if not self.followers:
-             return 0 
-
-        max_contribution = -1 
-        for contribution in self.followers.values():
-            max_contribution = max(max_contribution, contribution)
-        
-        if max_contribution == -1: # No followers or all contributions somehow negative (should not happen)
             return 0
+        max_contribution = max(self.followers.values())
+        return min(pid for pid, contribution in self.followers.items() if contribution == max_contribution)
 
-        best_id = float('inf')
-        for person_id, contribution in self.followers.items():
-            if contribution == max_contribution:
-                best_id = min(best_id, person_id)
-        
-        return best_id if best_id != float('inf') else 0
+
+class ReceivedArticles:
+    """
+    Newest-first article ids received by one person. A doubly linked list of [prev, next, id]
+    nodes plus id -> nodes (forwarded articles can arrive twice), so deleting an article
+    unlinks its copies in O(1) each instead of rebuilding the list, and qra reads the head.
+    """
+
+    def __init__(self):
+        self._head = None
+        self._nodes = {}
+        self._size = 0
+
+    def push_front(self, article_id):
+        node = [None, self._head, article_id]
+        if self._head is not None: self._head[0] = node
+        self._head = node
+        self._nodes.setdefault(article_id, []).append(node)
+        self._size += 1
+
+    def remove_all(self, article_id):
+        for node in self._nodes.pop(article_id, ()):
+            prev, nxt, _ = node
+            if prev is None: self._head = nxt
+            else: prev[1] = nxt
+            if nxt is not None: nxt[0] = prev
+            self._size -= 1
+
+    def first(self, count):
+        result, node = [], self._head
+        while node is not None and len(result) < count:
+            result.append(node[2]); node = node[1]
+        return result
+
+    def __contains__(self, article_id):
+        return article_id in self._nodes
+
+    def __iter__(self):
+        node = self._head
+        while node is not None:
+            yield node[2]; node = node[1]
+
+    def __len__(self):
+        return self._size
+
+
+class ReceivedArticleDeque:
+    """Reference for ReceivedArticles (simulate(account_index=False)): a newest-first deque rebuilt on every delete."""
+
+    def __init__(self):
+        self._articles = deque()
+
+    def push_front(self, article_id):
+        self._articles.appendleft(article_id)
+
+    def remove_all(self, article_id):
+        self._articles = deque(a_id for a_id in self._articles if a_id != article_id)
+
+    def first(self, count):
+        return [self._articles[i] for i in range(min(len(self._articles), count))]
+
+    def __contains__(self, article_id):
+        return article_id in self._articles
+
+    def __iter__(self):
+        return iter(self._articles)
+
+    def __len__(self):
+        return len(self._articles)
 
 
 class PersonSimulator:
@@ -127,24 +498,23 @@ class PersonSimulator:
         self.age = age
         self.acquaintance = {} # maps acquaintance_id -> value
         self.tags = {} # maps tag_id -> TagSimulator object
-        self.received_articles = deque()
+        self.in_tags = {} # id(tag) -> TagSimulator object of every tag (of any owner) containing this person
+        self.received_articles = ReceivedArticles()
 
     def add_received_article(self, article_id):
-        self.received_articles.appendleft(article_id) 
+        self.received_articles.push_front(article_id)
 
     def remove_received_article(self, article_id):
-        try:
-             new_deque = deque(a_id for a_id in self.received_articles if a_id != article_id)
-             self.received_articles = new_deque
-        except ValueError:
-             pass 
+        self.received_articles.remove_all(article_id)
+
+    def has_received_article(self, article_id):
+        return article_id in self.received_articles
 
     def get_received_articles_list(self):
         return list(self.received_articles)
 
     def query_received_articles_list(self):
-         count = min(len(self.received_articles), 5)
-         return [self.received_articles[i] for i in range(count)]
+        return self.received_articles.first(5)
 
     def is_linked(self, other_person_id):
         return other_person_id == self.id or other_person_id in self.acquaintance
@@ -212,6 +582,11 @@ class NetworkSimulator:
         self.dapd_static_count = 0
         self.doapd_static_count = 0
         self.triple_sum_count = 0
+        self.connectivity = None # OfflineConnectivity when simulate() answers qci after the run; BFS otherwise
+        self.best_index = None   # AcquaintanceIndex when simulate() keeps qba/qcs answers up to date; scans otherwise
+        self.distances = None    # DistanceCache when qsp runs bidirectional searches and reuses them; BFS from id1 otherwise
+        self.tag_aggregates = True # qtvs / qtav from the tags' running sums; False rescans the members
+        self.account_index = True  # qbc from the accounts' contribution heaps, ReceivedArticles per person; False scans the followers and keeps deques
 
     def _record_exception(self, exc_type, id1, id2=None):
         if exc_type == "er": self.er_static_count += 1
@@ -276,7 +651,9 @@ class NetworkSimulator:
             return self._format_exception("epi", person_id)
         else:
             new_person = PersonSimulator(person_id, name, age)
+            if not self.account_index: new_person.received_articles = ReceivedArticleDeque()
             self.persons[person_id] = new_person
+            if self.distances is not None: self.distances.bump()
             return "Ok"
 
     def add_relation(self, id1, id2, value):
@@ -291,8 +668,37 @@ class NetworkSimulator:
                 common_neighbors = neighbors1.intersection(neighbors2)
                 self.triple_sum_count += len(common_neighbors)
             person1.add_link(id2, value); person2.add_link(id1, value) # JML implies add_link handles id1==id2 correctly (no effect on actual links)
+            if id1 != id2:
+                self._update_shared_tags(person1, person2, value)
+                if self.connectivity is not None: self.connectivity.link(id1, id2)
+                if self.distances is not None: self.distances.bump()
+                if self.best_index is not None: self.best_index.changed(person1, id2); self.best_index.changed(person2, id1)
             return "Ok"
 
+    def load_relations(self, ids, values):
+        """
+        add_relation(ids[i], ids[j], values[i][j]) for every nonzero entry, in row order, for
+        persons a load block has just added: none of them has relations or tags yet, so only
+        the triple count needs the whole matrix (count_triangles) instead of each relation.
+        """
+        self.triple_sum_count += count_triangles(values)
+        rows, cols = np.nonzero(values)
+        for i, j, value in zip(rows.tolist(), cols.tolist(), values[rows, cols].tolist()):
+            id1, id2 = ids[i], ids[j]
+            person1 = self.persons[id1]; person2 = self.persons[id2]
+            person1.add_link(id2, value); person2.add_link(id1, value)
+            if self.connectivity is not None: self.connectivity.link(id1, id2)
+            if self.best_index is not None: self.best_index.changed(person1, id2); self.best_index.changed(person2, id1)
+        if self.distances is not None: self.distances.bump()
+
+    def _update_shared_tags(self, person1, person2, delta):
+        # A relation's value is counted twice in the value sum of every tag holding both endpoints
+        if len(person1.in_tags) > len(person2.in_tags):
+            person1, person2 = person2, person1
+        for key, tag in person1.in_tags.items():
+            if key in person2.in_tags:
+                tag.value_sum += 2 * delta
+
     def modify_relation(self, id1, id2, value):
         if not self.contains_person(id1): self._record_exception("pinf", id1); return self._format_exception("pinf", id1)
         if not self.contains_person(id2): self._record_exception("pinf", id2); return self._format_exception("pinf", id2)
@@ -304,6 +710,8 @@ class NetworkSimulator:
             old_value = person1.query_value(id2); new_value = old_value + value
             if new_value > 0:
                 person1.add_link(id2, new_value); person2.add_link(id1, new_value)
+                self._update_shared_tags(person1, person2, value)
+                if self.best_index is not None: self.best_index.changed(person1, id2); self.best_index.changed(person2, id1)
             else: 
                 # Before removing link, update triple_sum_count
                 neighbors1 = person1.get_neighbor_ids(); neighbors2 = person2.get_neighbor_ids()
@@ -312,11 +720,15 @@ class NetworkSimulator:
                 common_neighbors = (neighbors1 - {id2}).intersection(neighbors2 - {id1}) # More precise calculation of common nodes for triples
                 self.triple_sum_count -= len(common_neighbors)
 
+                self._update_shared_tags(person1, person2, -old_value)
                 person1.remove_link(id2); person2.remove_link(id1)
+                if self.connectivity is not None: self.connectivity.cut(id1, id2)
+                if self.distances is not None: self.distances.bump()
+                if self.best_index is not None: self.best_index.changed(person1, id2); self.best_index.changed(person2, id1)
                 for tag in list(person1.tags.values()): 
-                    if tag.has_person(id2): tag.del_person(id2) # JML implies del if has
+                    if tag.has_person(id2): tag.del_person(person2) # JML implies del if has
                 for tag in list(person2.tags.values()):
-                    if tag.has_person(id1): tag.del_person(id1)
+                    if tag.has_person(id1): tag.del_person(person1)
             return "Ok"
 
     def query_value(self, id1, id2):
@@ -331,6 +743,7 @@ class NetworkSimulator:
          if not self.contains_person(id1): self._record_exception("pinf", id1); return self._format_exception("pinf", id1)
          if not self.contains_person(id2): self._record_exception("pinf", id2); return self._format_exception("pinf", id2)
          if id1 == id2: return "true" 
+         if self.connectivity is not None: return self.connectivity.query(id1, id2)
          
          queue = deque([id1]); visited = {id1}
          while queue:
@@ -369,7 +782,7 @@ class NetworkSimulator:
         if tag.has_person(person_id1): self._record_exception("epi", person_id1); return self._format_exception("epi", person_id1) # JML indicates epi if person already in tag
         
         if tag.get_size() < 1000: 
-             tag.add_person(person_id1)
+             tag.add_person(person1)
         return "Ok" # JML implies Ok even if not added due to size limit
 
     def query_tag_value_sum(self, person_id, tag_id):
@@ -378,16 +791,8 @@ class NetworkSimulator:
         if not person.contains_tag(tag_id): self._record_exception("tinf", tag_id); return self._format_exception("tinf", tag_id)
         
         tag = person.get_tag(tag_id)
-        person_ids_in_tag = tag.get_person_ids() 
-        value_sum = 0
-        for i in range(len(person_ids_in_tag)):
-            p1_id = person_ids_in_tag[i]
-            p1 = self.get_person(p1_id)
-            if not p1: continue 
-            for j in range(len(person_ids_in_tag)): 
-                p2_id = person_ids_in_tag[j]
-                value_sum += p1.query_value(p2_id) 
-        return str(value_sum)
+        if not self.tag_aggregates: return str(self._scan_tag_value_sum(tag))
+        return str(tag.get_value_sum()) # Maintained incrementally, see TagSimulator / _update_shared_tags
 
     def query_tag_age_var(self, person_id, tag_id):
         if not self.contains_person(person_id): self._record_exception("pinf", person_id); return self._format_exception("pinf", person_id)
@@ -395,13 +800,22 @@ class NetworkSimulator:
         if not person.contains_tag(tag_id): self._record_exception("tinf", tag_id); return self._format_exception("tinf", tag_id)
         
         tag = person.get_tag(tag_id)
-        person_ids_in_tag = tag.get_person_ids() 
-        ages = []
-        for pid in person_ids_in_tag: 
-            p_obj = self.get_person(pid)
-            if p_obj: ages.append(p_obj.age)
-        age_var = calculate_age_var(ages) 
-        return str(age_var)
+        if not self.tag_aggregates: return str(self._scan_tag_age_var(tag))
+        return str(tag.get_age_var())
+
+    def _scan_tag_value_sum(self, tag):
+        # Reference for TagSimulator.value_sum (simulate(tag_aggregates=False)): every ordered member pair, O(TagSize^2)
+        person_ids_in_tag = tag.get_person_ids()
+        value_sum = 0
+        for p1_id in person_ids_in_tag:
+            p1 = self.get_person(p1_id)
+            for p2_id in person_ids_in_tag:
+                value_sum += p1.query_value(p2_id)
+        return value_sum
+
+    def _scan_tag_age_var(self, tag):
+        # Reference for the tag's running age sums (simulate(tag_aggregates=False)), O(TagSize)
+        return calculate_age_var([self.get_person(pid).age for pid in tag.get_person_ids()])
 
     def del_person_from_tag(self, person_id1, person_id2, tag_id):
         if not self.contains_person(person_id1): self._record_exception("pinf", person_id1); return self._format_exception("pinf", person_id1)
@@ -414,19 +828,26 @@ class NetworkSimulator:
         if not tag.has_person(person_id1): 
             self._record_exception("pinf", person_id1); return self._format_exception("pinf", person_id1)
         
-        tag.del_person(person_id1)
+        tag.del_person(self.get_person(person_id1))
         return "Ok"
 
     def del_tag(self, person_id, tag_id):
         if not self.contains_person(person_id): self._record_exception("pinf", person_id); return self._format_exception("pinf", person_id)
         person = self.get_person(person_id)
         if not person.contains_tag(tag_id): self._record_exception("tinf", tag_id); return self._format_exception("tinf", tag_id)
+        tag = person.get_tag(tag_id)
+        for pid in tag.persons: # Drop the tag from its members' reverse index
+            self.get_person(pid).in_tags.pop(id(tag), None)
         person.del_tag(tag_id)
         return "Ok"
 
     def query_best_acquaintance(self, person_id):
         if not self.contains_person(person_id): self._record_exception("pinf", person_id); return self._format_exception("pinf", person_id)
         person = self.get_person(person_id)
+        if self.best_index is not None:
+            best_id = self.best_index.best(person_id)
+            if best_id is None: self._record_exception("anf", person_id); return self._format_exception("anf", person_id)
+            return str(best_id)
         acquaintances = person.get_acquaintance_ids_and_values()
         if not acquaintances: self._record_exception("anf", person_id); return self._format_exception("anf", person_id)
         
@@ -442,6 +863,7 @@ class NetworkSimulator:
         return str(int(best_id))
 
     def query_couple_sum(self):
+        if self.best_index is not None: return str(self.best_index.couples)
         count = 0
         person_ids = list(self.persons.keys()) 
         best_acquaintances_map = {}
@@ -482,22 +904,16 @@ class NetworkSimulator:
     def query_shortest_path(self, id1, id2):
         if not self.contains_person(id1): self._record_exception("pinf", id1); return self._format_exception("pinf", id1)
         if not self.contains_person(id2): self._record_exception("pinf", id2); return self._format_exception("pinf", id2)
-        if id1 == id2: return "0" 
-
-        queue = deque([(id1, 0)]) 
-        visited = {id1}
-        while queue:
-            current_id, distance = queue.popleft()
-            if current_id == id2:
-                return str(distance) 
-
-            current_person = self.get_person(current_id)
-            if current_person:
-                for neighbor_id in current_person.acquaintance.keys():
-                    if neighbor_id not in visited:
-                        visited.add(neighbor_id)
-                        queue.append((neighbor_id, distance + 1))
-        
+        if id1 == id2: return "0"
+        neighbors = lambda person_id: self.persons[person_id].acquaintance
+        if self.distances is None:
+            distance = bfs_distance(neighbors, id1, id2)
+        else:
+            known, distance = self.distances.lookup(id1, id2)
+            if not known:
+                distance, searched = bidirectional_distance(neighbors, id1, id2)
+                self.distances.store(searched)
+        if distance is not None: return str(distance)
         self._record_exception("pnf", id1, id2); return self._format_exception("pnf", id1, id2)
 
     def contains_account(self, account_id):
@@ -601,6 +1017,7 @@ class NetworkSimulator:
             self._record_exception("oainf", account_id); return self._format_exception("oainf", account_id)
 
         account = self.get_account(account_id)
+        if not self.account_index: return str(account.scan_best_contributor())
         best_contributor_id = account.get_best_contributor()
         return str(best_contributor_id)
 
@@ -619,30 +1036,40 @@ class NetworkSimulator:
 
 # --- Main Checker Logic ---
 
-def run_checker(stdin_path, stdout_path):
+LOAD_COMMANDS = ("ln", "load_network", "lnl", "load_network_local")
+GOLDEN_VERSION = 1 # Bump when simulate()'s record format changes
+
+
+def simulate(input_lines, offline_connectivity=True, best_index=True, distance_cache=True, bulk_load=True, tag_aggregates=True, account_index=True):
+    """
+    Expected side of the check: replays the input through NetworkSimulator once.
+    Returns {"commands", "records", "exceptions"}; records holds one
+    [command_number, command, expected, error] entry per command that prints a line,
+    error being a checker-side failure that rejects any output reaching it (the
+    simulation stops there). Nothing here depends on the JAR's output, so the result
+    can be cached per input and diffed against every JAR with compare_output().
+    offline_connectivity=False answers qci with a BFS at the time of the query,
+    best_index=False answers qba and qcs by scanning the acquaintances,
+    distance_cache=False answers qsp with a BFS from id1 and bulk_load=False loads
+    ln blocks through add_relation() one value at a time. tag_aggregates=False
+    answers qtvs and qtav by rescanning the tag's members and account_index=False
+    answers qbc by scanning the followers and deletes articles from deques.
+    """
     network = NetworkSimulator()
-    result_status = "Accepted"
-    error_details = []
-
-    try:
-        with open(stdin_path, 'r', encoding='utf-8') as f_in:
-            input_lines = [line.strip() for line in f_in if line.strip()]
-    except FileNotFoundError: result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Input file not found: {stdin_path}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
-    except Exception as e: result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Failed to read input file {stdin_path}: {e}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
-
-    try:
-        with open(stdout_path, 'r', encoding='utf-8') as f_out:
-            output_lines = [line.strip() for line in f_out if line.strip()]
-    except FileNotFoundError: result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Output file not found: {stdout_path}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
-    except Exception as e: result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Failed to read output file {stdout_path}: {e}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
+    if offline_connectivity:
+        network.connectivity = OfflineConnectivity()
+    if best_index:
+        network.best_index = AcquaintanceIndex()
+    if distance_cache:
+        network.distances = DistanceCache()
+    network.tag_aggregates = tag_aggregates
+    network.account_index = account_index
+    records = []
 
     input_idx = 0
-    output_idx = 0
     command_num = 0
 
     while input_idx < len(input_lines):
-        if result_status == "Rejected": break
-
         command_num += 1
         cmd_line = input_lines[input_idx]
         input_idx += 1 
@@ -652,12 +1079,10 @@ def run_checker(stdin_path, stdout_path):
         expected_output = "Checker_Error: Command not implemented" 
 
         if cmd in ("ln", "load_network", "lnl", "load_network_local"):
-             load_expected_output_str = "Ok"; load_actual_output_str = None 
-             if output_idx >= len(output_lines): result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": load_expected_output_str, "actual": None, "reason": f"Missing output for {cmd}"}); break
-             load_actual_output_str = output_lines[output_idx]; output_idx += 1
-             if len(parts) < 2: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output_str, "reason": f"Malformed {cmd} command"}); break
+             load_expected_output_str = "Ok" 
+             if len(parts) < 2: records.append([command_num, cmd_line, None, f"Malformed {cmd} command"]); break
              n_str = parts[1]; n = parse_int(n_str)
-             if n is None or n < 0: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output_str, "reason": f"Invalid count '{n_str}' in {cmd}"}); break
+             if n is None or n < 0: records.append([command_num, cmd_line, None, f"Invalid count '{n_str}' in {cmd}"]); break
 
              num_data_lines_for_load = 0
              if n > 0:
@@ -667,23 +1092,23 @@ def run_checker(stdin_path, stdout_path):
              source_lines_for_sim = []; source_idx_offset_for_sim = 0; load_file_error_flag = False 
              
              if cmd in ("lnl", "load_network_local"):
-                  if len(parts) < 3: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output_str, "reason": f"Missing filename for {cmd}"}); break
+                  if len(parts) < 3: records.append([command_num, cmd_line, None, f"Missing filename for {cmd}"]); break
                   filename = parts[2]
                   try:
                        with open(filename, 'r', encoding='utf-8') as f_load: source_lines_for_sim = [line.strip() for line in f_load if line.strip()]
                        if n > 0 and len(source_lines_for_sim) < num_data_lines_for_load: 
-                           result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output_str, "reason": f"File {filename} insufficient data (expected {num_data_lines_for_load} lines, got {len(source_lines_for_sim)})"}); break
+                           records.append([command_num, cmd_line, None, f"File {filename} insufficient data (expected {num_data_lines_for_load} lines, got {len(source_lines_for_sim)})"]); break
                   except FileNotFoundError: load_file_error_flag = True; load_expected_output_str = "File not found"
-                  except Exception as e: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Error reading load file {filename}: {e}"}); break
+                  except Exception as e: records.append([command_num, cmd_line, None, f"Error reading load file {filename}: {e}"]); break
              else: 
                   if n > 0:
                       if (input_idx + num_data_lines_for_load > len(input_lines)):
-                          result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Insufficient lines in stdin for {cmd} {n} (expected {num_data_lines_for_load}, available {len(input_lines) - input_idx})"}); break
+                          records.append([command_num, cmd_line, None, f"Insufficient lines in stdin for {cmd} {n} (expected {num_data_lines_for_load}, available {len(input_lines) - input_idx})"]); break
                       source_lines_for_sim = input_lines
                       source_idx_offset_for_sim = input_idx
                       input_idx += num_data_lines_for_load 
 
-             if load_actual_output_str != load_expected_output_str: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": load_expected_output_str, "actual": load_actual_output_str, "reason": "Output mismatch for load command"}); break
+             records.append([command_num, cmd_line, load_expected_output_str, None])
              if load_file_error_flag: continue 
              if n == 0: continue 
 
@@ -701,6 +1126,9 @@ def run_checker(stdin_path, stdout_path):
                         if sim_res != "Ok": raise ValueError(f"Load Error: Failed adding person {ids[i]}: {sim_res}")
 
                   current_data_line_idx_in_source = source_idx_offset_for_sim + 3
+                  values = parse_load_values(source_lines_for_sim[current_data_line_idx_in_source:current_data_line_idx_in_source + n - 1], n) if bulk_load else None
+                  if values is not None:
+                      network.load_relations(ids, values); continue
                   
                   for line_k_idx in range(n - 1): 
                         if current_data_line_idx_in_source >= len(source_lines_for_sim): 
@@ -735,12 +1163,8 @@ def run_checker(stdin_path, stdout_path):
                                         f"Load Error: Failed adding relation {person1_actual_id}-{person2_actual_id}: {sim_res}"
                                     )
              except Exception as e:
-                  result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Checker error during load simulation: {type(e).__name__} {e}"}); break
+                  records[-1][3] = f"Checker error during load simulation: {type(e).__name__} {e}"; break
              continue 
-        
-        actual_output = None
-        if output_idx >= len(output_lines): result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": "???", "actual": None, "reason": "Missing output"}); break
-        actual_output = output_lines[output_idx]; output_idx += 1
 
         try:
             if cmd in ("ap", "add_person") and len(parts) >= 4: # 3 args: id, name, age
@@ -830,25 +1254,324 @@ def run_checker(stdin_path, stdout_path):
             else:
                  raise ValueError(f"Unknown or malformed command: '{cmd_line}'")
 
-        except ValueError as e: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Checker Error: Invalid args/cmd processing: {e}"}); break
-        except Exception as e: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Checker Error: Simulation Error: {type(e).__name__} {e}"}); break
+        except ValueError as e: records.append([command_num, cmd_line, None, f"Checker Error: Invalid args/cmd processing: {e}"]); break
+        except Exception as e: records.append([command_num, cmd_line, None, f"Checker Error: Simulation Error: {type(e).__name__} {e}"]); break
+
+        records.append([command_num, cmd_line, expected_output, None])
+
+    if network.connectivity is not None:
+        network.connectivity.resolve()
+        for record in records:
+            if isinstance(record[2], PendingAnswer): record[2] = record[2].text
+
+    return {"commands": command_num, "records": records, "exceptions": _exception_totals(network)}
+
+
+def _exception_totals(network):
+    """Final per-type exception counters of a simulation, stored alongside the expected lines."""
+    return {exc_type: counter["total"] for exc_type, counter in network.exception_counts.items()}
+
+
+def _normalize_output(cmd, line):
+    # qra lists are compared with whitespace collapsed
+    if cmd in ("qra", "query_received_articles"):
+        return " ".join(line.split())
+    return line
+
+
+def compare_output(golden, output_lines):
+    """
+    Streaming diff of a JAR's output (any iterable of lines, e.g. an open file) against
+    simulate()'s result. Reading stops at the first difference. Returns the checker's
+    {"result", "errors"} dict.
+    """
+    actual_lines = (line.strip() for line in output_lines)
+    actual_lines = (line for line in actual_lines if line)
+    for command_num, cmd_line, expected, error in golden["records"]:
+        cmd = cmd_line.split()[0]
+        is_load = cmd in LOAD_COMMANDS
+        actual = next(actual_lines, None)
+        if actual is None:
+            if is_load: return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": expected, "actual": None, "reason": f"Missing output for {cmd}"}]}
+            return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": "???", "actual": None, "reason": "Missing output"}]}
+        if error is not None:
+            return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "actual": actual, "reason": error}]}
+        if is_load:
+            if actual != expected:
+                return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": expected, "actual": actual, "reason": "Output mismatch for load command"}]}
+            continue
+        expected, actual = _normalize_output(cmd, expected), _normalize_output(cmd, actual)
+        if actual != expected:
+            return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": expected, "actual": actual, "reason": "Output mismatch"}]}
 
-        if cmd in ("qra", "query_received_articles"):
-             norm_expected = " ".join(expected_output.split())
-             norm_actual = " ".join(actual_output.split())
-             if norm_actual != norm_expected:
-                 result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": norm_expected, "actual": norm_actual, "reason": "Output mismatch"}); break
-        elif actual_output != expected_output:
-             result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": expected_output, "actual": actual_output, "reason": "Output mismatch"}); break
+    extra = next(actual_lines, None)
+    if extra is not None:
+        return {"result": "Rejected", "errors": [{"command_number": golden["commands"] + 1, "reason": "Extra output", "actual": extra}]}
+    return {"result": "Accepted", "errors": []}
 
-    if result_status == "Accepted" and output_idx < len(output_lines):
-        result_status = "Rejected"; error_details.append({"command_number": command_num + 1, "reason": "Extra output", "actual": output_lines[output_idx]})
 
-    final_result = {"result": result_status, "errors": error_details}
+def read_input_lines(stdin_path):
+    with open(stdin_path, 'r', encoding='utf-8') as f_in:
+        return [line.strip() for line in f_in if line.strip()]
+
+
+def run_checker(stdin_path, stdout_path):
+    try:
+        input_lines = read_input_lines(stdin_path)
+    except FileNotFoundError: print(json.dumps({"result": "Rejected", "errors": [{"reason": f"Checker Error: Input file not found: {stdin_path}"}]}, indent=4)); sys.exit(0)
+    except Exception as e: print(json.dumps({"result": "Rejected", "errors": [{"reason": f"Checker Error: Failed to read input file {stdin_path}: {e}"}]}, indent=4)); sys.exit(0)
+
+    golden = simulate(input_lines)
+    try:
+        with open(stdout_path, 'r', encoding='utf-8') as f_out:
+            final_result = compare_output(golden, f_out)
+    except FileNotFoundError: final_result = {"result": "Rejected", "errors": [{"reason": f"Checker Error: Output file not found: {stdout_path}"}]}
+    except Exception as e: final_result = {"result": "Rejected", "errors": [{"reason": f"Checker Error: Failed to read output file {stdout_path}: {e}"}]}
     print(json.dumps(final_result, indent=4, ensure_ascii=False))
 
 
+def write_golden(stdin_path, golden_path):
+    """Simulates stdin_path once and stores the expected side as JSON (test.py's golden cache)."""
+    golden = simulate(read_input_lines(stdin_path))
+    golden["version"] = GOLDEN_VERSION
+    with open(golden_path, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, ensure_ascii=False)
+
+
+# Reference settings of simulate() timed by --bench against the default ones
+BENCH_VARIANTS = {
+    "qci by BFS": {"offline_connectivity": False},
+    "qba/qcs by scan": {"best_index": False},
+    "qsp by BFS": {"distance_cache": False},
+    "ln by add_relation": {"bulk_load": False},
+    "qtvs/qtav by scan": {"tag_aggregates": False},
+    "qbc/da by scan": {"account_index": False},
+}
+
+
+def benchmark(stdin_path):
+    """Times simulate() on stdin_path with each BENCH_VARIANTS entry and checks the expected side is unchanged."""
+    input_lines = read_input_lines(stdin_path)
+    start = time.perf_counter()
+    golden = simulate(input_lines)
+    print(f"default: {time.perf_counter() - start:.3f}s")
+    all_same = True
+    for name, kwargs in BENCH_VARIANTS.items():
+        start = time.perf_counter()
+        same = simulate(input_lines, **kwargs) == golden
+        print(f"{name}: {time.perf_counter() - start:.3f}s, {'same output' if same else 'OUTPUT DIFFERS'}")
+        all_same = all_same and same
+    return all_same
+
+
+PATH_BENCH_DENSITIES = (0.002, 0.01, 0.05, 0.3, 0.7, 0.95)
+
+
+def benchmark_paths(nodes=600, pairs=300, seed=0):
+    """Micro-benchmark of bidirectional_distance against bfs_distance on random graphs of each density."""
+    rng = random.Random(seed)
+    all_same = True
+    for density in PATH_BENCH_DENSITIES:
+        adjacency = {node: set() for node in range(nodes)}
+        for i in range(nodes):
+            for j in range(i):
+                if rng.random() < density: adjacency[i].add(j); adjacency[j].add(i)
+        queries = [(rng.randrange(nodes), rng.randrange(nodes)) for _ in range(pairs)]
+        start = time.perf_counter()
+        expected = [bfs_distance(adjacency.__getitem__, s, t) for s, t in queries]
+        bfs_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = [bidirectional_distance(adjacency.__getitem__, s, t)[0] for s, t in queries]
+        bidir_time = time.perf_counter() - start
+        same = actual == expected
+        all_same = all_same and same
+        print(f"density {density:<5}: BFS {bfs_time:.3f}s, bidirectional {bidir_time:.3f}s "
+              f"({bfs_time / max(bidir_time, 1e-9):.1f}x), {'same distances' if same else 'DISTANCES DIFFER'}")
+    return all_same
+
+
+def benchmark_load(nodes=600, density=0.95, seed=0):
+    """Times one random ln block of the given size and density with and without the bulk loader, followed by state queries."""
+    if np is None:
+        print("numpy is not installed, ln always goes through add_relation()")
+        return True
+    rng = random.Random(seed)
+    input_lines = [f"ln {nodes}", " ".join(map(str, range(nodes))), " ".join(f"P{i}" for i in range(nodes)),
+                   " ".join(str(rng.randint(1, 200)) for _ in range(nodes))]
+    for i in range(1, nodes):
+        input_lines.append(" ".join(str(rng.randint(1, 100)) if rng.random() < density else "0" for _ in range(i)))
+    input_lines += ["qts", "qcs"] + [f"qba {i}" for i in range(nodes)]
+    input_lines += [f"qci {rng.randrange(nodes)} {rng.randrange(nodes)}" for _ in range(100)]
+    start = time.perf_counter()
+    golden = simulate(input_lines)
+    bulk_time = time.perf_counter() - start
+    start = time.perf_counter()
+    same = simulate(input_lines, bulk_load=False) == golden
+    single_time = time.perf_counter() - start
+    print(f"ln {nodes} at density {density}: bulk {bulk_time:.3f}s, add_relation {single_time:.3f}s "
+          f"({single_time / max(bulk_time, 1e-9):.1f}x), {'same output' if same else 'OUTPUT DIFFERS'}")
+    return same
+
+
+# Random command streams run by --fuzz. Each one stresses the state an optimisation keeps
+# up to date and is simulated with the default settings and with that optimisation's
+# BENCH_VARIANTS entry; both must print the same lines. Stream k of a generator is seeded
+# with "<name>-<seed>-<k>", so a failing one can be regenerated on its own.
+
+def _fuzz_connectivity_stream(rng):
+    """
+    People join mid-run and relations come, go (mr below zero) and come back, some of them
+    between two qci, so the offline answers meet every kind of relation lifetime. Two ids
+    past the last person are never added, for qci on unknown people.
+    """
+    people = rng.randint(2, 12)
+    added = rng.randint(1, people)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(added)]
+    for _ in range(rng.randint(100, 400)):
+        a, b = rng.randrange(people + 2), rng.randrange(people + 2)
+        r = rng.random()
+        if r < 0.05 and added < people:
+            lines.append(f"ap {added} p{added} {rng.randint(1, 100)}")
+            added += 1
+        elif r < 0.3: lines.append(f"ar {a} {b} {rng.randint(1, 10)}")
+        elif r < 0.45: lines.append(f"mr {a} {b} {rng.randint(-15, 5)}")
+        elif r < 0.5: lines += [f"ar {a} {b} 3", f"mr {a} {b} -3"]
+        else: lines.append(f"qci {a} {b}")
+    return lines
+
+
+def _fuzz_path_stream(rng):
+    """
+    Sparse, often disconnected graphs and bursts of qsp between two changes, so answers come
+    from cached distance maps (complete ones too) that the ar, mr below zero and ap in
+    between must make stale.
+    """
+    people = rng.randint(3, 16)
+    added = rng.randint(2, people)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(added)]
+    for _ in range(rng.randint(100, 300)):
+        a, b = rng.randrange(added + 1), rng.randrange(added + 1) # added is not a person yet
+        r = rng.random()
+        if r < 0.05 and added < people:
+            lines.append(f"ap {added} p{added} {rng.randint(1, 100)}")
+            added += 1
+        elif r < 0.25: lines.append(f"ar {a} {b} {rng.randint(1, 10)}")
+        elif r < 0.4: lines.append(f"mr {a} {b} {rng.randint(-15, 5)}")
+        else: lines += [f"qsp {rng.randrange(added + 1)} {rng.randrange(added + 1)}" for _ in range(rng.randint(1, 6))]
+    return lines
+
+
+def _fuzz_account_stream(rng):
+    """
+    Followers contribute articles and the owners delete them, so contributions rise, fall
+    and tie and the ranking heaps fill with stale entries and get rebuilt; accounts are
+    deleted and created again under another owner, and qra reads the received lists between
+    deletes.
+    """
+    people, accounts = rng.randint(2, 8), rng.randint(1, 3)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(people)]
+    owners = [rng.randrange(people) for _ in range(accounts)]
+    lines += [f"coa {owner} {acc} a{acc}" for acc, owner in enumerate(owners)]
+    posted = [] # account of each article id asked for by ca
+    for _ in range(rng.randint(300, 800)):
+        a, acc = rng.randrange(people), rng.randrange(accounts)
+        art = rng.randrange(max(len(posted) - 8, 0), len(posted)) if posted else 0
+        r = rng.random()
+        if r < 0.1: lines.append(f"foa {a} {acc}")
+        elif r < 0.4:
+            lines.append(f"ca {a} {acc} {len(posted)}")
+            posted.append(acc)
+        elif r < 0.6 and posted: lines.append(f"da {owners[posted[art]]} {posted[art]} {art}")
+        elif r < 0.62:
+            lines += [f"doa {owners[acc]} {acc}", f"coa {a} {acc} a{acc}"]
+            owners[acc] = a
+        elif r < 0.8: lines.append(f"qbc {acc}")
+        else: lines.append(f"qra {a}")
+    return lines
+
+
+def _fuzz_tag_stream(rng):
+    """Members join and leave tags while relations between them change and disappear (mr below zero)."""
+    people = rng.randint(3, 12)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(people)]
+    lines += [f"ar {a} {b} {rng.randint(1, 20)}" for a in range(people) for b in range(a) if rng.random() < 0.8]
+    lines += [f"at {a} {t}" for a in range(people) for t in range(3)]
+    for _ in range(rng.randint(200, 600)):
+        a, b, t = rng.randrange(people), rng.randrange(people), rng.randrange(3)
+        r = rng.random()
+        if r < 0.1: lines.append(f"ar {a} {b} {rng.randint(1, 20)}")
+        elif r < 0.25: lines.append(f"mr {a} {b} {rng.randint(-12, 12)}")
+        elif r < 0.28: lines.append(f"at {a} {t}")
+        elif r < 0.6: lines.append(f"att {a} {b} {t}")
+        elif r < 0.67: lines.append(f"dft {a} {b} {t}")
+        elif r < 0.7: lines.append(f"dt {a} {t}")
+        elif r < 0.85: lines.append(f"qtvs {a} {t}")
+        else: lines.append(f"qtav {a} {t}")
+    return lines
+
+
+def _fuzz_acquaintance_stream(rng):
+    """
+    Few people and many mr, so best acquaintances are lowered, removed, tied and restored
+    (mr -2 then +2 takes a 5 to 3 and back) and the per-person heaps go stale, get trimmed
+    and are rebuilt.
+    """
+    people = rng.randint(2, 10)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(people)]
+    for _ in range(rng.randint(300, 800)):
+        a, b = rng.randrange(people), rng.randrange(people)
+        r = rng.random()
+        if r < 0.15: lines.append(f"ar {a} {b} {rng.randint(1, 10)}")
+        elif r < 0.3: lines.append(f"mr {a} {b} {rng.choice((-2, 2))}")
+        elif r < 0.4: lines.append(f"mr {a} {b} {rng.randint(-12, 8)}")
+        elif r < 0.45: lines += [f"mr {a} {b} -2", f"qba {a}", f"mr {a} {b} 2"]
+        elif r < 0.8: lines.append(f"qba {a}")
+        else: lines.append("qcs")
+    return lines
+
+
+# name -> (stream generator, BENCH_VARIANTS entry it is checked against)
+FUZZ_STREAMS = {
+    "connectivity": (_fuzz_connectivity_stream, "qci by BFS"),
+    "paths": (_fuzz_path_stream, "qsp by BFS"),
+    "acquaintances": (_fuzz_acquaintance_stream, "qba/qcs by scan"),
+    "tags": (_fuzz_tag_stream, "qtvs/qtav by scan"),
+    "accounts": (_fuzz_account_stream, "qbc/da by scan"),
+}
+
+
+def fuzz(streams=200, seed=0):
+    """Simulates streams random inputs of every FUZZ_STREAMS generator both ways; True if all outputs match."""
+    all_same = True
+    for name, (generate, variant) in FUZZ_STREAMS.items():
+        for k in range(streams):
+            input_lines = generate(random.Random(f"{name}-{seed}-{k}"))
+            if simulate(input_lines, **BENCH_VARIANTS[variant]) != simulate(input_lines):
+                print(f"{name}: stream {name}-{seed}-{k} differs from '{variant}'")
+                all_same = False
+                break
+        else:
+            print(f"{name}: {streams} streams, same output as '{variant}'")
+    return all_same
+
+
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--bench":
+        # python checker.py --bench <stdin_file>
+        sys.exit(0 if benchmark(sys.argv[2]) else 1)
+    if len(sys.argv) in (2, 3) and sys.argv[1] == "--fuzz":
+        # python checker.py --fuzz [streams]
+        sys.exit(0 if fuzz(int(sys.argv[2]) if len(sys.argv) == 3 else 200) else 1)
+    if len(sys.argv) in (2, 3) and sys.argv[1] == "--bench-paths":
+        # python checker.py --bench-paths [nodes]
+        sys.exit(0 if benchmark_paths(int(sys.argv[2]) if len(sys.argv) == 3 else 600) else 1)
+    if len(sys.argv) in (2, 3) and sys.argv[1] == "--bench-load":
+        # python checker.py --bench-load [nodes]
+        sys.exit(0 if benchmark_load(int(sys.argv[2]) if len(sys.argv) == 3 else 600) else 1)
+    if len(sys.argv) == 4 and sys.argv[1] == "--golden":
+        # python checker.py --golden <stdin_file> <golden_json>
+        write_golden(sys.argv[2], sys.argv[3])
+        sys.exit(0)
     if len(sys.argv) != 3:
         print("Usage: python checker.py <stdin_file> <stdout_file>", file=sys.stderr)
         print(json.dumps({"result": "Rejected", "errors": [{"reason": "Checker usage error: Incorrect number of arguments"}]}, indent=4))
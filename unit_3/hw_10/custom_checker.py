@@ -3,6 +3,13 @@ import sys
 import json
 import subprocess
 import os
+import importlib.util
+
+# custom_checker.py runs as a standalone subprocess, load the unit-level std_cache.py by path
+_std_cache_spec = importlib.util.spec_from_file_location(
+    "std_cache", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "std_cache.py"))
+std_cache = importlib.util.module_from_spec(_std_cache_spec)
+_std_cache_spec.loader.exec_module(std_cache)
 
 def normalize_output(content):
     """
@@ -40,29 +47,21 @@ def run_comparison_checker(stdin_path, user_stdout_path, std_jar_path_arg):
     true_stdout_content = None
     std_jar_error_output = None
     try:
-        with open(stdin_path, 'r', encoding='utf-8') as f_in:
-            # Execute std.jar
-            process = subprocess.run(
-                ['java', '-jar', std_jar_path_arg],
-                stdin=f_in,
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                check=False
-            )
-            
-            if process.returncode != 0:
-                result_status = "Rejected"
-                std_jar_error_output = process.stderr.strip() if process.stderr else "N/A"
-                error_details.append({
-                    "reason": f"Standard Solution Error: '{std_jar_path_arg}' exited with code {process.returncode}.",
-                    "stdin_file": stdin_path,
-                    "user_stdout_file": user_stdout_path,
-                    "std_jar_path": std_jar_path_arg,
-                    "std_jar_stderr": std_jar_error_output
-                })
-            else:
-                true_stdout_content = process.stdout
+        # Execute std.jar (served from the shared std output cache when this input was seen before)
+        process = std_cache.get_cache().run(std_jar_path_arg, stdin_path)
+
+        if process.returncode != 0:
+            result_status = "Rejected"
+            std_jar_error_output = process.stderr.strip() if process.stderr else "N/A"
+            error_details.append({
+                "reason": f"Standard Solution Error: '{std_jar_path_arg}' exited with code {process.returncode}.",
+                "stdin_file": stdin_path,
+                "user_stdout_file": user_stdout_path,
+                "std_jar_path": std_jar_path_arg,
+                "std_jar_stderr": std_jar_error_output
+            })
+        else:
+            true_stdout_content = process.stdout
 
     except FileNotFoundError: # This would be for stdin_path if it's somehow removed after initial check
         result_status = "Rejected"
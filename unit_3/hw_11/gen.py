@@ -6,7 +6,7 @@ import os
 import sys
 import math
 from contextlib import redirect_stdout
-from collections import defaultdict, deque # deque for BFS
+from collections import defaultdict
 import traceback # For debugging exceptions during generation
 import json
 # --- State Tracking ---
@@ -239,27 +239,40 @@ def get_non_existent_relation_pair(approx_mode=False): # Added approx_mode
     # print(f"Warning: Failed to find non-existent relation pair after scan (density: {current_density_val:.2f})", file=sys.stderr)
     return None, None
 
-# --- Path/Circle Helpers (Using optimized BFS) ---
+# --- Path/Circle Helpers (Using bidirectional BFS) ---
+def bidirectional_distance(neighbors, source, target):
+    """
+    Shortest distance from source to target, None if there is no path; the same search as
+    the checker's qsp. neighbors(node) iterates the adjacent nodes. The smaller frontier is
+    expanded one whole level at a time, so dense graphs are searched from both ends at once.
+    """
+    if source == target: return 0
+    dist_s, dist_t = {source: 0}, {target: 0}
+    front_s, front_t = [source], [target]
+    found = None
+    while front_s and front_t and found is None:
+        if len(front_s) <= len(front_t):
+            front, dist, other = front_s, dist_s, dist_t
+        else:
+            front, dist, other = front_t, dist_t, dist_s
+        next_front = []
+        for node in front:
+            d = dist[node] + 1
+            for neighbor in neighbors(node):
+                if neighbor in other:
+                    if found is None or d + other[neighbor] < found: found = d + other[neighbor]
+                elif neighbor not in dist:
+                    dist[neighbor] = d; next_front.append(neighbor)
+        if front is front_s: front_s = next_front
+        else: front_t = next_front
+    return found
+
 def check_path_exists(start_node, end_node):
-    """Checks if a path exists between start_node and end_node using BFS."""
+    """Checks if a path exists between start_node and end_node (bidirectional BFS)."""
     if start_node == end_node: return True
-    # Ensure both nodes are currently valid persons
     if start_node not in persons or end_node not in persons: return False
-
-    q = deque([start_node])
-    visited = {start_node}
-    while q:
-        curr = q.popleft()
-        if curr == end_node:
-            return True
-        # Use the optimized neighbor lookup
-        neighbors_of_curr = person_neighbors.get(curr, set())
-        for neighbor in neighbors_of_curr:
-            # Ensure neighbor is also a valid person before proceeding
-            if neighbor in persons and neighbor not in visited:
-                visited.add(neighbor)
-                q.append(neighbor)
-    return False
+    neighbors = lambda node: (n for n in person_neighbors.get(node, ()) if n in persons)
+    return bidirectional_distance(neighbors, start_node, end_node) is not None
 
 def get_pair_with_path(): # approx_mode not relevant here as we *want* a path
     num_persons_val = len(persons)
@@ -1,39 +1,11 @@
 # -*- coding: utf-8 -*-
 import sys
 import math
+import heapq
 from collections import deque
 import json
-
-# --- 并查集 (DSU) 类 ---
-# 注意：这个标准 DSU 不支持删除操作，因此在本次优化中 *不* 直接用于 is_circle
-# 仅作为未来可能扩展或用于其他场景的参考
-# class DSU:
-#     def __init__(self, n):
-#         self.parent = list(range(n + 1)) # +1 if IDs start from 1 or handle 0
-#         self.num_sets = n
-#         # Optional: for union by rank/size
-#         # self.size = [1] * (n + 1)
-#
-#     def find(self, i):
-#         if self.parent[i] == i:
-#             return i
-#         # Path compression
-#         self.parent[i] = self.find(self.parent[i])
-#         return self.parent[i]
-#
-#     def union(self, i, j):
-#         root_i = self.find(i)
-#         root_j = self.find(j)
-#         if root_i != root_j:
-#             # Optional: Union by size/rank heuristic
-#             # if self.size[root_i] < self.size[root_j]:
-#             #     root_i, root_j = root_j, root_i
-#             self.parent[root_j] = root_i
-#             # self.size[root_i] += self.size[root_j]
-#             self.num_sets -= 1
-#             return True # Union performed
-#         return False # Already in the same set
-
+import random
+import time
 
 # --- Helper Functions ---
 
@@ -53,21 +25,177 @@ def calculate_age_var(ages):
     variance = int(variance_sum_sq_diff // n) if n > 0 else 0
     return variance
 
+# --- Offline connectivity for qci ---
+# simulate() sees the whole command file, so qci does not have to BFS the current graph.
+# Every relation is alive over an interval of qci queries (from the ar that adds it to
+# the mr that removes it); the intervals go into a segment tree over the queries, and a
+# DFS of the tree with a rollback union-find answers each query at its leaf. That is
+# O((E + Q) log Q log N) for the whole run instead of O(N + E) per qci.
+
+class PendingAnswer:
+    """Placeholder for a qci answer, filled in by OfflineConnectivity.resolve()."""
+    __slots__ = ("text",)
+
+    def __init__(self):
+        self.text = None
+
+
+class OfflineConnectivity:
+    def __init__(self):
+        self._since = {}     # (low id, high id) -> index of the first query the relation is alive for
+        self._intervals = [] # (first query, end query, id1, id2) of removed relations
+        self._queries = []   # (id1, id2, PendingAnswer)
+
+    @staticmethod
+    def _key(id1, id2):
+        return (id1, id2) if id1 < id2 else (id2, id1)
+
+    def link(self, id1, id2):
+        self._since[self._key(id1, id2)] = len(self._queries)
+
+    def cut(self, id1, id2):
+        key = self._key(id1, id2)
+        start = self._since.pop(key)
+        if start < len(self._queries): # Relations added and removed between two queries are never seen
+            self._intervals.append((start, len(self._queries), key[0], key[1]))
+
+    def query(self, id1, id2):
+        answer = PendingAnswer()
+        self._queries.append((id1, id2, answer))
+        return answer
+
+    def resolve(self):
+        """Answers every query asked so far."""
+        count = len(self._queries)
+        if count == 0:
+            return
+        size = 1
+        while size < count:
+            size *= 2
+        nodes = [[] for _ in range(2 * size)]
+        intervals = self._intervals + [(start, count, a, b) for (a, b), start in self._since.items() if start < count]
+        for start, end, a, b in intervals:
+            lo = start + size
+            hi = (size if end == count else end) + size # Leaves past the last query are empty, alive-to-the-end relations can cover them
+            while lo < hi:
+                if lo & 1: nodes[lo].append((a, b)); lo += 1
+                if hi & 1: hi -= 1; nodes[hi].append((a, b))
+                lo //= 2; hi //= 2
+
+        parent = {} # Roots have no entry; no path compression so unions can be undone
+        weight = {}
+        history = []
+
+        def find(x):
+            p = parent.get(x)
+            while p is not None:
+                x = p; p = parent.get(x)
+            return x
+
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if node < 0: # Leaving -node: undo its unions
+                while len(history) > lo:
+                    child, root = history.pop()
+                    del parent[child]; weight[root] -= weight.get(child, 1)
+                continue
+            if lo >= count:
+                continue
+            stack.append((-node, len(history), 0))
+            for a, b in nodes[node]:
+                ra, rb = find(a), find(b)
+                if ra != rb:
+                    wa, wb = weight.get(ra, 1), weight.get(rb, 1)
+                    if wa < wb: ra, rb, wa, wb = rb, ra, wb, wa
+                    parent[rb] = ra; weight[ra] = wa + wb
+                    history.append((rb, ra))
+            if node >= size:
+                id1, id2, answer = self._queries[lo]
+                answer.text = "true" if find(id1) == find(id2) else "false"
+            else:
+                mid = (lo + hi) // 2
+                stack.append((2 * node + 1, mid, hi))
+                stack.append((2 * node, lo, mid))
+
+
+# --- Best acquaintance index for qba / qcs ---
+# Each person's best acquaintance (highest value, then lowest id) is kept up to date as
+# relations change, so qba is a lookup, and the number of couples (pairs that are each
+# other's best acquaintance) is adjusted only for the persons whose best one changed.
+# Adding or raising a relation is a comparison with the current best; only when the best
+# relation is lowered or removed is the person's lazy-deletion heap of (-value, id) needed.
+
+class AcquaintanceIndex:
+    def __init__(self):
+        self._best = {}  # person id -> best acquaintance id, persons without acquaintances left out
+        self._heaps = {} # person id -> [(-value, id)], built on first use; entries not matching the live value are stale
+        self.couples = 0
+
+    def best(self, person_id):
+        return self._best.get(person_id)
+
+    def changed(self, person, other_id):
+        """Call after person's relation with other_id was added, modified or removed."""
+        value = person.acquaintance.get(other_id)
+        heap = self._heaps.get(person.id)
+        if heap is not None and value is not None:
+            heapq.heappush(heap, (-value, other_id))
+            if len(heap) > 2 * len(person.acquaintance) + 16:
+                del self._heaps[person.id] # Mostly stale entries, rebuilt from the live relations when next needed
+        current = self._best.get(person.id)
+        if current == other_id:
+            self._set_best(person.id, self._pop_best(person))
+        elif value is not None and (current is None or (-value, other_id) < (-person.acquaintance[current], current)):
+            self._set_best(person.id, other_id)
+
+    def _pop_best(self, person):
+        heap = self._heaps.get(person.id)
+        if heap is None:
+            heap = self._heaps[person.id] = [(-value, acq_id) for acq_id, value in person.acquaintance.items()]
+            heapq.heapify(heap)
+        while heap and person.acquaintance.get(heap[0][1]) != -heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][1] if heap else None
+
+    def _set_best(self, person_id, best_id):
+        old_id = self._best.get(person_id)
+        if old_id == best_id:
+            return
+        if old_id is not None and self._best.get(old_id) == person_id:
+            self.couples -= 1
+        if best_id is None:
+            del self._best[person_id]
+        else:
+            self._best[person_id] = best_id
+            if self._best.get(best_id) == person_id:
+                self.couples += 1
+
 # --- Simulator Classes (with minor changes for efficiency) ---
 
 class TagSimulator:
     def __init__(self, tag_id):
         self.id = tag_id
         self.persons = set() # Set for O(1) add/remove/check
+        self.age_sum = 0
+        self.age_sq_sum = 0
 
-    def add_person(self, person_id):
-        self.persons.add(person_id)
+    def add_person(self, person): # Takes PersonSimulator object
+        self.persons.add(person.id)
+        person.in_tags[id(self)] = self
+        self.age_sum += person.age
+        self.age_sq_sum += person.age * person.age
 
     def has_person(self, person_id):
         return person_id in self.persons
 
-    def del_person(self, person_id):
-        self.persons.discard(person_id)
+    def del_person(self, person): # Takes PersonSimulator object
+        if person.id not in self.persons:
+            return
+        self.persons.discard(person.id)
+        person.in_tags.pop(id(self), None)
+        self.age_sum -= person.age
+        self.age_sq_sum -= person.age * person.age
 
     def get_size(self):
         return len(self.persons)
@@ -76,6 +204,14 @@ class TagSimulator:
         # Returning a list might be required by users, but internal checks use the set
         return list(self.persons)
 
+    def get_age_var(self):
+        # Same integer arithmetic as calculate_age_var: sum((age - mean)^2) = sq_sum - 2*mean*sum + n*mean^2
+        n = len(self.persons)
+        if n == 0:
+            return 0
+        mean = self.age_sum // n
+        return (self.age_sq_sum - 2 * mean * self.age_sum + n * mean * mean) // n
+
     def __eq__(self, other):
         if not isinstance(other, TagSimulator):
             return NotImplemented
@@ -91,6 +227,7 @@ class PersonSimulator:
         self.age = age
         self.acquaintance = {} # maps acquaintance_id -> value
         self.tags = {} # maps tag_id -> TagSimulator object
+        self.in_tags = {} # id(tag) -> TagSimulator object of every tag (of any owner) containing this person
 
     def is_linked(self, other_person_id):
         # O(1) average time complexity for dict lookup
@@ -162,6 +299,9 @@ class NetworkSimulator:
         self.er_static_count = 0
         # Optimization: Store triple sum count incrementally
         self.triple_sum_count = 0
+        self.connectivity = None # OfflineConnectivity when simulate() answers qci after the run; BFS otherwise
+        self.best_index = None   # AcquaintanceIndex when simulate() keeps qba/qcs answers up to date; scans otherwise
+        self.tag_aggregates = True # qtav from the tags' running sums; False rescans the members
 
     # _record_exception and _format_exception remain the same
 
@@ -250,6 +390,8 @@ class NetworkSimulator:
 
                 person1.add_link(id2, value)
                 person2.add_link(id1, value)
+                if self.connectivity is not None: self.connectivity.link(id1, id2)
+                if self.best_index is not None: self.best_index.changed(person1, id2); self.best_index.changed(person2, id1)
             return "Ok"
 
     def modify_relation(self, id1, id2, value):
@@ -273,6 +415,7 @@ class NetworkSimulator:
                 # Only update value, no change in structure or triple count
                 person1.add_link(id2, new_value)
                 person2.add_link(id1, new_value)
+                if self.best_index is not None: self.best_index.changed(person1, id2); self.best_index.changed(person2, id1)
             else:
                 # --- Optimization: Update triple sum count BEFORE removing link ---
                 neighbors1 = person1.get_neighbor_ids()
@@ -284,15 +427,17 @@ class NetworkSimulator:
                 # Remove relation
                 person1.remove_link(id2)
                 person2.remove_link(id1)
+                if self.connectivity is not None: self.connectivity.cut(id1, id2)
+                if self.best_index is not None: self.best_index.changed(person1, id2); self.best_index.changed(person2, id1)
 
                 # Remove from tags (This part's efficiency depends on number of tags)
                 # It iterates over tags of person1/2, checks if other person is present.
                 # If tag.persons is a set, has_person is O(1), del_person is O(1).
                 # Overall O(num_tags1 + num_tags2) in the worst case. Usually acceptable.
                 for tag in person1.tags.values():
-                    tag.del_person(id2) # discard is O(1)
+                    tag.del_person(person2) # O(1), no-op if not a member
                 for tag in person2.tags.values():
-                    tag.del_person(id1) # discard is O(1)
+                    tag.del_person(person1)
             return "Ok"
 
 
@@ -320,6 +465,7 @@ class NetworkSimulator:
             self._record_exception("pinf", id2); return self._format_exception("pinf", id2)
 
          if id1 == id2: return "true"
+         if self.connectivity is not None: return self.connectivity.query(id1, id2)
 
          # BFS Implementation
          queue = deque([id1])
@@ -379,11 +525,11 @@ class NetworkSimulator:
 
         # Size check O(1), add O(1)
         if tag.get_size() < 1000:
-             tag.add_person(person_id1)
+             tag.add_person(person1)
         return "Ok"
 
     def query_tag_age_var(self, person_id, tag_id):
-        # O(1) lookups + O(TagSize) to get ages + O(TagSize) for variance calc
+        # O(1) lookups + O(1) variance from the tag's running age sums
         if not self.contains_person(person_id):
             self._record_exception("pinf", person_id); return self._format_exception("pinf", person_id)
         person = self.get_person(person_id)
@@ -391,15 +537,12 @@ class NetworkSimulator:
             self._record_exception("tinf", tag_id); return self._format_exception("tinf", tag_id)
 
         tag = person.get_tag(tag_id)
-        person_ids_in_tag = tag.get_person_ids() # O(TagSize) to create list copy
-        ages = []
-        for pid in person_ids_in_tag: # O(TagSize) loop
-            p = self.get_person(pid) # O(1) lookup
-            if p: ages.append(p.age)
-            else: print(f"CHECKER WARNING: Person {pid} in tag {tag_id} not found.", file=sys.stderr)
+        if not self.tag_aggregates: return str(self._scan_tag_age_var(tag))
+        return str(tag.get_age_var()) # O(1), age sums are kept by the tag
 
-        age_var = calculate_age_var(ages) # O(TagSize) calculation
-        return str(age_var)
+    def _scan_tag_age_var(self, tag):
+        # Reference for the tag's running age sums (simulate(tag_aggregates=False)), O(TagSize)
+        return calculate_age_var([self.get_person(pid).age for pid in tag.get_person_ids()])
 
     def del_person_from_tag(self, person_id1, person_id2, tag_id):
         # O(1) complexity for lookups and set removal
@@ -416,7 +559,7 @@ class NetworkSimulator:
         if not tag.has_person(person_id1): # O(1) check
             self._record_exception("pinf", person_id1); return self._format_exception("pinf", person_id1)
 
-        tag.del_person(person_id1) # O(1) discard
+        tag.del_person(self.get_person(person_id1)) # O(1) discard
         return "Ok"
 
     def del_tag(self, person_id, tag_id):
@@ -427,15 +570,24 @@ class NetworkSimulator:
         if not person.contains_tag(tag_id):
             self._record_exception("tinf", tag_id); return self._format_exception("tinf", tag_id)
 
-        person.del_tag(tag_id) # O(1) pop
+        tag = person.get_tag(tag_id)
+        for pid in tag.persons: # O(TagSize), drop the tag from its members' reverse index
+            self.get_person(pid).in_tags.pop(id(tag), None)
+        person.del_tag(tag_id)
         return "Ok"
 
     def query_best_acquaintance(self, person_id):
-        # O(degree) to iterate through acquaintances
+        # O(1) with best_index, otherwise O(degree) to iterate through acquaintances
         if not self.contains_person(person_id):
             self._record_exception("pinf", person_id); return self._format_exception("pinf", person_id)
 
         person = self.get_person(person_id)
+        if self.best_index is not None:
+            best_id = self.best_index.best(person_id)
+            if best_id is None:
+                self._record_exception("anf", person_id); return self._format_exception("anf", person_id)
+            return str(best_id)
+
         acquaintances = person.get_acquaintance_ids_and_values() # O(degree)
 
         if not acquaintances:
@@ -456,35 +608,34 @@ class NetworkSimulator:
 
 # --- Main Checker Logic (largely unchanged, relies on faster NetworkSimulator) ---
 
-def run_checker(stdin_path, stdout_path):
+LOAD_COMMANDS = ("ln", "load_network", "lnl", "load_network_local")
+GOLDEN_VERSION = 1 # Bump when simulate()'s record format changes
+
+
+def simulate(input_lines, offline_connectivity=True, best_index=True, tag_aggregates=True):
+    """
+    Expected side of the check: replays the input through NetworkSimulator once.
+    Returns {"commands", "records", "exceptions"}; records holds one
+    [command_number, command, expected, error] entry per command that prints a line,
+    error being a checker-side failure that rejects any output reaching it (the
+    simulation stops there). Nothing here depends on the JAR's output, so the result
+    can be cached per input and diffed against every JAR with compare_output().
+    offline_connectivity=False answers qci with a BFS at the time of the query,
+    best_index=False answers qba by scanning the acquaintances and
+    tag_aggregates=False answers qtav by rescanning the tag's members.
+    """
     network = NetworkSimulator()
-    result_status = "Accepted"
-    error_details = []
-
-    try:
-        with open(stdin_path, 'r', encoding='utf-8') as f_in:
-            input_lines = [line.strip() for line in f_in if line.strip()]
-    except FileNotFoundError:
-        result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Input file not found: {stdin_path}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
-    except Exception as e:
-        result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Failed to read input file {stdin_path}: {e}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
-
-    try:
-        with open(stdout_path, 'r', encoding='utf-8') as f_out:
-            output_lines = [line.strip() for line in f_out if line.strip()]
-    except FileNotFoundError:
-        result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Output file not found: {stdout_path}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
-    except Exception as e:
-        result_status = "Rejected"; error_details.append({"reason": f"Checker Error: Failed to read output file {stdout_path}: {e}"}); print(json.dumps({"result": result_status, "errors": error_details}, indent=4)); sys.exit(0)
-
+    if offline_connectivity:
+        network.connectivity = OfflineConnectivity()
+    if best_index:
+        network.best_index = AcquaintanceIndex()
+    network.tag_aggregates = tag_aggregates
+    records = []
 
     input_idx = 0
-    output_idx = 0
     command_num = 0
 
     while input_idx < len(input_lines):
-        if result_status == "Rejected": break
-
         command_num += 1
         cmd_line = input_lines[input_idx]
         input_idx += 1
@@ -496,40 +647,33 @@ def run_checker(stdin_path, stdout_path):
         # --- Handle load_network specially (Efficiency relies on base add_person/add_relation) ---
         if cmd in ("ln", "load_network", "lnl", "load_network_local"):
              load_expected_output = "Ok"
-             load_actual_output = None
-
-             if output_idx >= len(output_lines):
-                 result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": load_expected_output, "actual": None, "reason": f"Missing output for {cmd}"}); break
-             load_actual_output = output_lines[output_idx]
-             output_idx += 1
 
              if len(parts) < 2:
-                  result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output, "reason": f"Malformed {cmd} command"}); break
+                  records.append([command_num, cmd_line, None, f"Malformed {cmd} command"]); break
              n_str = parts[1]; n = parse_int(n_str)
              if n is None or n < 0:
-                  result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output, "reason": f"Invalid count '{n_str}' in {cmd}"}); break
+                  records.append([command_num, cmd_line, None, f"Invalid count '{n_str}' in {cmd}"]); break
 
              source_lines = []; source_idx_offset = 0; load_file_error = False
              if cmd in ("lnl", "load_network_local"):
                   if len(parts) < 3:
-                       result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output, "reason": f"Missing filename for {cmd}"}); break
+                       records.append([command_num, cmd_line, None, f"Missing filename for {cmd}"]); break
                   filename = parts[2]
                   try:
                        with open(filename, 'r', encoding='utf-8') as f_load:
                             source_lines = [line.strip() for line in f_load if line.strip()]
                        if len(source_lines) < n + 3: # Need n+3 lines: ids, names, ages, n relation lines
-                            result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": None, "actual": load_actual_output, "reason": f"File {filename} insufficient data (expected {n+3} lines, got {len(source_lines)})"}); break
+                            records.append([command_num, cmd_line, None, f"File {filename} insufficient data (expected {n+3} lines, got {len(source_lines)})"]); break
                   except FileNotFoundError: load_file_error = True; load_expected_output = "File not found"
-                  except Exception as e: result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Error reading load file {filename}: {e}"}); break
+                  except Exception as e: records.append([command_num, cmd_line, None, f"Error reading load file {filename}: {e}"]); break
              else: # ln
                   # Need n+3 lines from stdin: ids, names, ages, n relation lines
                   required_lines = n + 3
                   if input_idx + required_lines -1 > len(input_lines): # -1 because cmd_line already read
-                      result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Insufficient lines in stdin for {cmd} {n} (expected {required_lines})"}); break
+                      records.append([command_num, cmd_line, None, f"Insufficient lines in stdin for {cmd} {n} (expected {required_lines})"]); break
                   source_lines = input_lines; source_idx_offset = input_idx; input_idx += required_lines
 
-             if load_actual_output != load_expected_output:
-                  result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": load_expected_output, "actual": load_actual_output, "reason": "Output mismatch for load command"}); break
+             records.append([command_num, cmd_line, load_expected_output, None])
              if load_file_error: continue
 
              # Simulate load - This now benefits from faster add_relation's triple sum update
@@ -554,16 +698,10 @@ def run_checker(stdin_path, stdout_path):
                             if value is None or value < 0: raise ValueError(f"Invalid value on line {i}")
                             if value > 0: network.add_relation(ids[i], ids[j], value) # Ignore "Ok"
              except Exception as e:
-                  result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Checker error during load sim: {type(e).__name__} {e}"}); break
+                  records[-1][3] = f"Checker error during load sim: {type(e).__name__} {e}"; break
              continue # Move to next command from input
 
         # --- Handle regular commands ---
-        actual_output = None
-        if output_idx >= len(output_lines):
-             result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": "???", "actual": None, "reason": "Missing output"}); break
-        actual_output = output_lines[output_idx]
-        output_idx += 1
-
         # Simulate command using the (now faster) NetworkSimulator methods
         try:
             # --- Command dispatching (same as before) ---
@@ -617,24 +755,210 @@ def run_checker(stdin_path, stdout_path):
                  raise ValueError(f"Unknown or malformed command: '{cmd_line}'")
 
         except ValueError as e:
-             result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Checker Error: Invalid args/cmd: {e}"}); break
+             records.append([command_num, cmd_line, None, f"Checker Error: Invalid args/cmd: {e}"]); break
         except Exception as e:
-             result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "reason": f"Checker Error: Sim Error: {type(e).__name__} {e}"}); break
+             records.append([command_num, cmd_line, None, f"Checker Error: Sim Error: {type(e).__name__} {e}"]); break
+
+        records.append([command_num, cmd_line, expected_output, None])
+
+    if network.connectivity is not None:
+        network.connectivity.resolve()
+        for record in records:
+            if isinstance(record[2], PendingAnswer): record[2] = record[2].text
+
+    return {"commands": command_num, "records": records, "exceptions": _exception_totals(network)}
+
+
+def _exception_totals(network):
+    """Final per-type exception counters of a simulation, stored alongside the expected lines."""
+    return {exc_type: counter["total"] for exc_type, counter in network.exception_counts.items()}
+
+
+def _normalize_output(cmd, line):
+    return line
 
-        # Compare expected vs actual
-        if actual_output != expected_output:
-             result_status = "Rejected"; error_details.append({"command_number": command_num, "command": cmd_line, "expected": expected_output, "actual": actual_output, "reason": "Output mismatch"}); break
 
-    # Final Check for Extra Output
-    if result_status == "Accepted" and output_idx < len(output_lines):
-        result_status = "Rejected"; error_details.append({"command_number": command_num + 1, "reason": "Extra output", "actual": output_lines[output_idx]})
+def compare_output(golden, output_lines):
+    """
+    Streaming diff of a JAR's output (any iterable of lines, e.g. an open file) against
+    simulate()'s result. Reading stops at the first difference. Returns the checker's
+    {"result", "errors"} dict.
+    """
+    actual_lines = (line.strip() for line in output_lines)
+    actual_lines = (line for line in actual_lines if line)
+    for command_num, cmd_line, expected, error in golden["records"]:
+        cmd = cmd_line.split()[0]
+        is_load = cmd in LOAD_COMMANDS
+        actual = next(actual_lines, None)
+        if actual is None:
+            if is_load: return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": expected, "actual": None, "reason": f"Missing output for {cmd}"}]}
+            return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": "???", "actual": None, "reason": "Missing output"}]}
+        if error is not None:
+            return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "actual": actual, "reason": error}]}
+        if is_load:
+            if actual != expected:
+                return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": expected, "actual": actual, "reason": "Output mismatch for load command"}]}
+            continue
+        expected, actual = _normalize_output(cmd, expected), _normalize_output(cmd, actual)
+        if actual != expected:
+            return {"result": "Rejected", "errors": [{"command_number": command_num, "command": cmd_line, "expected": expected, "actual": actual, "reason": "Output mismatch"}]}
 
-    # Output JSON Result
-    final_result = {"result": result_status, "errors": error_details}
+    extra = next(actual_lines, None)
+    if extra is not None:
+        return {"result": "Rejected", "errors": [{"command_number": golden["commands"] + 1, "reason": "Extra output", "actual": extra}]}
+    return {"result": "Accepted", "errors": []}
+
+
+def read_input_lines(stdin_path):
+    with open(stdin_path, 'r', encoding='utf-8') as f_in:
+        return [line.strip() for line in f_in if line.strip()]
+
+
+def run_checker(stdin_path, stdout_path):
+    try:
+        input_lines = read_input_lines(stdin_path)
+    except FileNotFoundError: print(json.dumps({"result": "Rejected", "errors": [{"reason": f"Checker Error: Input file not found: {stdin_path}"}]}, indent=4)); sys.exit(0)
+    except Exception as e: print(json.dumps({"result": "Rejected", "errors": [{"reason": f"Checker Error: Failed to read input file {stdin_path}: {e}"}]}, indent=4)); sys.exit(0)
+
+    golden = simulate(input_lines)
+    try:
+        with open(stdout_path, 'r', encoding='utf-8') as f_out:
+            final_result = compare_output(golden, f_out)
+    except FileNotFoundError: final_result = {"result": "Rejected", "errors": [{"reason": f"Checker Error: Output file not found: {stdout_path}"}]}
+    except Exception as e: final_result = {"result": "Rejected", "errors": [{"reason": f"Checker Error: Failed to read output file {stdout_path}: {e}"}]}
     print(json.dumps(final_result, indent=4, ensure_ascii=False))
 
 
+def write_golden(stdin_path, golden_path):
+    """Simulates stdin_path once and stores the expected side as JSON (test.py's golden cache)."""
+    golden = simulate(read_input_lines(stdin_path))
+    golden["version"] = GOLDEN_VERSION
+    with open(golden_path, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, ensure_ascii=False)
+
+
+# Reference settings of simulate() timed by --bench against the default ones
+BENCH_VARIANTS = {
+    "qci by BFS": {"offline_connectivity": False},
+    "qba by scan": {"best_index": False},
+    "qtav by scan": {"tag_aggregates": False},
+}
+
+
+def benchmark(stdin_path):
+    """Times simulate() on stdin_path with each BENCH_VARIANTS entry and checks the expected side is unchanged."""
+    input_lines = read_input_lines(stdin_path)
+    start = time.perf_counter()
+    golden = simulate(input_lines)
+    print(f"default: {time.perf_counter() - start:.3f}s")
+    all_same = True
+    for name, kwargs in BENCH_VARIANTS.items():
+        start = time.perf_counter()
+        same = simulate(input_lines, **kwargs) == golden
+        print(f"{name}: {time.perf_counter() - start:.3f}s, {'same output' if same else 'OUTPUT DIFFERS'}")
+        all_same = all_same and same
+    return all_same
+
+
+# Random command streams run by --fuzz. Each one stresses the state an optimisation keeps
+# up to date and is simulated with the default settings and with that optimisation's
+# BENCH_VARIANTS entry; both must print the same lines. Stream k of a generator is seeded
+# with "<name>-<seed>-<k>", so a failing one can be regenerated on its own.
+
+def _fuzz_connectivity_stream(rng):
+    """
+    People join mid-run and relations come, go (mr below zero) and come back, some of them
+    between two qci, so the offline answers meet every kind of relation lifetime. Two ids
+    past the last person are never added, for qci on unknown people.
+    """
+    people = rng.randint(2, 12)
+    added = rng.randint(1, people)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(added)]
+    for _ in range(rng.randint(100, 400)):
+        a, b = rng.randrange(people + 2), rng.randrange(people + 2)
+        r = rng.random()
+        if r < 0.05 and added < people:
+            lines.append(f"ap {added} p{added} {rng.randint(1, 100)}")
+            added += 1
+        elif r < 0.3: lines.append(f"ar {a} {b} {rng.randint(1, 10)}")
+        elif r < 0.45: lines.append(f"mr {a} {b} {rng.randint(-15, 5)}")
+        elif r < 0.5: lines += [f"ar {a} {b} 3", f"mr {a} {b} -3"]
+        else: lines.append(f"qci {a} {b}")
+    return lines
+
+
+def _fuzz_tag_stream(rng):
+    """Members join and leave tags while relations between them change and disappear (mr below zero)."""
+    people = rng.randint(3, 12)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(people)]
+    lines += [f"ar {a} {b} {rng.randint(1, 20)}" for a in range(people) for b in range(a) if rng.random() < 0.8]
+    lines += [f"at {a} {t}" for a in range(people) for t in range(3)]
+    for _ in range(rng.randint(200, 600)):
+        a, b, t = rng.randrange(people), rng.randrange(people), rng.randrange(3)
+        r = rng.random()
+        if r < 0.1: lines.append(f"ar {a} {b} {rng.randint(1, 20)}")
+        elif r < 0.25: lines.append(f"mr {a} {b} {rng.randint(-12, 12)}")
+        elif r < 0.28: lines.append(f"at {a} {t}")
+        elif r < 0.6: lines.append(f"att {a} {b} {t}")
+        elif r < 0.67: lines.append(f"dft {a} {b} {t}")
+        elif r < 0.7: lines.append(f"dt {a} {t}")
+        else: lines.append(f"qtav {a} {t}")
+    return lines
+
+
+def _fuzz_acquaintance_stream(rng):
+    """
+    Few people and many mr, so best acquaintances are lowered, removed, tied and restored
+    (mr -2 then +2 takes a 5 to 3 and back) and the per-person heaps go stale, get trimmed
+    and are rebuilt.
+    """
+    people = rng.randint(2, 10)
+    lines = [f"ap {i} p{i} {rng.randint(1, 100)}" for i in range(people)]
+    for _ in range(rng.randint(300, 800)):
+        a, b = rng.randrange(people), rng.randrange(people)
+        r = rng.random()
+        if r < 0.15: lines.append(f"ar {a} {b} {rng.randint(1, 10)}")
+        elif r < 0.3: lines.append(f"mr {a} {b} {rng.choice((-2, 2))}")
+        elif r < 0.4: lines.append(f"mr {a} {b} {rng.randint(-12, 8)}")
+        elif r < 0.45: lines += [f"mr {a} {b} -2", f"qba {a}", f"mr {a} {b} 2"]
+        else: lines.append(f"qba {a}")
+    return lines
+
+
+# name -> (stream generator, BENCH_VARIANTS entry it is checked against)
+FUZZ_STREAMS = {
+    "connectivity": (_fuzz_connectivity_stream, "qci by BFS"),
+    "acquaintances": (_fuzz_acquaintance_stream, "qba by scan"),
+    "tags": (_fuzz_tag_stream, "qtav by scan"),
+}
+
+
+def fuzz(streams=200, seed=0):
+    """Simulates streams random inputs of every FUZZ_STREAMS generator both ways; True if all outputs match."""
+    all_same = True
+    for name, (generate, variant) in FUZZ_STREAMS.items():
+        for k in range(streams):
+            input_lines = generate(random.Random(f"{name}-{seed}-{k}"))
+            if simulate(input_lines, **BENCH_VARIANTS[variant]) != simulate(input_lines):
+                print(f"{name}: stream {name}-{seed}-{k} differs from '{variant}'")
+                all_same = False
+                break
+        else:
+            print(f"{name}: {streams} streams, same output as '{variant}'")
+    return all_same
+
+
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--bench":
+        # python checker.py --bench <stdin_file>
+        sys.exit(0 if benchmark(sys.argv[2]) else 1)
+    if len(sys.argv) in (2, 3) and sys.argv[1] == "--fuzz":
+        # python checker.py --fuzz [streams]
+        sys.exit(0 if fuzz(int(sys.argv[2]) if len(sys.argv) == 3 else 200) else 1)
+    if len(sys.argv) == 4 and sys.argv[1] == "--golden":
+        # python checker.py --golden <stdin_file> <golden_json>
+        write_golden(sys.argv[2], sys.argv[3])
+        sys.exit(0)
     if len(sys.argv) != 3:
         print("Usage: python checker.py <stdin_file> <stdout_file>", file=sys.stderr)
         print(json.dumps({"result": "Rejected", "errors": [{"reason": "Checker usage error: Incorrect number of arguments"}]}, indent=4))
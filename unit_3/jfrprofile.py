@@ -0,0 +1,188 @@
+# jfrprofile.py
+# Opt-in Java Flight Recorder profiling (test.profile in config.yml). Selected JARs are
+# launched with -XX:StartFlightRecording into TMP_DIR; after each run the recording is
+# read back with the JDK `jfr` tool and folded into per-JAR counters, so hot methods and
+# allocation sites are aggregated over all rounds and shown in the final summary. JARs the
+# harness kills (TLE, CTLE, early stop) are asked for their recording with `jcmd JFR.dump`
+# first: the kill follows SIGTERM after about a second, too soon for a dump on exit.
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from collections import Counter, defaultdict
+
+TOP_N = 5                # Entries per table in the report
+JFR_PRINT_TIMEOUT = 120  # seconds for one `jfr print` call
+JFR_DUMP_TIMEOUT = 15    # seconds a kill waits for `jcmd JFR.dump`
+RECORDING_NAME = "oo_profile"
+STACK_DEPTH = 64         # Deep enough to get past JDK frames to the user's method
+JFR_EVENTS = "jdk.ExecutionSample,jdk.ObjectAllocationSample"
+JDK_PACKAGES = ("java.", "javax.", "jdk.", "sun.", "com.sun.")
+
+
+def java_options(recording_path):
+    """
+    JVM flags that record with the 'profile' settings and write the file when the JVM exits
+    on its own. Killed JVMs rarely finish that dump, see Profiler.dump_before_kill().
+    """
+    return [f"-XX:StartFlightRecording=name={RECORDING_NAME},filename={recording_path},settings=profile,dumponexit=true"]
+
+
+def killed_path(recording_path):
+    """Where dump_before_kill() writes; not recording_path, which the dying JVM may still truncate."""
+    return os.path.splitext(recording_path)[0] + "_killed.jfr"
+
+
+def find_jdk_tool(name):
+    tool = shutil.which(name)
+    if tool is None and os.environ.get("JAVA_HOME"):
+        candidate = os.path.join(os.environ["JAVA_HOME"], "bin", f"{name}.exe" if os.name == "nt" else name)
+        tool = candidate if os.path.isfile(candidate) else None
+    return tool
+
+
+def find_jfr_tool():
+    return find_jdk_tool("jfr")
+
+
+def _frame_name(frame):
+    method = frame.get("method") or {}
+    class_name = ((method.get("type") or {}).get("name") or "?").replace("/", ".")
+    return f"{class_name}.{method.get('name', '?')}"
+
+
+def _top_frames(event):
+    """(top frame, first non-JDK frame) of an event's stack trace, (None, None) without one."""
+    frames = ((event.get("values") or {}).get("stackTrace") or {}).get("frames") or []
+    if not frames:
+        return None, None
+    names = [_frame_name(f) for f in frames]
+    user = next((n for n in names if not n.startswith(JDK_PACKAGES)), names[0])
+    return names[0], user
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+
+
+class Profiler:
+    """Per-JAR aggregation of JFR recordings, safe to feed from parallel rounds."""
+
+    def __init__(self, tmp_dir, jars=None):
+        self.tmp_dir = tmp_dir
+        self.jars = set(jars) if jars else None # None profiles every JAR
+        self.jfr_tool = find_jfr_tool()
+        self.jcmd_tool = find_jdk_tool("jcmd")
+        self._lock = threading.Lock()
+        self._profiles = defaultdict(lambda: {"recordings": 0, "samples": 0, "self": Counter(),
+                                               "user": Counter(), "alloc": Counter(), "alloc_total": 0.0})
+
+    def selected(self, jar_name):
+        return self.jars is None or jar_name in self.jars
+
+    def recording_path(self, jar_name, round_num):
+        safe_name = re.sub(r'[^\w.-]', '_', jar_name)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return os.path.abspath(os.path.join(self.tmp_dir, f"profile_{safe_name}_{round_num}.jfr"))
+
+    def dump_before_kill(self, pid, recording_path):
+        """
+        Asks the still-running JVM pid to write its recording to killed_path(recording_path)
+        and waits for it (at most JFR_DUMP_TIMEOUT). Call right before killing a profiled JAR.
+        """
+        if self.jcmd_tool is None:
+            return False
+        path = killed_path(recording_path)
+        try:
+            completed = subprocess.run(
+                [self.jcmd_tool, str(pid), "JFR.dump", f"name={RECORDING_NAME}", f"filename={path}"],
+                capture_output=True, text=True, encoding="utf-8", errors="replace", timeout=JFR_DUMP_TIMEOUT
+            )
+        except (subprocess.TimeoutExpired, OSError) as e:
+            print(f"WARNING: jcmd JFR.dump failed for PID {pid}: {e}", file=sys.stderr)
+            return False
+        return completed.returncode == 0 and os.path.exists(path)
+
+    def _read_events(self, path):
+        """Events of one recording file, None if it can't be read (missing, truncated, no jfr tool)."""
+        if self.jfr_tool is None or not os.path.exists(path):
+            return None
+        try:
+            completed = subprocess.run(
+                [self.jfr_tool, "print", "--json", "--stack-depth", str(STACK_DEPTH), "--events", JFR_EVENTS, path],
+                capture_output=True, text=True, encoding="utf-8", errors="replace", timeout=JFR_PRINT_TIMEOUT
+            )
+            if completed.returncode != 0:
+                print(f"WARNING: jfr print failed for {path}: {completed.stderr.strip()}", file=sys.stderr)
+                return None
+            return json.loads(completed.stdout).get("recording", {}).get("events", [])
+        except (subprocess.TimeoutExpired, OSError, ValueError) as e:
+            print(f"WARNING: Could not read JFR recording {path}: {e}", file=sys.stderr)
+            return None
+
+    def add_recording(self, jar_name, recording_path):
+        """
+        Parses one run's recording into the JAR's totals and removes its files. A dump taken
+        before a kill is preferred over the exit recording. Returns False (keeping the files) on failure.
+        """
+        events = self._read_events(killed_path(recording_path))
+        if events is None:
+            events = self._read_events(recording_path)
+        if events is None:
+            return False
+
+        self_counts, user_counts, alloc = Counter(), Counter(), Counter()
+        samples = 0
+        for event in events:
+            top, user = _top_frames(event)
+            if top is None:
+                continue
+            if event.get("type") == "jdk.ExecutionSample":
+                samples += 1
+                self_counts[top] += 1
+                user_counts[user] += 1
+            elif event.get("type") == "jdk.ObjectAllocationSample":
+                values = event["values"]
+                object_class = ((values.get("objectClass") or {}).get("name") or "?").replace("/", ".")
+                alloc[f"{user} [{object_class}]"] += float(values.get("weight") or 0)
+
+        with self._lock:
+            profile = self._profiles[jar_name]
+            profile["recordings"] += 1
+            profile["samples"] += samples
+            profile["self"].update(self_counts)
+            profile["user"].update(user_counts)
+            profile["alloc"].update(alloc)
+            profile["alloc_total"] += sum(alloc.values())
+        for path in (recording_path, killed_path(recording_path)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return True
+
+    def report_lines(self, top=TOP_N):
+        with self._lock:
+            profiles = {jar: dict(p) for jar, p in self._profiles.items()}
+        if not profiles:
+            return []
+        lines = ["\n--- JFR Profile (aggregated across rounds) ---"]
+        for jar_name in sorted(profiles):
+            p = profiles[jar_name]
+            lines.append(f"{jar_name}: {p['samples']} execution samples, {_format_bytes(p['alloc_total'])} sampled allocations, {p['recordings']} recording(s)")
+            for title, counter in (("Hot methods (self)", p["self"]), ("Hot methods (first non-JDK frame)", p["user"])):
+                if counter:
+                    lines.append(f"  {title}:")
+                    for name, count in counter.most_common(top):
+                        lines.append(f"    {100.0 * count / p['samples']:5.1f}% {count:>7}  {name}")
+            if p["alloc"] and p["alloc_total"] > 0:
+                lines.append("  Allocation hot spots:")
+                for site, size in p["alloc"].most_common(top):
+                    lines.append(f"    {100.0 * size / p['alloc_total']:5.1f}% {_format_bytes(size):>10}  {site}")
+        return lines
@@ -0,0 +1,94 @@
+# outputvote.py
+# N-version voting over one round's outputs. Most JARs print byte-identical output for
+# the same input, so outputs are grouped by their per-block hashes and the checker only
+# runs once per distinct output; the other members of a group reuse that verdict. The
+# block hashes also locate where a group's output first departs from the majority's.
+import hashlib
+import threading
+
+BLOCK_LINES = 256        # Output lines per hashed block
+VERDICT_TIMEOUT = 120.0  # seconds a member waits for its representative's checker before checking itself
+
+
+def block_hashes(content):
+    """Hashes of content split into blocks of BLOCK_LINES lines."""
+    lines = content.splitlines(keepends=True)
+    return [
+        hashlib.blake2b("".join(lines[i:i + BLOCK_LINES]).encode("utf-8", errors="replace"), digest_size=16).hexdigest()
+        for i in range(0, len(lines), BLOCK_LINES)
+    ]
+
+
+class OutputGroup:
+    """JARs with byte-identical output; the first to finish is checked for all of them."""
+
+    def __init__(self, key, hashes, representative):
+        self.key = key
+        self.hashes = hashes
+        self.representative = representative
+        self.members = [representative]
+        self.verdict = None # (checker_status, checker_details) once the representative was checked
+        self._settled = threading.Event()
+
+    def settle(self, verdict):
+        """verdict None (representative's check failed unexpectedly) makes members check themselves."""
+        self.verdict = verdict
+        self._settled.set()
+
+    def wait(self, timeout=VERDICT_TIMEOUT):
+        return self.verdict if self._settled.wait(timeout) else None
+
+
+class RoundVote:
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def join(self, jar_name, content):
+        """(group, True if jar_name is its representative and must run the checker)."""
+        hashes = block_hashes(content)
+        key = hashlib.sha256("".join(hashes).encode()).hexdigest()
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = OutputGroup(key, hashes, jar_name)
+                return group, True
+            group.members.append(jar_name)
+            return group, False
+
+    def majority(self):
+        """The largest group, ties going to the one formed first; None for an empty round."""
+        with self._lock:
+            groups = list(self._groups.values())
+        return max(groups, key=lambda g: len(g.members), default=None)
+
+    def first_divergent_block(self, group):
+        """(block index, first line, last line) where group first differs from the majority, None for the majority itself."""
+        majority = self.majority()
+        if majority is None or majority is group:
+            return None
+        for i in range(max(len(group.hashes), len(majority.hashes))):
+            if i >= len(group.hashes) or i >= len(majority.hashes) or group.hashes[i] != majority.hashes[i]:
+                return i, i * BLOCK_LINES + 1, (i + 1) * BLOCK_LINES
+        return None
+
+    def annotate(self, results):
+        """
+        Adds {representative, size, divergent_block} as result["output_group"] for every
+        result that took part in the vote (marked with result["output_group_key"]), and
+        returns (distinct outputs, verdicts reused).
+        """
+        with self._lock:
+            groups = dict(self._groups)
+        majority = self.majority()
+        for r in results:
+            group = groups.get(r.pop("output_group_key", None))
+            if group is None:
+                continue
+            r["output_group"] = {
+                "representative": group.representative,
+                "size": len(group.members),
+                "divergent_block": self.first_divergent_block(group) if len(groups) > 1 else None,
+                "majority_size": len(majority.members),
+            }
+        return len(groups), sum(len(g.members) - 1 for g in groups.values())
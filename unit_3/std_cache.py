@@ -0,0 +1,182 @@
+# std_cache.py
+# Content-addressed cache of standard-JAR outputs: (std jar hash, input hash) -> stdout + metadata.
+# Shared by the hack / checker scripts so a known input never reruns the std JAR.
+import hashlib
+import json
+import os
+import subprocess
+import time
+
+ENV_CACHE_DIR = "OO_STD_CACHE_DIR"       # Exported by configure() so worker processes / checker subprocesses agree
+ENV_CACHE_MAX_MB = "OO_STD_CACHE_MAX_MB"
+DEFAULT_CACHE_DIR = os.path.join("tmp", "std_cache")
+DEFAULT_MAX_MB = 512
+EVICT_TARGET_RATIO = 0.9 # Evict down to 90% of the limit so we don't rescan on every store
+
+_default_cache = None
+
+
+class StdRunResult:
+    """Mirrors the subprocess.CompletedProcess fields callers use, plus run metadata."""
+
+    def __init__(self, returncode, stdout, stderr, run_time, cached=False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.run_time = run_time
+        self.cached = cached
+
+
+class StdOutputCache:
+    """
+    On-disk layout: <cache_dir>/<jar hash[:16]>/<input sha256>.out plus a .json with
+    {exit_code, run_time, created, std_jar, input_size}. Entry mtimes are bumped on
+    every hit, eviction removes the least recently used entries once the directory
+    grows beyond max_bytes. Only successful (exit code 0) runs are stored.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self._jar_hashes = {} # (abs path, size, mtime_ns) -> sha256
+
+    def jar_hash(self, jar_path):
+        st = os.stat(jar_path)
+        memo_key = (os.path.abspath(jar_path), st.st_size, st.st_mtime_ns)
+        digest = self._jar_hashes.get(memo_key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(jar_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self._jar_hashes[memo_key] = digest
+        return digest
+
+    def _entry_base(self, jar_digest, input_bytes):
+        input_digest = hashlib.sha256(input_bytes).hexdigest()
+        return os.path.join(self.cache_dir, jar_digest[:16], input_digest)
+
+    def lookup(self, jar_path, input_bytes):
+        """Returns a cached StdRunResult or None."""
+        base = self._entry_base(self.jar_hash(jar_path), input_bytes)
+        try:
+            with open(base + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(base + ".out", "r", encoding="utf-8", newline="") as f:
+                stdout = f.read()
+        except (OSError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(base + ".out") # LRU bookkeeping
+        except OSError:
+            pass
+        return StdRunResult(meta.get("exit_code", 0), stdout, "", meta.get("run_time", 0.0), cached=True)
+
+    def store(self, jar_path, input_bytes, result):
+        if result.returncode != 0:
+            return
+        base = self._entry_base(self.jar_hash(jar_path), input_bytes)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        meta = {
+            "exit_code": result.returncode, "run_time": round(result.run_time, 4), "created": time.time(),
+            "std_jar": os.path.basename(jar_path), "input_size": len(input_bytes),
+        }
+        # Write-then-rename so parallel workers never observe half-written entries
+        suffix = f".tmp{os.getpid()}"
+        try:
+            with open(base + ".out" + suffix, "w", encoding="utf-8", newline="") as f:
+                f.write(result.stdout)
+            with open(base + ".json" + suffix, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(base + ".out" + suffix, base + ".out")
+            os.replace(base + ".json" + suffix, base + ".json")
+        except OSError as e:
+            print(f"WARNING: Failed to store std output in cache '{self.cache_dir}': {e}")
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries while the cache exceeds max_bytes."""
+        entries = []
+        total = 0
+        try:
+            jar_dirs = [d.path for d in os.scandir(self.cache_dir) if d.is_dir()]
+        except OSError:
+            return
+        for jar_dir in jar_dirs:
+            try:
+                for entry in os.scandir(jar_dir):
+                    if not entry.name.endswith(".out"):
+                        continue
+                    base = entry.path[:-len(".out")]
+                    st = entry.stat()
+                    try:
+                        size = st.st_size + os.path.getsize(base + ".json")
+                    except OSError:
+                        size = st.st_size
+                    entries.append((st.st_mtime, size, base))
+                    total += size
+            except OSError:
+                continue
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        entries.sort()
+        for _, size, base in entries:
+            if total <= target:
+                break
+            for path in (base + ".out", base + ".json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass # Another process may have evicted it already
+            total -= size
+
+    def run(self, jar_path, stdin_path, timeout=None):
+        """
+        Std output for stdin_path, from the cache when possible. On a miss runs
+        `java -jar` like the callers used to; TimeoutExpired / FileNotFoundError propagate.
+        """
+        with open(stdin_path, "rb") as f:
+            input_bytes = f.read()
+        cached = self.lookup(jar_path, input_bytes)
+        if cached is not None:
+            return cached
+        start = time.monotonic()
+        with open(stdin_path, "r", encoding="utf-8") as stdin_file:
+            proc = subprocess.run(
+                ["java", "-jar", os.path.abspath(jar_path)],
+                stdin=stdin_file,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                check=False,
+                timeout=timeout
+            )
+        result = StdRunResult(proc.returncode, proc.stdout, proc.stderr, time.monotonic() - start)
+        self.store(jar_path, input_bytes, result)
+        return result
+
+
+def configure(cache_dir=None, max_mb=None):
+    """Sets the process-wide cache location/limit and exports it to child processes."""
+    global _default_cache
+    if cache_dir:
+        os.environ[ENV_CACHE_DIR] = os.path.abspath(cache_dir)
+    if max_mb:
+        os.environ[ENV_CACHE_MAX_MB] = str(max_mb)
+    _default_cache = None
+    return get_cache()
+
+
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        cache_dir = os.environ.get(ENV_CACHE_DIR, DEFAULT_CACHE_DIR)
+        try:
+            max_mb = float(os.environ.get(ENV_CACHE_MAX_MB, DEFAULT_MAX_MB))
+        except ValueError:
+            max_mb = DEFAULT_MAX_MB
+        _default_cache = StdOutputCache(cache_dir, int(max_mb * 1024 * 1024))
+    return _default_cache
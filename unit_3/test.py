@@ -19,6 +19,16 @@ import random # Added for preset selection
 import traceback # For logging errors from threads
 import yaml
 import json # Needed for parsing checker output
+import importlib
+
+current_package = __name__.rsplit('.', 1)[0] if '.' in __name__ else ''
+std_cache = importlib.import_module(f"{current_package}.std_cache" if current_package else "std_cache")
+artifact_store = importlib.import_module(f"{current_package}.artifact_store" if current_package else "artifact_store")
+threaddump = importlib.import_module(f"{current_package}.threaddump" if current_package else "threaddump")
+jfrprofile = importlib.import_module(f"{current_package}.jfrprofile" if current_package else "jfrprofile")
+golden_cache = importlib.import_module(f"{current_package}.golden_cache" if current_package else "golden_cache")
+divergence = importlib.import_module(f"{current_package}.divergence" if current_package else "divergence")
+outputvote = importlib.import_module(f"{current_package}.outputvote" if current_package else "outputvote")
 
 # --- Default Configuration, will be replaced by config.yml ---
 CPU_TIME_LIMIT = 10.0  # seconds
@@ -28,6 +38,7 @@ MIN_WALL_TIME_LIMIT = 10.0 # seconds - This will now be the FIXED wall time limi
 ENABLE_DETAILED_DEBUG = False # Set to True for verbose debugging
 LOG_DIR = "logs" # Define log directory constant
 TMP_DIR = "tmp"  # Define temporary file directory constant
+ERROR_LOG_STDOUT_TAIL_LINES = 20 # Stdout lines quoted in error logs when outputs live in the artifact store
 DEFAULT_GEN_MAX_TIME = 50.0 # Default generator -t value if not specified in preset (NO LONGER USED FOR WALL LIMIT)
 DEFAULT_PARALLEL_ROUNDS = 16 # Default number of rounds to run in parallel
 CLEANUP_SUCCESSFUL_ROUNDS = True
@@ -51,6 +62,12 @@ class JarTester:
     _interrupted = False # Global interrupt flag
     _round_counter = 0 # Global counter for assigning round numbers
     _log_file_path = None
+    _artifact_store = None # artifact_store.ArtifactStore when test.artifact_store is enabled
+    _profiler = None # jfrprofile.Profiler when test.profile is enabled
+    _golden_cache = None # golden_cache.GoldenCache unless disabled (test.golden_cache) or in custom checker mode
+    _early_stop = True # Kill a JAR at its first output line that differs from the golden (test.early_stop)
+    _output_vote = True # Check each distinct output of a round once (test.output_vote)
+    _round_votes = {} # round_num -> outputvote.RoundVote of the running round
     # Modified History: Stores correct/total counts, no scores list needed
     _all_results_history = defaultdict(lambda: {'correct_runs': 0, 'total_runs': 0})
     _gen_arg_presets = []
@@ -129,14 +146,18 @@ class JarTester:
             print(f"ERROR: Exception during process termination for PID {pid}: {e}", file=sys.stderr)
 
     @staticmethod
-    def _output_reader(pipe, output_queue, stream_name, pid, error_flag):
+    def _output_reader(pipe, output_queue, stream_name, pid, error_flag, arrival_times=None, line_watch=None):
         debug_print(f"Output reader ({stream_name}) started for PID {pid}")
         try:
             for line_num, line in enumerate(iter(pipe.readline, '')):
                 if error_flag.is_set() or JarTester._interrupted:
                      debug_print(f"Output reader ({stream_name}) stopping early for PID {pid} (error or interrupt)")
                      break
+                if arrival_times is not None:
+                    arrival_times.append(time.monotonic())
                 output_queue.put(line)
+                if line_watch is not None:
+                    line_watch.feed(line)
             debug_print(f"Output reader ({stream_name}) finished iter loop for PID {pid}")
         except ValueError:
             if not error_flag.is_set() and not JarTester._interrupted and pipe and not pipe.closed:
@@ -155,6 +176,119 @@ class JarTester:
             except Exception: pass
             debug_print(f"Output reader ({stream_name}) thread exiting for PID {pid}")
 
+    @staticmethod
+    def _interpret_checker_data(jar_basename, checker_data):
+        """Maps the checker's {"result", "errors"} JSON to (status, details)."""
+        # Check the 'result' field from the parsed JSON
+        checker_result_val = checker_data.get("result")
+        if checker_result_val == "Accepted":
+            checker_status = "CORRECT"
+            checker_details = "Checker accepted the output."
+            debug_print(f"Checker result for {jar_basename}: CORRECT (Accepted)")
+        elif checker_result_val == "Rejected":
+            checker_status = "INCORRECT"
+            # Extract error details from the 'errors' list
+            errors_list = checker_data.get("errors", [{"reason": "Checker reported 'Rejected' but no specific error details found."}])
+            # Format error details nicely
+            formatted_errors = []
+            for err_item in errors_list:
+                cmd_num = err_item.get('command_number', '?')
+                reason = err_item.get('reason', 'Unknown reason')
+                cmd = err_item.get('command', '<N/A>')
+                expected = err_item.get('expected', '<N/A>')
+                actual = err_item.get('actual', '<N/A>')
+                formatted_errors.append(f"Cmd {cmd_num}: {reason} (Cmd: '{cmd}', Exp: '{expected}', Act: '{actual}')")
+            checker_details = "; ".join(formatted_errors)
+            # Truncate if too long for overview, full details in log
+            if len(checker_details) > 300:
+                checker_details = checker_details[:300] + "..."
+            debug_print(f"Checker result for {jar_basename}: INCORRECT (Rejected). Details: {checker_details}")
+        else:
+            # Handle unexpected 'result' values or missing key
+            checker_status = "CHECKER_ERROR"
+            res_val = checker_data.get("result", "None")
+            checker_details = f"Checker returned unexpected/missing result value in JSON: '{res_val}'"
+            debug_print(f"Unexpected checker JSON result for {jar_basename}: {checker_details}. Full data: {checker_data}")
+        return checker_status, checker_details
+
+    @staticmethod
+    def _check_output(jar_basename, input_data_path, stdout_content, result):
+        """Runs the checker (golden diff or checker process) on one output, returns (status, details)."""
+        temp_output_file = None
+        checker_status = "CHECKER_PENDING"
+        checker_details = ""
+        try:
+            golden = None
+            if not JarTester._custom_use and JarTester._golden_cache is not None:
+                golden = JarTester._golden_cache.get(input_data_path)
+            if golden is not None:
+                # Expected side simulated once per input, only the diff runs per JAR
+                checker_data = JarTester._golden_cache.compare(golden, stdout_content)
+                checker_status, checker_details = JarTester._interpret_checker_data(jar_basename, checker_data)
+            else:
+                # Create temporary file for JAR's output
+                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".txt", encoding='utf-8', dir=TMP_DIR, errors='replace') as tf:
+                    tf.write(stdout_content)
+                    temp_output_file = tf.name
+
+                # Checker command WITHOUT --tmax
+                if not JarTester._custom_use:
+                    checker_cmd = [sys.executable, JarTester._checker_script_path, input_data_path, temp_output_file]
+                else:
+                    checker_cmd = [sys.executable, JarTester._checker_script_path, input_data_path, temp_output_file, JarTester._custom_std_jar]
+                debug_print(f"Checker using input(gen) '{input_data_path}' and output(jar) '{temp_output_file}'")
+                debug_print(f"Checker command: {' '.join(checker_cmd)}")
+
+                checker_timeout = 45.0 # Keep checker timeout reasonable
+                checker_proc = subprocess.run(
+                    checker_cmd, # Use modified command
+                    capture_output=True, text=True, timeout=checker_timeout, check=False, encoding='utf-8', errors='replace'
+                )
+                debug_print(f"Checker for {jar_basename} finished with code {checker_proc.returncode}")
+
+                if checker_proc.stderr:
+                    result["stderr"].extend(["--- Checker stderr ---"] + checker_proc.stderr.strip().splitlines())
+
+                # --- New Checker Result Parsing (JSON) ---
+                if checker_proc.returncode != 0:
+                    checker_status = "CHECKER_ERROR"
+                    checker_details = f"Checker process exited with code {checker_proc.returncode}."
+                    details_stdout = checker_proc.stdout.strip()
+                    details_stderr = checker_proc.stderr.strip()
+                    if details_stdout: checker_details += f" stdout: {details_stdout[:200]}"
+                    if details_stderr: checker_details += f" stderr: {details_stderr[:200]}"
+                    debug_print(f"Checker error for {jar_basename}: Exit code {checker_proc.returncode}")
+                else:
+                    # Try parsing JSON output
+                    try:
+                        checker_output = checker_proc.stdout
+                        checker_data = json.loads(checker_output)
+                        checker_status, checker_details = JarTester._interpret_checker_data(jar_basename, checker_data)
+                    except json.JSONDecodeError as e_json:
+                        print(f"ERROR: Failed to parse checker JSON output for {jar_basename}: {e_json}", file=sys.stderr)
+                        debug_print(f"Checker JSON parse error. Raw output:\n---\n{checker_proc.stdout}\n---")
+                        checker_status = "CHECKER_ERROR"
+                        checker_details = f"Failed to parse checker JSON output: {e_json}"
+                    except Exception as e_parse: # Catch other potential errors during parsing
+                        print(f"ERROR: Unexpected error processing checker JSON for {jar_basename}: {e_parse}", file=sys.stderr)
+                        checker_status = "CHECKER_ERROR"
+                        checker_details = f"Error processing checker JSON: {e_parse}"
+
+        except subprocess.TimeoutExpired:
+            print(f"ERROR: Checker timed out for {jar_basename}.", file=sys.stderr)
+            checker_status = "CHECKER_ERROR"
+            checker_details = f"Checker process timed out after {checker_timeout}s."
+        except Exception as e_check:
+            print(f"ERROR: Exception running/processing checker for {jar_basename}: {e_check}", file=sys.stderr)
+            debug_print(f"Checker exception for {jar_basename}", exc_info=True)
+            checker_status = "CHECKER_ERROR"
+            checker_details = f"Exception during checker execution/processing: {e_check}"
+        finally:
+            if temp_output_file and os.path.exists(temp_output_file):
+                try: os.remove(temp_output_file)
+                except Exception as e_rm: print(f"WARNING: Failed to remove temp checker output file {temp_output_file}: {e_rm}", file=sys.stderr)
+        return checker_status, checker_details
+
     # --- Modified _run_single_jar (Parameter name changed for clarity) ---
     @staticmethod
     def _run_single_jar(jar_path, input_data_path, fixed_wall_limit, round_num): # Renamed current_wall_limit
@@ -171,6 +305,8 @@ class JarTester:
             "status": "PENDING", "error_details": "",
             "stdout_log_path": None, # Path to saved stdout file
             "stderr": [], # Keep stderr in memory for log
+            "thread_dump": None, "thread_dump_lines": [], # threaddump.summarize() / raw dump, captured on TLE
+            "early_stop": None, # First divergence from the golden output when the JAR was killed for it
             # Removed: "t_final", "wt", "w", "final_score"
             "input_data_path": input_data_path # Store the input path with the result
         }
@@ -178,13 +314,28 @@ class JarTester:
         stderr_reader_thread = None
         stdout_queue = queue.Queue()
         stderr_queue = queue.Queue()
+        stdout_arrivals = []
+        stderr_arrivals = []
+        dump_mark = None # (stdout, stderr) line counts when a thread dump was requested
+        jcmd_dump = None
+        recording_path = None
+        recording_killed = False
+        recording_dump_time = 0.0 # Spent in dump_before_kill(), not charged to the JAR's wall time
+        watcher = None
+        watch_golden = None
+        if JarTester._early_stop and JarTester._golden_cache is not None and not JarTester._custom_use:
+            watcher = divergence.DivergenceWatch(start_wall_time)
         error_flag = threading.Event() # Local error flag for this JAR run
 
         try:
             # --- (Process Launch and Monitoring - unchanged) ---
             debug_print(f"Launching JAR: {jar_basename}")
+            java_cmd = ['java', '-jar', jar_path]
+            if JarTester._profiler is not None and JarTester._profiler.selected(jar_basename):
+                recording_path = JarTester._profiler.recording_path(jar_basename, round_num)
+                java_cmd[1:1] = jfrprofile.java_options(recording_path)
             process = subprocess.Popen(
-                ['java', '-jar', jar_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                java_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace', bufsize=1
             )
             pid = process.pid
@@ -202,8 +353,8 @@ class JarTester:
                 return result
 
             debug_print(f"Starting output reader threads for PID {pid}")
-            stdout_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stdout, stdout_queue, "stdout", pid, error_flag), daemon=True)
-            stderr_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stderr, stderr_queue, "stderr", pid, error_flag), daemon=True)
+            stdout_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stdout, stdout_queue, "stdout", pid, error_flag, stdout_arrivals, watcher), daemon=True)
+            stderr_reader_thread = threading.Thread(target=JarTester._output_reader, args=(process.stderr, stderr_queue, "stderr", pid, error_flag, stderr_arrivals), daemon=True)
             stdout_reader_thread.start()
             stderr_reader_thread.start()
 
@@ -313,6 +464,19 @@ class JarTester:
                 result["cpu_time"] = current_cpu_time
                 result["wall_time"] = current_wall_time
 
+                if watcher is not None:
+                    if not watcher.ready:
+                        watch_golden = JarTester._golden_cache.peek(input_data_path)
+                        if watch_golden is not None:
+                            JarTester._golden_cache.watch(watch_golden, watcher)
+                    if watcher.mismatch is not None:
+                        debug_print(f"Monitor loop {monitor_loops}: Output diverged from golden at line {watcher.mismatch['line']} for PID {pid}")
+                        result["status"] = "INCORRECT"
+                        result["early_stop"] = dict(watcher.mismatch, saved=watcher.time_saved(current_wall_time, fixed_wall_limit))
+                        result["error_details"] = f"Output diverged at line {watcher.mismatch['line']}."
+                        error_flag.set() # Kill now, the checker verdict can no longer change
+                        break
+
                 if current_cpu_time > CPU_TIME_LIMIT:
                     debug_print(f"Monitor loop {monitor_loops}: CTLE for PID {pid}")
                     result["status"] = "CTLE"
@@ -325,6 +489,9 @@ class JarTester:
                     debug_print(f"Monitor loop {monitor_loops}: TLE for PID {pid}")
                     result["status"] = "TLE"
                     result["error_details"] = f"Wall time {current_wall_time:.2f}s exceeded limit {fixed_wall_limit:.2f}s."
+                    # Ask the JVM for a thread dump while the reader threads still drain its pipes (bounded delay)
+                    dump_mark = (len(stdout_arrivals), len(stderr_arrivals))
+                    jcmd_dump = threaddump.capture(pid, lambda: len(stdout_arrivals) + len(stderr_arrivals))
                     error_flag.set() # Set local flag on limit exceeded
                     break
 
@@ -336,7 +503,14 @@ class JarTester:
             if error_flag.is_set() and pid != -1:
                  debug_print(f"Error flag set or limit exceeded, ensuring process tree killed for PID {pid}")
                  try:
-                     if process and process.poll() is None: JarTester._kill_process_tree(pid)
+                     if process and process.poll() is None:
+                         if recording_path is not None:
+                             # SIGKILL follows SIGTERM too soon for dumponexit, so take the recording first
+                             recording_killed = True
+                             dump_start = time.monotonic()
+                             JarTester._profiler.dump_before_kill(pid, recording_path)
+                             recording_dump_time = time.monotonic() - dump_start
+                         JarTester._kill_process_tree(pid)
                      elif psutil.pid_exists(pid): JarTester._kill_process_tree(pid)
                      else: debug_print(f"Process {pid} already gone before kill attempt after loop exit.")
                  except Exception as e_kill_loop:
@@ -358,7 +532,7 @@ class JarTester:
 
             final_status_determined = result["status"] not in ["RUNNING", "PENDING"]
 
-            result["wall_time"] = time.monotonic() - start_wall_time
+            result["wall_time"] = time.monotonic() - start_wall_time - recording_dump_time
             try:
                 if psutil.pid_exists(pid):
                      final_cpu_times = psutil.Process(pid).cpu_times()
@@ -449,10 +623,35 @@ class JarTester:
                 while True: stderr_lines.append(stderr_queue.get(block=False))
             except queue.Empty: pass
 
+            if dump_mark is not None:
+                # A SIGQUIT dump is printed by the JVM itself; keep it out of the JAR's stdout / stderr
+                stdout_lines, stdout_dump = threaddump.extract(stdout_lines, dump_mark[0])
+                stderr_lines, stderr_dump = threaddump.extract(stderr_lines, dump_mark[1])
+                dump_lines = jcmd_dump or stdout_dump or stderr_dump
+                if dump_lines:
+                    result["thread_dump"] = threaddump.summarize(dump_lines)
+                    result["thread_dump_lines"] = dump_lines
+                    result["error_details"] += " " + threaddump.format_summary(result["thread_dump"])
+
             result["stderr"] = stderr_lines # Store stderr directly
+            if recording_path is not None:
+                # The JVM is gone and the times are final, so reading the recording costs nothing measured
+                if not JarTester._profiler.add_recording(jar_basename, recording_path):
+                    if recording_killed:
+                        print(f"WARNING: JFR recording of killed JAR {jar_basename} ({result['status']}) could not be read, kept at {recording_path}", file=sys.stderr)
+                    else:
+                        debug_print(f"JFR recording for {jar_basename} not parsed, kept at {recording_path}")
             debug_print(f"Drained queues for PID {pid}. stdout lines: {len(stdout_lines)}, stderr lines: {len(stderr_lines)}")
 
             stdout_content = "".join(stdout_lines)
+            if result["early_stop"] is not None:
+                # Same verdict text as a full checker run; the diff stops at the diverging line
+                checker_status, checker_details = JarTester._interpret_checker_data(
+                    jar_basename, JarTester._golden_cache.compare(watch_golden, stdout_content))
+                if checker_status == "INCORRECT":
+                    result["error_details"] = f"Checker: {checker_details}"
+                stop = result["early_stop"]
+                result["error_details"] += f" Stopped at output line {stop['line']} after {stop['at']:.2f}s (~{stop['saved']:.1f}s saved)."
             # Save stdout if content exists OR if the run failed/was interrupted (useful for debugging failures)
             save_stdout = stdout_content or result["status"] not in ["PENDING", "RUNNING", "COMPLETED", "CORRECT"]
             if save_stdout:
@@ -460,9 +659,13 @@ class JarTester:
                 stdout_filename = f"output_{safe_jar_basename}_{round_num}.txt"
                 stdout_filepath = os.path.abspath(os.path.join(TMP_DIR, stdout_filename))
                 try:
-                    os.makedirs(TMP_DIR, exist_ok=True) # Ensure dir exists
-                    with open(stdout_filepath, 'w', encoding='utf-8', errors='replace') as f_out:
-                        f_out.write(stdout_content)
+                    if JarTester._artifact_store is not None:
+                        # Compressed + deduplicated, read back with artifact_store.py cat/line/tail
+                        stdout_filepath = JarTester._artifact_store.put(stdout_content)
+                    else:
+                        os.makedirs(TMP_DIR, exist_ok=True) # Ensure dir exists
+                        with open(stdout_filepath, 'w', encoding='utf-8', errors='replace') as f_out:
+                            f_out.write(stdout_content)
                     result["stdout_log_path"] = stdout_filepath # Store the path
                     debug_print(f"JAR stdout saved to {stdout_filepath}")
                 except Exception as e_write_stdout:
@@ -485,102 +688,23 @@ class JarTester:
 
         if run_checker:
             debug_print(f"Running checker for {jar_basename} (PID {pid}) because status is COMPLETED and not globally interrupted.")
-            temp_output_file = None
-            checker_status = "CHECKER_PENDING"
-            checker_details = ""
-            try:
-                # Create temporary file for JAR's output
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=".txt", encoding='utf-8', dir=TMP_DIR, errors='replace') as tf:
-                    tf.write(stdout_content)
-                    temp_output_file = tf.name
-
-                # Checker command WITHOUT --tmax
-                if not JarTester._custom_use:
-                    checker_cmd = [sys.executable, JarTester._checker_script_path, input_data_path, temp_output_file]
-                else:
-                    checker_cmd = [sys.executable, JarTester._checker_script_path, input_data_path, temp_output_file, JarTester._custom_std_jar]
-                debug_print(f"Checker using input(gen) '{input_data_path}' and output(jar) '{temp_output_file}'")
-                debug_print(f"Checker command: {' '.join(checker_cmd)}")
-
-                checker_timeout = 45.0 # Keep checker timeout reasonable
-                checker_proc = subprocess.run(
-                    checker_cmd, # Use modified command
-                    capture_output=True, text=True, timeout=checker_timeout, check=False, encoding='utf-8', errors='replace'
-                )
-                debug_print(f"Checker for {jar_basename} finished with code {checker_proc.returncode}")
-
-                if checker_proc.stderr:
-                    result["stderr"].extend(["--- Checker stderr ---"] + checker_proc.stderr.strip().splitlines())
-
-                # --- New Checker Result Parsing (JSON) ---
-                if checker_proc.returncode != 0:
-                    checker_status = "CHECKER_ERROR"
-                    checker_details = f"Checker process exited with code {checker_proc.returncode}."
-                    details_stdout = checker_proc.stdout.strip()
-                    details_stderr = checker_proc.stderr.strip()
-                    if details_stdout: checker_details += f" stdout: {details_stdout[:200]}"
-                    if details_stderr: checker_details += f" stderr: {details_stderr[:200]}"
-                    debug_print(f"Checker error for {jar_basename}: Exit code {checker_proc.returncode}")
-                else:
-                    # Try parsing JSON output
-                    try:
-                        checker_output = checker_proc.stdout
-                        checker_data = json.loads(checker_output)
-
-                        # Check the 'result' field from the parsed JSON
-                        checker_result_val = checker_data.get("result")
-                        if checker_result_val == "Accepted":
-                            checker_status = "CORRECT"
-                            checker_details = "Checker accepted the output."
-                            debug_print(f"Checker result for {jar_basename}: CORRECT (Accepted)")
-                        elif checker_result_val == "Rejected":
-                            checker_status = "INCORRECT"
-                            # Extract error details from the 'errors' list
-                            errors_list = checker_data.get("errors", [{"reason": "Checker reported 'Rejected' but no specific error details found."}])
-                            # Format error details nicely
-                            formatted_errors = []
-                            for err_item in errors_list:
-                                cmd_num = err_item.get('command_number', '?')
-                                reason = err_item.get('reason', 'Unknown reason')
-                                cmd = err_item.get('command', '<N/A>')
-                                expected = err_item.get('expected', '<N/A>')
-                                actual = err_item.get('actual', '<N/A>')
-                                formatted_errors.append(f"Cmd {cmd_num}: {reason} (Cmd: '{cmd}', Exp: '{expected}', Act: '{actual}')")
-                            checker_details = "; ".join(formatted_errors)
-                            # Truncate if too long for overview, full details in log
-                            if len(checker_details) > 300:
-                                checker_details = checker_details[:300] + "..."
-                            debug_print(f"Checker result for {jar_basename}: INCORRECT (Rejected). Details: {checker_details}")
-                        else:
-                            # Handle unexpected 'result' values or missing key
-                            checker_status = "CHECKER_ERROR"
-                            res_val = checker_data.get("result", "None")
-                            checker_details = f"Checker returned unexpected/missing result value in JSON: '{res_val}'"
-                            debug_print(f"Unexpected checker JSON result for {jar_basename}: {checker_details}. Full data: {checker_data}")
-
-                    except json.JSONDecodeError as e_json:
-                        print(f"ERROR: Failed to parse checker JSON output for {jar_basename}: {e_json}", file=sys.stderr)
-                        debug_print(f"Checker JSON parse error. Raw output:\n---\n{checker_proc.stdout}\n---")
-                        checker_status = "CHECKER_ERROR"
-                        checker_details = f"Failed to parse checker JSON output: {e_json}"
-                    except Exception as e_parse: # Catch other potential errors during parsing
-                        print(f"ERROR: Unexpected error processing checker JSON for {jar_basename}: {e_parse}", file=sys.stderr)
-                        checker_status = "CHECKER_ERROR"
-                        checker_details = f"Error processing checker JSON: {e_parse}"
-
-            except subprocess.TimeoutExpired:
-                print(f"ERROR: Checker timed out for {jar_basename}.", file=sys.stderr)
-                checker_status = "CHECKER_ERROR"
-                checker_details = f"Checker process timed out after {checker_timeout}s."
-            except Exception as e_check:
-                print(f"ERROR: Exception running/processing checker for {jar_basename}: {e_check}", file=sys.stderr)
-                debug_print(f"Checker exception for {jar_basename}", exc_info=True)
-                checker_status = "CHECKER_ERROR"
-                checker_details = f"Exception during checker execution/processing: {e_check}"
-            finally:
-                if temp_output_file and os.path.exists(temp_output_file):
-                    try: os.remove(temp_output_file)
-                    except Exception as e_rm: print(f"WARNING: Failed to remove temp checker output file {temp_output_file}: {e_rm}", file=sys.stderr)
+            vote_group, vote_leader = None, True
+            round_vote = JarTester._round_votes.get(round_num)
+            if round_vote is not None:
+                vote_group, vote_leader = round_vote.join(jar_basename, stdout_content)
+                result["output_group_key"] = vote_group.key
+            verdict = None
+            if not vote_leader:
+                # Byte-identical to an output already (being) checked this round
+                verdict = vote_group.wait()
+                debug_print(f"Reusing checker verdict of {vote_group.representative} for {jar_basename}: {verdict}")
+            if verdict is None:
+                try:
+                    verdict = JarTester._check_output(jar_basename, input_data_path, stdout_content, result)
+                finally:
+                    if vote_leader and vote_group is not None:
+                        vote_group.settle(verdict)
+            checker_status, checker_details = verdict
 
             # Update result based on checker outcome
             result["status"] = checker_status
@@ -760,6 +884,16 @@ class JarTester:
                 log_lines.append("  --- Stdout Log File ---")
                 log_lines.append(f"    Path: {stdout_log if stdout_log else '<Not Saved or Error>'}")
                 log_lines.append("  --- End Stdout Log File ---")
+                if r.get("thread_dump"):
+                    log_lines.append(f"  {threaddump.format_summary(r['thread_dump'])} (full dump in the round's error log)")
+                group = r.get("output_group")
+                if group and group["representative"] != jar_name:
+                    log_lines.append(f"  Verdict shared with {group['representative']} (identical output, {group['size']} JARs)")
+                if r.get("early_stop"):
+                    stop = r["early_stop"]
+                    log_lines.append(f"  Early Stop: killed at output line {stop['line']} (Cmd {stop['command_number'] or '?'}: '{stop['command'] or '<extra output>'}') after {stop['at']:.2f}s")
+                    log_lines.append(f"    Expected: {stop['expected'] if stop['expected'] is not None else '<end of output>'}")
+                    log_lines.append(f"    Actual:   {stop['actual']}")
 
                 log_lines.append("  --- Stderr ---")
                 stderr = r.get("stderr", [])
@@ -776,6 +910,17 @@ class JarTester:
             # --- End Error Logging Section ---
 
         log_lines.append(separator)
+        early_stops = [r["early_stop"] for r in results if r.get("early_stop")]
+        early_stop_line = None
+        if early_stops:
+            early_stop_line = f"Early stop: {len(early_stops)} JAR(s) killed at their first wrong line, ~{sum(e['saved'] for e in early_stops):.1f}s saved"
+            log_lines.append(early_stop_line)
+        voted = [r for r in results if r.get("output_group")]
+        vote_line = None
+        if voted:
+            distinct = len({r["output_group"]["representative"] for r in voted})
+            vote_line = f"Output vote: {distinct} distinct output(s) among {len(voted)} checked JAR(s), {len(voted) - distinct} checker verdict(s) reused"
+            log_lines.append(vote_line)
 
         with JarTester._console_lock:
             print(round_header)
@@ -784,6 +929,10 @@ class JarTester:
             for line in result_lines_for_console:
                 print(line)
             print(separator)
+            if early_stop_line:
+                print(early_stop_line)
+            if vote_line:
+                print(vote_line)
             print(f"--- End of Round {round_num} ---")
 
         if JarTester._log_file_path:
@@ -865,6 +1014,10 @@ class JarTester:
              summary_lines.append(line)
 
         summary_lines.append("-" * len(header))
+        if JarTester._golden_cache is not None:
+            summary_lines.append(f"Checker simulations: {JarTester._golden_cache.simulations} (golden cache hits: {JarTester._golden_cache.hits})")
+        if JarTester._profiler is not None:
+            summary_lines.extend(JarTester._profiler.report_lines())
         return "\n".join(summary_lines)
 
     # --- (Keep _signal_handler as it is) ---
@@ -1056,6 +1209,11 @@ class JarTester:
             max_workers_per_round = min(len(JarTester._jar_files), (os.cpu_count() or 4) + 1)
             debug_print(f"Round {round_num}: Running {len(JarTester._jar_files)} JARs with max {max_workers_per_round} inner workers...")
 
+            if JarTester._golden_cache is not None:
+                JarTester._golden_cache.prefetch(input_data_path) # Simulate while the JARs run
+            if JarTester._output_vote:
+                JarTester._round_votes[round_num] = outputvote.RoundVote()
+
             # Inner ThreadPoolExecutor for JARs within this round
             with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers_per_round, thread_name_prefix=f'JarExec_R{round_num}') as executor:
                 if JarTester._interrupted:
@@ -1104,6 +1262,16 @@ class JarTester:
 
             debug_print(f"Round {round_num}: All {len(future_to_jar)} JAR executions completed or terminated.")
 
+            round_vote = JarTester._round_votes.pop(round_num, None)
+            if round_vote is not None:
+                distinct_outputs, reused = round_vote.annotate(results_this_round)
+                debug_print(f"Round {round_num}: {distinct_outputs} distinct outputs, {reused} checker verdicts reused.")
+                for r in results_this_round:
+                    group = r.get("output_group")
+                    if group and group["divergent_block"] is not None and r.get("status") != "CORRECT":
+                        _, first_line, last_line = group["divergent_block"]
+                        r["error_details"] += f" Output first differs from the majority ({group['majority_size']} JARs) in lines {first_line}-{last_line}."
+
             if JarTester._interrupted:
                 debug_print(f"Round {round_num}: Interrupted after JAR execution completed. Skipping history update and further processing.")
                 # Decide whether to keep files on interrupt based on cleanup setting
@@ -1118,7 +1286,7 @@ class JarTester:
                 if CLEANUP_SUCCESSFUL_ROUNDS:
                     for r in results_this_round:
                         stdout_path = r.get("stdout_log_path")
-                        if stdout_path and os.path.exists(stdout_path):
+                        if stdout_path and os.path.exists(stdout_path) and not artifact_store.is_artifact(stdout_path): # Shared blobs are left to LRU eviction
                             try:
                                 os.remove(stdout_path)
                                 debug_print(f"  Deleting output file (interrupt + cleanup): {stdout_path}")
@@ -1151,6 +1319,16 @@ class JarTester:
                             f_err.write(f"Error Details: {r.get('error_details', '')}\n")
                             stdout_log = r.get("stdout_log_path")
                             f_err.write(f"Stdout Log File Path: {stdout_log if stdout_log else '<Not Saved or Error>'}\n")
+                            if artifact_store.is_artifact(stdout_log):
+                                f_err.write(f"--- Stdout Tail (last {ERROR_LOG_STDOUT_TAIL_LINES} lines, full output: python artifact_store.py cat <path>) ---\n")
+                                for out_line in artifact_store.tail(stdout_log, ERROR_LOG_STDOUT_TAIL_LINES):
+                                    f_err.write(f"  {out_line.rstrip()}\n")
+
+                            if r.get("thread_dump_lines"):
+                                f_err.write(f"--- {threaddump.format_summary(r['thread_dump'])} ---\n")
+                                for dump_line in r["thread_dump_lines"]:
+                                    f_err.write(f"  {dump_line.rstrip()}\n")
+                                f_err.write("--- End Thread Dump ---\n")
                             f_err.write("--- Stderr Content ---\n")
                             stderr = r.get("stderr", [])
                             if stderr:
@@ -1186,7 +1364,7 @@ class JarTester:
                         if stdout_path and os.path.exists(stdout_path):
                             failed_jar_outputs_to_keep.append(stdout_path)
                     else: # CORRECT
-                        if stdout_path and os.path.exists(stdout_path):
+                        if stdout_path and os.path.exists(stdout_path) and not artifact_store.is_artifact(stdout_path): # Shared blobs are left to LRU eviction
                             successful_jar_outputs_to_delete.append(stdout_path)
 
                 if all_passed:
@@ -1319,6 +1497,19 @@ class JarTester:
             LOG_DIR = logs_dir_config
             TMP_DIR = tmp_dir_config
             CLEANUP_SUCCESSFUL_ROUNDS = bool(cleanup_enabled_config)
+            JarTester._artifact_store = None
+            if test_config.get('artifact_store', False):
+                JarTester._artifact_store = artifact_store.ArtifactStore(
+                    test_config.get('artifact_dir', os.path.join(TMP_DIR, "artifacts")),
+                    int(float(test_config.get('artifact_store_max_mb', artifact_store.DEFAULT_MAX_MB)) * 1024 * 1024)
+                )
+                print(f"INFO: JAR outputs are stored compressed ({JarTester._artifact_store.codec}) and deduplicated in {JarTester._artifact_store.root}")
+            JarTester._profiler = None
+            if test_config.get('profile', False):
+                JarTester._profiler = jfrprofile.Profiler(TMP_DIR, test_config.get('profile_jars'))
+                print(f"INFO: JFR profiling enabled for {', '.join(sorted(JarTester._profiler.jars)) if JarTester._profiler.jars else 'all JARs'} (JVM start-up and timings are slightly slower)")
+                if JarTester._profiler.jfr_tool is None:
+                    print("WARNING: JDK 'jfr' tool not found on PATH or in JAVA_HOME, recordings will be kept in the tmp dir but not summarised.", file=sys.stderr)
 
             # Update debug status immediately if changed
             if ENABLE_DETAILED_DEBUG:
@@ -1336,8 +1527,20 @@ class JarTester:
 
             JarTester._jar_dir = jar_base_dir
             JarTester._gen_script_path = os.path.abspath(os.path.join(hw_n_str, "gen.py"))
+            JarTester._golden_cache = None
+            JarTester._early_stop = bool(test_config.get('early_stop', True))
+            JarTester._output_vote = bool(test_config.get('output_vote', True))
             if not custom_use:
                 JarTester._checker_script_path = os.path.abspath(os.path.join(hw_n_str, "checker.py"))
+                if test_config.get('golden_cache', True) and os.path.exists(JarTester._checker_script_path):
+                    cache = golden_cache.GoldenCache(
+                        JarTester._checker_script_path,
+                        test_config.get('golden_cache_dir', os.path.join(tmp_dir_config, "golden")),
+                        max_bytes=int(float(test_config.get('golden_cache_max_mb', golden_cache.DEFAULT_MAX_MB)) * 1024 * 1024)
+                    )
+                    if cache.available:
+                        JarTester._golden_cache = cache
+                        print(f"INFO: Expected outputs are simulated once per input and cached in {cache.cache_dir}")
             else:
                 JarTester._custom_use = True
                 custom_path = os.path.join(hw_n_str, "custom_checker.py")
@@ -1352,6 +1555,12 @@ class JarTester:
                     return
                 else:
                     JarTester._custom_std_jar = os.path.abspath(std_path)
+                # Exported through the environment so every custom_checker subprocess shares one cache
+                std_cache.configure(
+                    test_config.get('std_cache_dir', os.path.join(tmp_dir_config, "std_cache")),
+                    test_config.get('std_cache_max_mb', std_cache.DEFAULT_MAX_MB)
+                )
+                print(f"INFO: Std outputs for custom checker are cached in {std_cache.get_cache().cache_dir}")
 
             JarTester._loaded_preset_commands = [] # Reset before loading
             gen_dir = os.path.dirname(JarTester._gen_script_path)
@@ -0,0 +1,150 @@
+# threaddump.py
+# Java thread dumps for hung JARs. On TLE the harness asks the still-running JVM for a
+# dump (SIGQUIT, the JVM prints it on its own stdout; jcmd Thread.print where SIGQUIT
+# does not exist) right before killing it, then condenses the dump into threads per
+# state plus any lock cycles, which is usually enough to tell a deadlock from a slow run.
+import os
+import re
+import shutil
+import signal
+import subprocess
+import time
+from collections import Counter
+
+DUMP_TIMEOUT = 2.0   # seconds: upper bound on how long a TLE kill is delayed for the dump
+QUIET_PERIOD = 0.2   # seconds without new output after which the dump is considered complete
+POLL_INTERVAL = 0.05
+
+DUMP_START_RE = re.compile(r'^Full thread dump ')
+DUMP_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\s*$') # Printed right before the header
+THREAD_HEADER_RE = re.compile(r'^"(.*)"(?:\s|$)')
+STATE_RE = re.compile(r'^\s+java\.lang\.Thread\.State: (\w+)')
+WAITING_RE = re.compile(r'^\s+- (?:waiting to lock|parking to wait for)\s+<(0x[0-9a-f]+)>')
+LOCKED_RE = re.compile(r'^\s+- (?:locked\s+)?<(0x[0-9a-f]+)>') # "- locked <..>" / ownable synchronizers "- <..>"
+# JVM's own deadlock report: '"Thread-1":' followed by '  which is held by "Thread-0"'
+DEADLOCK_THREAD_RE = re.compile(r'^"(.*)":\s*$')
+DEADLOCK_HOLDER_RE = re.compile(r'which is held by "(.*)"')
+
+
+def capture(pid, line_count, timeout=DUMP_TIMEOUT):
+    """
+    Requests a thread dump from the running JVM pid and waits (at most timeout) until it
+    has been printed. line_count: callable returning how many lines the harness received
+    from the JVM so far. Returns jcmd's output lines, [] if the JVM printed the dump
+    itself (use extract() on the captured output), None if no dump could be requested.
+    """
+    if hasattr(signal, "SIGQUIT"):
+        try:
+            os.kill(pid, signal.SIGQUIT)
+        except OSError:
+            return None
+        deadline = time.monotonic() + timeout
+        seen, last_change = line_count(), None
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            count = line_count()
+            if count != seen:
+                seen, last_change = count, time.monotonic()
+            elif last_change is not None and time.monotonic() - last_change >= QUIET_PERIOD:
+                break
+        return []
+
+    jcmd = shutil.which("jcmd")
+    if jcmd is None:
+        return None
+    try:
+        completed = subprocess.run([jcmd, str(pid), "Thread.print", "-l"], capture_output=True,
+                                   text=True, encoding="utf-8", errors="replace", timeout=timeout)
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    return completed.stdout.splitlines(keepends=True) if completed.returncode == 0 else None
+
+
+def extract(lines, start=0):
+    """
+    Splits a JVM-printed dump out of captured output lines. Only lines from index start on
+    are searched; the dump runs from its 'Full thread dump' header (and date line) to the
+    end, since the JVM is killed right after. Returns (remaining lines, dump lines).
+    """
+    for i in range(start, len(lines)):
+        if DUMP_START_RE.match(lines[i]):
+            if i > start and DUMP_DATE_RE.match(lines[i - 1]):
+                i -= 1
+            return lines[:i], lines[i:]
+    return lines, []
+
+
+def _find_cycles(waits_for):
+    """waits_for: thread -> thread holding the lock it waits for. Returns each cycle once."""
+    cycles, done = [], set()
+    for start in waits_for:
+        path, on_path = [], {}
+        node = start
+        while node in waits_for and node not in done and node not in on_path:
+            on_path[node] = len(path)
+            path.append(node)
+            node = waits_for[node]
+        if node in on_path:
+            cycles.append(path[on_path[node]:])
+        done.update(path)
+    return cycles
+
+
+def summarize(lines):
+    """{threads, states: {state: count}, blocked, deadlocks: [[thread, ...]]} of a thread dump."""
+    states = Counter()
+    owners = {}   # lock address -> thread holding it
+    waiting = {}  # thread -> lock address it waits for
+    waits_for = {}
+    thread = None
+    deadlock_thread = None
+    for line in lines:
+        line = line.rstrip("\n")
+        match = THREAD_HEADER_RE.match(line)
+        if match:
+            thread = match.group(1)
+            continue
+        match = DEADLOCK_THREAD_RE.match(line)
+        if match:
+            deadlock_thread, thread = match.group(1), None
+            continue
+        if deadlock_thread is not None:
+            match = DEADLOCK_HOLDER_RE.search(line)
+            if match:
+                waits_for[deadlock_thread] = match.group(1)
+                deadlock_thread = None
+            continue
+        if thread is None:
+            continue
+        match = STATE_RE.match(line)
+        if match:
+            states[match.group(1)] += 1
+            continue
+        match = WAITING_RE.match(line)
+        if match:
+            waiting[thread] = match.group(1)
+            continue
+        match = LOCKED_RE.match(line)
+        if match:
+            owners[match.group(1)] = thread
+
+    for waiter, lock in waiting.items():
+        holder = owners.get(lock)
+        if holder is not None and holder != waiter:
+            waits_for.setdefault(waiter, holder)
+    return {
+        "threads": sum(states.values()),
+        "states": dict(states.most_common()),
+        "blocked": len(waits_for),
+        "deadlocks": _find_cycles(waits_for),
+    }
+
+
+def format_summary(summary):
+    if not summary["threads"]:
+        return "Thread dump: no Java threads found"
+    states = ", ".join(f"{state} {count}" for state, count in summary["states"].items())
+    text = f"Thread dump: {summary['threads']} threads ({states})"
+    for cycle in summary["deadlocks"]:
+        text += "; deadlock: " + " -> ".join(cycle + cycle[:1])
+    return text